@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Reproducible, headless CPU benchmark for the inference path.
+
+Replays recorded videos (hand.mov, not_hand.mov) and the hand_cls/val images
+through the same functions live_demo.py uses for every frame and reports:
+
+    - model load time and warm-up (first vs steady-state inference)
+    - per-stage latency percentiles: decode, resize, inference, postprocess, render
+    - throughput at several batch sizes and thread counts
+
+Results are written as JSON so runs can be compared across ultralytics/torch
+versions and weight files.
+
+Example:
+    python3 benchmark.py --weights best_final.pt yolov8n-cls.pt --backends torch onnx --output bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+
+import cv2
+import numpy as np
+import torch
+
+from hand_classifier import HandClassifier
+from inference_backends import BACKENDS, list_images, resize_input
+from live_demo import draw_detection, load_overlay_image
+
+STAGES = ('decode', 'resize', 'inference', 'postprocess', 'render')
+
+
+def percentiles(samples_ms):
+    """Summary statistics for a list of latencies in milliseconds."""
+    if not samples_ms:
+        return None
+    values = np.asarray(samples_ms)
+    return {
+        'count': int(values.size),
+        'mean': round(float(values.mean()), 4),
+        'p50': round(float(np.percentile(values, 50)), 4),
+        'p90': round(float(np.percentile(values, 90)), 4),
+        'p99': round(float(np.percentile(values, 99)), 4),
+        'max': round(float(values.max()), 4),
+    }
+
+
+def load_frames(videos, image_dir, max_frames):
+    """Decode benchmark inputs once; return (frames, per-frame decode ms, sources)."""
+    frames, decode_ms, sources = [], [], {}
+
+    for video_path in videos:
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            print(f"Warning: could not open {video_path}, skipping")
+            continue
+        count = 0
+        while max_frames is None or count < max_frames:
+            start = time.perf_counter()
+            ret, frame = cap.read()
+            elapsed = (time.perf_counter() - start) * 1000
+            if not ret:
+                break
+            frames.append(frame)
+            decode_ms.append(elapsed)
+            count += 1
+        cap.release()
+        sources[video_path] = count
+
+    if image_dir and os.path.isdir(image_dir):
+        paths = list_images(image_dir)[:max_frames]
+        for path in paths:
+            start = time.perf_counter()
+            frame = cv2.imread(path)
+            elapsed = (time.perf_counter() - start) * 1000
+            if frame is not None:
+                frames.append(frame)
+                decode_ms.append(elapsed)
+        sources[image_dir] = len(paths)
+
+    return frames, decode_ms, sources
+
+
+def make_backend(name, weights, imgsz, threads):
+    """Load a CPU HandClassifier using the given number of threads."""
+    return HandClassifier(weights, imgsz, name, device='cpu', threads=threads)
+
+
+def time_live_path(model, frames, imgsz, ghost_overlay):
+    """Run each frame through the live_demo per-frame path, timing every stage.
+
+    The frame is resized to the model input once, here, so 'resize' is timed on
+    its own; the backends leave frames that are already imgsz x imgsz as they are.
+    """
+    timings = {stage: [] for stage in STAGES if stage != 'decode'}
+    for frame in frames:
+        t0 = time.perf_counter()
+        resized = resize_input(frame, imgsz)
+        t1 = time.perf_counter()
+        probs = model.predict_batch([resized])[0]
+        t2 = time.perf_counter()
+        top_idx = int(probs.argmax())
+        label = model.labels[top_idx]
+        t3 = time.perf_counter()
+        draw_detection(frame.copy(), label, probs, ghost_overlay)
+        t4 = time.perf_counter()
+
+        timings['resize'].append((t1 - t0) * 1000)
+        timings['inference'].append((t2 - t1) * 1000)
+        timings['postprocess'].append((t3 - t2) * 1000)
+        timings['render'].append((t4 - t3) * 1000)
+    return timings
+
+
+def time_throughput(model, frames, batch_size):
+    """Frames per second when frames are fed to the model in batches."""
+    start = time.perf_counter()
+    for i in range(0, len(frames), batch_size):
+        model.predict_batch(frames[i:i + batch_size])
+    elapsed = time.perf_counter() - start
+    return round(len(frames) / elapsed, 2) if elapsed > 0 else None
+
+
+def benchmark(weights, backend_name, threads, frames, decode_ms, imgsz, batch_sizes, warmup, ghost_overlay):
+    """Benchmark one (weights, backend, threads) combination."""
+    start = time.perf_counter()
+    model = make_backend(backend_name, weights, imgsz, threads)
+    load_s = time.perf_counter() - start
+
+    # Warm-up: the first call pays for lazy initialisation
+    sample = frames[0]
+    start = time.perf_counter()
+    model.predict(sample)
+    first_ms = (time.perf_counter() - start) * 1000
+    for _ in range(warmup):
+        model.predict(sample)
+
+    stages = time_live_path(model, frames, imgsz, ghost_overlay)
+    stages['decode'] = decode_ms
+    steady_ms = float(np.median(stages['inference']))
+
+    per_frame_ms = sum(float(np.mean(stages[s])) for s in STAGES)
+    return {
+        'weights': weights,
+        'backend': backend_name,
+        'threads': threads,
+        'load_s': round(load_s, 4),
+        'warmup': {'first_ms': round(first_ms, 4), 'steady_ms': round(steady_ms, 4), 'iterations': warmup},
+        'stages_ms': {stage: percentiles(stages[stage]) for stage in STAGES},
+        'live_fps': round(1000 / per_frame_ms, 2) if per_frame_ms > 0 else None,
+        'throughput_fps': {str(b): time_throughput(model, frames, b) for b in batch_sizes},
+    }
+
+
+def environment():
+    """Versions and hardware details needed to compare runs."""
+    import ultralytics
+
+    info = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'python': platform.python_version(),
+        'torch': torch.__version__,
+        'ultralytics': ultralytics.__version__,
+        'opencv': cv2.__version__,
+        'numpy': np.__version__,
+    }
+    try:
+        import onnxruntime
+        info['onnxruntime'] = onnxruntime.__version__
+    except ImportError:
+        pass
+    return info
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Headless CPU benchmark of the live demo inference path')
+    parser.add_argument('--weights', nargs='+', default=['best_final.pt'], help='Weight files to benchmark (default: best_final.pt)')
+    parser.add_argument('--backends', nargs='+', choices=BACKENDS, default=['torch'], help='Backends to benchmark (default: torch)')
+    parser.add_argument('--videos', nargs='*', default=['hand.mov', 'not_hand.mov'], help='Videos to replay (default: hand.mov not_hand.mov)')
+    parser.add_argument('--images', type=str, default='hand_cls/val', help='Image directory to replay (default: hand_cls/val)')
+    parser.add_argument('--max-frames', type=int, default=200, help='Frames to take from each video / image dir (default: 200)')
+    parser.add_argument('--imgsz', type=int, default=224, help='Image size expected by the model (default: 224)')
+    parser.add_argument('--batch-sizes', nargs='+', type=int, default=[1, 4, 16], help='Batch sizes for throughput (default: 1 4 16)')
+    parser.add_argument('--threads', nargs='+', type=int, default=[1, os.cpu_count() or 1], help='CPU thread counts (default: 1 and all cores)')
+    parser.add_argument('--warmup', type=int, default=10, help='Warm-up iterations before timing (default: 10)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    parser.add_argument('--output', type=str, default='benchmark.json', help='Where to write JSON results (default: benchmark.json)')
+    args = parser.parse_args()
+
+    np.random.seed(args.seed)
+    torch.manual_seed(args.seed)
+
+    print("=== Inference Benchmark (CPU) ===")
+    frames, decode_ms, sources = load_frames(args.videos, args.images, args.max_frames)
+    if not frames:
+        print("Error: no frames to benchmark. Check --videos / --images.")
+        return 1
+    for source, count in sources.items():
+        print(f"  {source}: {count} frames")
+
+    ghost_overlay = load_overlay_image('assets/ghost.png', 150, 150)
+    report = {'environment': environment(), 'inputs': sources, 'config': vars(args), 'runs': []}
+
+    for weights in args.weights:
+        if not os.path.exists(weights):
+            print(f"Warning: {weights} not found, skipping")
+            continue
+        for backend_name in args.backends:
+            for threads in sorted(set(args.threads)):
+                print(f"\n--- {weights} | {backend_name} | {threads} thread(s) ---")
+                run = benchmark(weights, backend_name, threads, frames, decode_ms, args.imgsz,
+                                args.batch_sizes, args.warmup, ghost_overlay)
+                report['runs'].append(run)
+
+                print(f"  load {run['load_s']:.2f}s | first {run['warmup']['first_ms']:.1f} ms | "
+                      f"steady {run['warmup']['steady_ms']:.1f} ms | live {run['live_fps']} fps")
+                for stage in STAGES:
+                    stats = run['stages_ms'][stage]
+                    print(f"  {stage:<12} p50 {stats['p50']:7.2f} ms  p90 {stats['p90']:7.2f} ms  p99 {stats['p99']:7.2f} ms")
+                print("  throughput " + "  ".join(f"b{b}: {fps} fps" for b, fps in run['throughput_fps'].items()))
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✓ Results written to {args.output}")
+    return 0 if report['runs'] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
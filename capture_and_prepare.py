@@ -2,11 +2,17 @@
 """
 Combined workflow: Capture videos and prepare dataset in one step.
 This is the recommended tool for workshop participants.
+
+    python3 capture_and_prepare.py            # record videos, then extract frames
+    python3 capture_and_prepare.py --direct   # save frames straight into hand_cls/ while recording
 """
+import argparse
 import subprocess
 import sys
 import os
 
+from dataset_manifest import get_manifest
+
 
 def run_command(command, description):
     """Run a command and handle errors."""
@@ -20,6 +26,10 @@ def run_command(command, description):
 
 def main():
     """Main workflow combining video capture and frame extraction."""
+    parser = argparse.ArgumentParser(description='Capture videos and prepare the hand_cls dataset')
+    parser.add_argument('--direct', action='store_true', help='Skip the intermediate videos and frame extraction')
+    args = parser.parse_args()
+
     print("=== Hand Classification Dataset Creator ===")
     print("This tool will:")
     print("1. Record two 20-second videos (hands and no hands)")
@@ -30,12 +40,9 @@ def main():
     # Check for existing dataset
     existing_count = 0
     if os.path.exists('hand_cls'):
-        for split in ['train', 'val']:
-            for class_name in ['hand', 'not_hand']:
-                path = f'hand_cls/{split}/{class_name}'
-                if os.path.exists(path):
-                    count = len([f for f in os.listdir(path) if f.endswith(('.jpg', '.jpeg', '.png'))])
-                    existing_count += count
+        manifest = get_manifest()
+        existing_count = manifest.total()
+        manifest.save()
     
     if existing_count > 0:
         print(f"\n📊 Found existing dataset with {existing_count} total images")
@@ -52,37 +59,43 @@ def main():
     print("STEP 1: VIDEO CAPTURE")
     print("="*50)
     
-    if not run_command("python3 capture_dataset_videos.py", "Capturing videos"):
+    if args.direct:
+        if not run_command("python3 capture_dataset_videos.py --direct", "Capturing images"):
+            print("\nCapture failed or was cancelled.")
+            return 1
+    elif not run_command("python3 capture_dataset_videos.py", "Capturing videos"):
         print("\nVideo capture failed or was cancelled.")
         return 1
     
-    # Check if videos were created
-    if not os.path.exists("hand_video.mp4") or not os.path.exists("not_hand_video.mp4"):
-        print("\nError: Videos were not created. Exiting.")
-        return 1
+    # Direct capture already wrote the images; the video steps are only for video mode
+    if not args.direct:
+        # Check if videos were created
+        if not os.path.exists("hand_video.mp4") or not os.path.exists("not_hand_video.mp4"):
+            print("\nError: Videos were not created. Exiting.")
+            return 1
     
-    # Step 2: Extract frames
-    print("\n" + "="*50)
-    print("STEP 2: FRAME EXTRACTION")
-    print("="*50)
+        # Step 2: Extract frames
+        print("\n" + "="*50)
+        print("STEP 2: FRAME EXTRACTION")
+        print("="*50)
     
-    if not run_command("python3 extract_frames_to_dataset.py", "Extracting frames"):
-        print("\nFrame extraction failed.")
-        return 1
+        if not run_command("python3 extract_frames_to_dataset.py", "Extracting frames"):
+            print("\nFrame extraction failed.")
+            return 1
     
-    # Optional: Clean up video files
-    print("\n" + "="*50)
-    print("CLEANUP")
-    print("="*50)
+        # Optional: Clean up video files
+        print("\n" + "="*50)
+        print("CLEANUP")
+        print("="*50)
     
-    response = input("\nDelete original video files to save space? (y/n): ").lower()
-    if response == 'y':
-        try:
-            os.remove("hand_video.mp4")
-            os.remove("not_hand_video.mp4")
-            print("✓ Video files deleted")
-        except Exception as e:
-            print(f"Warning: Could not delete video files: {e}")
+        response = input("\nDelete original video files to save space? (y/n): ").lower()
+        if response == 'y':
+            try:
+                os.remove("hand_video.mp4")
+                os.remove("not_hand_video.mp4")
+                print("✓ Video files deleted")
+            except Exception as e:
+                print(f"Warning: Could not delete video files: {e}")
     
     # Final message
     print("\n" + "="*50)
@@ -91,7 +104,7 @@ def main():
     print("\nYour dataset is now ready for training!")
     print("\nWhat's next:")
     print("1. Upload to RunPod: Follow instructions in README.md")
-    print("2. Train locally: yolo classify train model=yolov8n-cls.pt data=hand_cls epochs=15")
+    print("2. Train locally: python3 train.py --epochs 15")
     print("3. Run demo: python3 live_demo.py --weights best.pt")
     
     return 0
@@ -2,11 +2,23 @@
 """
 Capture video data for hand classification dataset.
 Records two 20-second videos: one with hands, one without.
+
+With --direct no videos are written: frames are sampled at the dataset rate
+(5 fps) while recording and JPEG-encoded by a background thread pool straight
+into hand_cls/train|val/<class>, so extract_frames_to_dataset.py (and ffmpeg)
+are not needed.
 """
+import argparse
 import cv2
+import queue
+import threading
 import time
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from dataset_manifest import get_manifest
+from extract_frames_to_dataset import create_dataset_dirs, get_next_file_number, jpeg_params
 
 
 def draw_text(frame, text, position=(50, 50), font_scale=1.0, color=(255, 255, 255), thickness=2):
@@ -81,8 +93,165 @@ def countdown_capture(cap, duration=3, video_type="hands"):
     return True
 
 
-def record_video(cap, output_path, duration=20, video_type="hands"):
-    """Record video for specified duration with progress display."""
+class DatasetFrameWriter:
+    """Samples frames at a target fps and writes them as dataset JPEGs on a thread pool.
+
+    Frames from the first 80% of the recording go to train, the rest to val,
+    numbered on from the images already in hand_cls/ so nothing is overwritten.
+    """
+
+    def __init__(self, class_name, duration=20, fps=5, workers=2, root='hand_cls', train_ratio=0.8):
+        self.class_name = class_name
+        self.fps = fps
+        self.expected = max(int(round(duration * fps)), 1)
+        self.train_total = int(self.expected * train_ratio)
+        self.train_dir = os.path.join(root, 'train', class_name)
+        self.val_dir = os.path.join(root, 'val', class_name)
+        os.makedirs(self.train_dir, exist_ok=True)
+        os.makedirs(self.val_dir, exist_ok=True)
+        self.train_start = get_next_file_number(self.train_dir, class_name)
+        self.val_start = get_next_file_number(self.val_dir, class_name)
+        self.params = jpeg_params()
+        self.sampled = 0
+        self.failed = 0
+        self.paths = []
+        self._futures = []
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='jpeg')
+
+    def offer(self, frame, elapsed):
+        """Queue frame for writing if the next sample is due at elapsed seconds."""
+        if self.sampled >= self.expected or elapsed < self.sampled / self.fps:
+            return False
+        if self.sampled < self.train_total:
+            path = os.path.join(self.train_dir, f"{self.class_name}_{self.train_start + self.sampled:03d}.jpg")
+        else:
+            index = self.val_start + self.sampled - self.train_total
+            path = os.path.join(self.val_dir, f"{self.class_name}_{index:03d}.jpg")
+        self.sampled += 1
+        self.paths.append(path)
+        # The caller draws the HUD onto frame afterwards, so encode a private copy
+        self._futures.append(self._pool.submit(cv2.imwrite, path, frame.copy(), self.params))
+        return True
+
+    @property
+    def pending(self):
+        return sum(not f.done() for f in self._futures)
+
+    def close(self):
+        """Wait for all queued JPEGs; return (train_count, val_count) actually written."""
+        self._pool.shutdown(wait=True)
+        self.failed = sum(not f.result() for f in self._futures)
+        get_manifest().add(self.paths)
+        train = min(self.sampled, self.train_total)
+        return train, self.sampled - train
+
+    def discard(self):
+        """Wait for queued writes, then delete every image from this recording."""
+        self._pool.shutdown(wait=True)
+        for path in self.paths:
+            if os.path.exists(path):
+                os.remove(path)
+        self.paths = []
+
+
+class BackgroundVideoWriter(threading.Thread):
+    """cv2.VideoWriter on its own thread behind a bounded queue.
+
+    write() never encodes on the caller's thread.  When the queue is full the
+    frame is dropped (or, with block=True, the caller waits).  Frames carry
+    their capture timestamp and are placed on the output's fixed frame grid:
+    gaps are filled by repeating the previous frame and frames arriving faster
+    than the nominal fps are skipped, so the video plays back at real speed.
+    """
+
+    def __init__(self, path, fourcc, fps, size, max_queue=64, block=False):
+        super().__init__(name='video-writer', daemon=True)
+        self.writer = cv2.VideoWriter(path, fourcc, fps, size)
+        self.fps = fps
+        self.block = block
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.submitted = 0
+        self.dropped = 0
+        self.encoded = 0
+        self.skipped = 0
+        self.repeated = 0
+        self.written = 0
+        self.max_depth = 0
+        self.blocked_seconds = 0.0
+        self.timestamps = []
+        self._start_time = None
+        self.start()
+
+    def write(self, frame, timestamp=None):
+        """Queue a copy of frame captured at timestamp (perf_counter seconds)."""
+        if timestamp is None:
+            timestamp = time.perf_counter()
+        item = (timestamp, frame.copy())
+        self.submitted += 1
+        self.timestamps.append(timestamp)
+        if self.block:
+            start = time.perf_counter()
+            self.queue.put(item)
+            self.blocked_seconds += time.perf_counter() - start
+        else:
+            try:
+                self.queue.put_nowait(item)
+            except queue.Full:
+                self.dropped += 1
+                return False
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+        return True
+
+    def run(self):
+        last = None
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            timestamp, frame = item
+            if self._start_time is None:
+                self._start_time = timestamp
+            # Number of grid slots that should be filled once this frame is shown
+            target = int(round((timestamp - self._start_time) * self.fps)) + 1
+            if last is not None:
+                while self.written < target - 1:
+                    self.writer.write(last)
+                    self.written += 1
+                    self.repeated += 1
+            if self.written < target:
+                self.writer.write(frame)
+                self.written += 1
+                self.encoded += 1
+            else:
+                self.skipped += 1
+            last = frame
+
+    def close(self):
+        """Flush the queue, stop the thread and release the file."""
+        self.queue.put(None)
+        self.join()
+        self.writer.release()
+
+    def summary(self):
+        """One-line report of how well the encoder kept up."""
+        span = self.timestamps[-1] - self.timestamps[0] if self.timestamps else 0.0
+        capture_fps = (len(self.timestamps) - 1) / span if span > 0 else 0.0
+        line = (f"{self.submitted} frames captured ({capture_fps:.1f} fps): {self.encoded} encoded, "
+                f"{self.dropped} dropped, {self.skipped} skipped, {self.repeated} repeated; "
+                f"{self.written} written at {self.fps} fps ({self.written / self.fps:.1f} seconds), "
+                f"max queue {self.max_depth}/{self.queue.maxsize}")
+        if self.block:
+            line += f", blocked {self.blocked_seconds:.2f}s"
+        return line
+
+
+def record_video(cap, output_path, duration=20, video_type="hands", dataset_writer=None,
+                 max_queue=64, block=False):
+    """Record video for specified duration with progress display.
+
+    If dataset_writer is given, sampled frames go to it instead of a video file.
+    Otherwise frames are encoded by a BackgroundVideoWriter (see max_queue/block).
+    """
     # Get video properties
     fps = int(cap.get(cv2.CAP_PROP_FPS))
     if fps == 0:
@@ -92,8 +261,10 @@ def record_video(cap, output_path, duration=20, video_type="hands"):
     height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
     
     # Create video writer
-    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-    out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
+    out = None
+    if dataset_writer is None:
+        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+        out = BackgroundVideoWriter(output_path, fourcc, fps, (width, height), max_queue, block)
     
     start_time = time.time()
     frame_count = 0
@@ -106,6 +277,7 @@ def record_video(cap, output_path, duration=20, video_type="hands"):
             break
         
         ret, frame = cap.read()
+        captured_at = time.perf_counter()
         if not ret:
             print("Error: Failed to capture frame")
             break
@@ -113,8 +285,11 @@ def record_video(cap, output_path, duration=20, video_type="hands"):
         # Flip frame horizontally for mirror effect
         frame = cv2.flip(frame, 1)
         
-        # Write original frame to video
-        out.write(frame)
+        # Write original frame to video (or sample it into the dataset)
+        if out is not None:
+            out.write(frame, captured_at)
+        else:
+            dataset_writer.offer(frame, elapsed)
         frame_count += 1
         
         # Add overlay text for display
@@ -141,6 +316,8 @@ def record_video(cap, output_path, duration=20, video_type="hands"):
         draw_text(frame, instruction, (50, 50), 1.5, color, 3)
         draw_text(frame, f"Recording: {int(remaining)}s remaining", (50, 100), 1.0)
         draw_text(frame, f"Press ESC to cancel", (50, 140), 0.7, (200, 200, 200))
+        if dataset_writer is not None:
+            draw_text(frame, f"Saved {dataset_writer.sampled}/{dataset_writer.expected} images", (50, 180), 0.7, (200, 200, 200))
         
         # Show frame
         cv2.imshow('Video Capture', frame)
@@ -148,25 +325,51 @@ def record_video(cap, output_path, duration=20, video_type="hands"):
         # Check for ESC key
         if cv2.waitKey(1) & 0xFF == 27:
             print("\nRecording cancelled by user")
-            out.release()
+            if out is not None:
+                out.close()
+            else:
+                dataset_writer.discard()
             return False
     
-    out.release()
-    print(f"✓ Recorded {frame_count} frames ({frame_count/fps:.1f} seconds)")
+    if out is not None:
+        out.close()
+        print(f"✓ Recorded {out.summary()}")
+        if out.dropped:
+            print(f"Warning: the encoder fell behind and {out.dropped} frames were dropped "
+                  "(gaps were filled so the video keeps real-time speed)")
+        return True
+
+    pending = dataset_writer.pending
+    train_count, val_count = dataset_writer.close()
+    print(f"✓ Captured {frame_count} frames, saved {train_count} training and {val_count} validation images "
+          f"({pending} still encoding when recording stopped)")
+    if dataset_writer.failed:
+        print(f"Warning: {dataset_writer.failed} images could not be written")
     return True
 
 
 def main():
     """Main function to capture both videos."""
+    parser = argparse.ArgumentParser(description='Record hand / no-hand videos for the dataset')
+    parser.add_argument('--direct', action='store_true', help='Write sampled frames straight into hand_cls/ instead of videos')
+    parser.add_argument('--fps', type=float, default=5, help='Images per second saved with --direct (default: 5)')
+    parser.add_argument('--encoders', type=int, default=2, help='JPEG encoder threads for --direct (default: 2)')
+    parser.add_argument('--queue-size', type=int, default=64, help='Frames buffered for the video encoder (default: 64)')
+    parser.add_argument('--block', action='store_true', help='Wait for the video encoder instead of dropping frames when it falls behind')
+    args = parser.parse_args()
+
     print("=== Hand Classification Video Capture ===")
     print("This tool will record two 20-second videos:")
     print("1. With your hands visible")
     print("2. Without hands (background only)")
     print("\nMake sure your webcam is connected and working.")
+    if args.direct:
+        print(f"Direct mode: saving {args.fps:g} images/sec straight into hand_cls/ (added to existing images)")
+        create_dataset_dirs()
     
     # Check if this might be additional data
     if os.path.exists("hand_cls/train/hand"):
-        existing_count = len([f for f in os.listdir("hand_cls/train/hand") if f.endswith(('.jpg', '.jpeg', '.png'))])
+        existing_count = get_manifest().count("hand_cls/train/hand")
         if existing_count > 0:
             print(f"\n💡 TIP: You have {existing_count}+ existing images.")
             print("For better accuracy, try different:")
@@ -216,7 +419,8 @@ def main():
         cv2.destroyAllWindows()
         return 0
     
-    if not record_video(cap, "hand_video.mp4", 20, "hands"):
+    writer = DatasetFrameWriter('hand', 20, args.fps, args.encoders) if args.direct else None
+    if not record_video(cap, "hand_video.mp4", 20, "hands", writer, args.queue_size, args.block):
         cap.release()
         cv2.destroyAllWindows()
         return 0
@@ -225,21 +429,35 @@ def main():
     print("\n--- Recording 2/2: NO HANDS ---")
     time.sleep(1)
     
-    if not countdown_capture(cap, 3, "no_hands"):
+    cancelled = not countdown_capture(cap, 3, "no_hands")
+    if cancelled:
         print("Cancelled during countdown")
+    else:
+        writer = DatasetFrameWriter('not_hand', 20, args.fps, args.encoders) if args.direct else None
+        cancelled = not record_video(cap, "not_hand_video.mp4", 20, "no hands", writer, args.queue_size, args.block)
+    if cancelled:
+        # The hand recording is already kept, so the capture is one-sided
         cap.release()
         cv2.destroyAllWindows()
-        return 0
-    
-    if not record_video(cap, "not_hand_video.mp4", 20, "no hands"):
-        cap.release()
-        cv2.destroyAllWindows()
-        return 0
+        if args.direct:
+            get_manifest().save()
+            print("\n⚠️  Only the hand images were added to hand_cls/ - the dataset is now unbalanced.")
+            print("Run this script again (or capture background-only footage) before training.")
+        else:
+            print("\n⚠️  Only hand_video.mp4 was recorded - run this script again to record both videos.")
+        return 1
     
     # Cleanup
     cap.release()
     cv2.destroyAllWindows()
     
+    if args.direct:
+        get_manifest().save()
+        print("\n✅ Dataset capture complete!")
+        print("\nImages were added to hand_cls/train and hand_cls/val")
+        print("\nNext step: yolo classify train model=yolov8n-cls.pt data=hand_cls epochs=15")
+        return 0
+
     print("\n✅ Video capture complete!")
     print("\nCreated files:")
     print("  - hand_video.mp4 (20 seconds)")
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Classify every frame of a recorded video without a webcam or display.
+
+Frames are decoded with OpenCV, resized to the model's image size and stacked
+into batches so the model runs once per batch instead of once per frame.  The
+result is a per-frame timeline (frame index, timestamp, per-class
+probabilities) written as CSV or JSONL.
+
+Example:
+    python3 classify_video.py --weights best_final.pt hand.mov not_hand.mov
+    python3 classify_video.py --weights best_final.pt hand.mov --expect hand --min-agreement 0.9
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+import cv2
+
+from hand_classifier import HandClassifier
+from inference_backends import BACKENDS
+
+
+def iter_frame_batches(video_path, batch_size, imgsz, stride=1):
+    """Yield lists of (frame_index, timestamp_s, resized_frame) from a video."""
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise RuntimeError(f"Could not open video: {video_path}")
+
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    batch = []
+    index = 0
+    try:
+        while True:
+            # grab() skips the decode cost for frames we are not going to use
+            if not cap.grab():
+                break
+            if index % stride == 0:
+                ret, frame = cap.retrieve()
+                if not ret:
+                    break
+                batch.append((index, index / fps, cv2.resize(frame, (imgsz, imgsz))))
+                if len(batch) == batch_size:
+                    yield batch
+                    batch = []
+            index += 1
+    finally:
+        cap.release()
+
+    if batch:
+        yield batch
+
+
+def classify_video(model, video_path, batch_size=16, imgsz=224, stride=1):
+    """Run the classifier over a video and return (class names, timeline rows)."""
+    names = model.names
+    rows = []
+    for batch in iter_frame_batches(video_path, batch_size, imgsz, stride):
+        frames = [frame for _, _, frame in batch]
+        # One model call for the whole batch
+        batch_probs = model.predict_batch(frames)
+        for (index, timestamp, _), probs in zip(batch, batch_probs):
+            top_idx = int(probs.argmax())
+            row = {
+                'frame': index,
+                'timestamp': round(timestamp, 4),
+                'label': names[top_idx],
+                'confidence': round(float(probs[top_idx]), 6),
+            }
+            for class_idx, class_name in names.items():
+                row[f'p_{class_name}'] = round(float(probs[class_idx]), 6)
+            rows.append(row)
+    return names, rows
+
+
+def write_timeline(rows, output_path):
+    """Write timeline rows as JSONL (.jsonl/.json) or CSV (anything else)."""
+    if output_path.endswith(('.jsonl', '.json')):
+        with open(output_path, 'w') as f:
+            for row in rows:
+                f.write(json.dumps(row) + '\n')
+    else:
+        with open(output_path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()) if rows else ['frame'])
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+def summarize(names, rows):
+    """Return {class name: fraction of frames where it was the top-1 label}."""
+    counts = {name: 0 for name in names.values()}
+    for row in rows:
+        counts[row['label']] += 1
+    total = max(len(rows), 1)
+    return {name: count / total for name, count in counts.items()}
+
+
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError("must be >= 1")
+    return number
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Classify every frame of recorded videos (headless, batched)')
+    parser.add_argument('videos', nargs='+', help='Video files to classify (e.g., hand.mov not_hand.mov)')
+    parser.add_argument('--weights', type=str, required=True, help='Path to trained weights (e.g., best_final.pt)')
+    parser.add_argument('--imgsz', type=int, default=224, help='Image size expected by the model (default: 224)')
+    parser.add_argument('--batch', type=positive_int, default=16, help='Frames per model call (default: 16)')
+    parser.add_argument('--stride', type=positive_int, default=1, help='Classify every Nth frame (default: 1 = all frames)')
+    parser.add_argument('--format', choices=['csv', 'jsonl'], default='csv', help='Timeline format (default: csv)')
+    parser.add_argument('--output-dir', type=str, default='.', help='Where to write <video>_timeline.<format> (default: .)')
+    parser.add_argument('--device', type=str, default=None, help='Force a device (cpu, cuda, mps); default: auto')
+    parser.add_argument('--backend', choices=BACKENDS, default='torch', help='Inference backend (default: torch)')
+    parser.add_argument('--expect', type=str, default=None, help='Class every video should be classified as (regression check)')
+    parser.add_argument('--min-agreement', type=float, default=0.9, help='Fraction of frames that must match --expect (default: 0.9)')
+    args = parser.parse_args()
+
+    model = HandClassifier(args.weights, args.imgsz, args.backend, device=args.device, verbose=False)
+    print(f"Using device: {model.device}")
+    print(f"Model loaded: {args.weights} ({model.name} backend)")
+    print(f"Classes: {model.names}")
+
+    if args.expect is not None and args.expect not in model.names.values():
+        print(f"Error: --expect {args.expect!r} is not one of {list(model.names.values())}")
+        return 1
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    failed = False
+    for video_path in args.videos:
+        if not os.path.exists(video_path):
+            print(f"Error: {video_path} not found.")
+            return 1
+
+        print(f"\n--- {video_path} ---")
+        start = time.perf_counter()
+        names, rows = classify_video(model, video_path, args.batch, args.imgsz, args.stride)
+        elapsed = time.perf_counter() - start
+
+        stem = os.path.splitext(os.path.basename(video_path))[0]
+        output_path = os.path.join(args.output_dir, f"{stem}_timeline.{args.format}")
+        write_timeline(rows, output_path)
+
+        print(f"✓ Classified {len(rows)} frames in {elapsed:.2f}s "
+              f"({len(rows) / elapsed if elapsed > 0 else 0:.1f} frames/sec, batch={args.batch})")
+        for name, fraction in summarize(names, rows).items():
+            print(f"  {name}: {fraction * 100:.1f}% of frames")
+        print(f"✓ Timeline written to {output_path}")
+
+        if args.expect is not None:
+            agreement = summarize(names, rows).get(args.expect, 0.0)
+            if agreement < args.min_agreement:
+                print(f"✗ Expected {args.expect} on at least {args.min_agreement * 100:.0f}% of frames, "
+                      f"got {agreement * 100:.1f}%")
+                failed = True
+            else:
+                print(f"✓ Matches expected class {args.expect}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
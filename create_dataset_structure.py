@@ -7,6 +7,8 @@ This helps participants quickly set up their folders correctly.
 import os
 import sys
 
+from dataset_manifest import get_manifest
+
 
 def create_dataset_structure(base_path='hand_cls'):
     """Create the directory structure for the Halloween hand dataset."""
@@ -90,16 +92,15 @@ def check_dataset(base_path='hand_cls'):
     print("\n🔍 Checking dataset...")
     
     total_images = 0
-    image_extensions = ('.jpg', '.jpeg', '.png', '.JPG', '.JPEG', '.PNG')
+    manifest = get_manifest(base_path)
+    manifest.save()
     
     for split in ['train', 'val']:
         print(f"\n{split.upper()} set:")
         for class_name in ['hand', 'not_hand']:
             class_path = os.path.join(base_path, split, class_name)
             if os.path.exists(class_path):
-                images = [f for f in os.listdir(class_path) 
-                         if f.endswith(image_extensions)]
-                count = len(images)
+                count = manifest.count(class_path)
                 total_images += count
                 print(f"  {class_name}: {count} images")
                 
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Persistent index of the images in hand_cls/.
+
+The dataset tools used to os.listdir() every class directory (and parse every
+file name) just to count images or find the next free number.  The manifest
+keeps one record per image in hand_cls/manifest.json:
+
+    {"train/hand/hand_001.jpg": {"split": "train", "class": "hand", "size": ...,
+                                 "mtime": ..., "sha256": ...}, ...}
+
+plus per-directory counts, the highest hand_NNN index and the directory mtime.
+On load, each class directory is validated with a single stat(): if its mtime
+is unchanged, no file was added, removed or renamed and the stored records are
+used as-is; otherwise only that directory is rescanned, and only new or changed
+files are re-hashed.  The capture/extract tools update the manifest as they
+write, so counts and next-index lookups are O(1).
+
+    python3 dataset_manifest.py            # refresh and print counts
+    python3 dataset_manifest.py --verify   # also re-stat every file (catches in-place edits)
+    python3 dataset_manifest.py --rebuild  # re-hash everything from scratch
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.JPG', '.JPEG', '.PNG')
+MANIFEST_NAME = 'manifest.json'
+# Directory mtimes this close to the scan time may still change within the same
+# timestamp tick, so they are not trusted (the same trick git uses for its index)
+RACY_SECONDS = 2.0
+
+_MANIFESTS = {}
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    """Hex sha256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_index(filename, class_name):
+    """The NNN in '<class>_NNN.jpg', or None for other names."""
+    stem, ext = os.path.splitext(filename)
+    prefix, sep, number = stem.rpartition('_')
+    if not sep or prefix != class_name or not number.isdigit():
+        return None
+    return int(number)
+
+
+class DatasetManifest:
+    """Image records for root/<split>/<class>/, validated by directory mtime."""
+
+    def __init__(self, root='hand_cls'):
+        self.root = root
+        self.path = os.path.join(root, MANIFEST_NAME)
+        self.files = {}
+        self.dirs = {}
+        self.dirty = False
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.files = data.get('files', {})
+        self.dirs = data.get('dirs', {})
+
+    def save(self):
+        """Write the manifest atomically (only if something changed)."""
+        if not self.dirty or not os.path.isdir(self.root):
+            return
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': 1, 'dirs': self.dirs, 'files': self.files}, f, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+    # --- paths ---------------------------------------------------------------
+
+    def relative_dir(self, directory):
+        """'split/class' for a class directory under root, or None if it is not one."""
+        rel = os.path.relpath(os.path.abspath(directory), os.path.abspath(self.root))
+        parts = rel.replace(os.sep, '/').split('/')
+        if len(parts) != 2 or parts[0].startswith('.') or parts[1].startswith('.') or '..' in parts:
+            return None
+        return '/'.join(parts)
+
+    def tracks(self, directory):
+        return self.relative_dir(directory) is not None
+
+    def class_dirs(self):
+        """All 'split/class' directories currently on disk (hidden ones skipped)."""
+        found = []
+        if not os.path.isdir(self.root):
+            return found
+        for split in sorted(os.listdir(self.root)):
+            split_path = os.path.join(self.root, split)
+            if split.startswith('.') or not os.path.isdir(split_path):
+                continue
+            for class_name in sorted(os.listdir(split_path)):
+                if not class_name.startswith('.') and os.path.isdir(os.path.join(split_path, class_name)):
+                    found.append(f"{split}/{class_name}")
+        return found
+
+    # --- validation ----------------------------------------------------------
+
+    def refresh(self, verify=False):
+        """Bring the manifest in line with the disk; returns the directories rescanned.
+
+        Unchanged directories cost one stat() each.  With verify=True every file
+        is re-stat'ed too, which also catches images edited in place.
+        """
+        on_disk = set(self.class_dirs())
+        rescanned = []
+        for rel_dir in list(self.dirs):
+            if rel_dir not in on_disk:
+                self._drop_dir(rel_dir)
+                rescanned.append(rel_dir)
+        for rel_dir in sorted(on_disk):
+            state = self.dirs.get(rel_dir)
+            mtime_ns = os.stat(os.path.join(self.root, rel_dir)).st_mtime_ns
+            if verify or state is None or state.get('mtime_ns') != mtime_ns:
+                self._scan_dir(rel_dir)
+                rescanned.append(rel_dir)
+        return rescanned
+
+    def _drop_dir(self, rel_dir):
+        prefix = rel_dir + '/'
+        for key in [k for k in self.files if k.startswith(prefix)]:
+            del self.files[key]
+        self.dirs.pop(rel_dir, None)
+        self.dirty = True
+
+    def _scan_dir(self, rel_dir):
+        """Rescan one class directory, re-hashing only new or changed files."""
+        split, class_name = rel_dir.split('/')
+        directory = os.path.join(self.root, split, class_name)
+        prefix = rel_dir + '/'
+        stale = {k for k in self.files if k.startswith(prefix)}
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if not entry.name.endswith(IMAGE_EXTENSIONS) or not entry.is_file():
+                    continue
+                key = prefix + entry.name
+                stale.discard(key)
+                st = entry.stat()
+                record = self.files.get(key)
+                if record is None or record['size'] != st.st_size or record['mtime'] != st.st_mtime:
+                    self.files[key] = self._record(split, class_name, entry.path, st)
+                    self.dirty = True
+        for key in stale:
+            del self.files[key]
+            self.dirty = True
+        self._recount(rel_dir)
+
+    def _record(self, split, class_name, path, st=None):
+        st = st or os.stat(path)
+        return {'split': split, 'class': class_name, 'size': st.st_size, 'mtime': st.st_mtime,
+                'sha256': file_sha256(path)}
+
+    def _recount(self, rel_dir):
+        split, class_name = rel_dir.split('/')
+        prefix = rel_dir + '/'
+        count = max_index = 0
+        for key in self.files:
+            if key.startswith(prefix):
+                count += 1
+                max_index = max(max_index, file_index(key[len(prefix):], class_name) or 0)
+        self.dirs[rel_dir] = {'count': count, 'max_index': max_index}
+        self._stamp_dir(rel_dir)
+
+    def _stamp_dir(self, rel_dir):
+        """Remember the directory mtime, unless it is too recent to be trusted."""
+        mtime_ns = os.stat(os.path.join(self.root, rel_dir)).st_mtime_ns
+        racy = time.time() - mtime_ns / 1e9 < RACY_SECONDS
+        self.dirs[rel_dir]['mtime_ns'] = None if racy else mtime_ns
+        self.dirty = True
+
+    # --- lookups -------------------------------------------------------------
+
+    def count(self, directory):
+        """Number of images in a class directory."""
+        state = self.dirs.get(self.relative_dir(directory))
+        return state['count'] if state else 0
+
+    def next_index(self, directory):
+        """Next free NNN for '<class>_NNN.jpg' in a class directory."""
+        state = self.dirs.get(self.relative_dir(directory))
+        return state['max_index'] + 1 if state else 1
+
+    def total(self, split=None):
+        """Number of images overall, or in one split."""
+        return sum(state['count'] for rel_dir, state in self.dirs.items()
+                   if split is None or rel_dir.split('/')[0] == split)
+
+    def counts(self):
+        """{split: {class: count}} for every class directory."""
+        result = {}
+        for rel_dir, state in sorted(self.dirs.items()):
+            split, class_name = rel_dir.split('/')
+            result.setdefault(split, {})[class_name] = state['count']
+        return result
+
+    def files_in(self, directory):
+        """Paths of the images recorded for a class directory."""
+        rel_dir = self.relative_dir(directory)
+        prefix = rel_dir + '/'
+        return [os.path.join(self.root, key) for key in self.files if key.startswith(prefix)]
+
+    # --- incremental updates -------------------------------------------------
+
+    def add(self, paths):
+        """Record newly written images (paths inside class directories)."""
+        touched = set()
+        for path in paths:
+            rel_dir = self.relative_dir(os.path.dirname(path))
+            if rel_dir is None or not os.path.exists(path):
+                continue
+            split, class_name = rel_dir.split('/')
+            key = f"{rel_dir}/{os.path.basename(path)}"
+            is_new = key not in self.files
+            self.files[key] = self._record(split, class_name, path)
+            state = self.dirs.setdefault(rel_dir, {'count': 0, 'max_index': 0})
+            if is_new:
+                state['count'] += 1
+                state['max_index'] = max(state['max_index'], file_index(os.path.basename(path), class_name) or 0)
+            touched.add(rel_dir)
+        for rel_dir in touched:
+            self._stamp_dir(rel_dir)
+
+    def remove(self, paths):
+        """Forget images that were deleted from disk."""
+        touched = set()
+        for path in paths:
+            rel_dir = self.relative_dir(os.path.dirname(path))
+            key = f"{rel_dir}/{os.path.basename(path)}"
+            if rel_dir is not None and self.files.pop(key, None) is not None:
+                touched.add(rel_dir)
+        for rel_dir in touched:
+            self._recount(rel_dir)
+
+
+def get_manifest(root='hand_cls'):
+    """Shared manifest for root, loaded and validated once per process."""
+    key = os.path.abspath(root)
+    manifest = _MANIFESTS.get(key)
+    if manifest is None:
+        manifest = _MANIFESTS[key] = DatasetManifest(root)
+        manifest.refresh()
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Refresh and summarise the hand_cls manifest')
+    parser.add_argument('--root', default='hand_cls', help='Dataset root (default: hand_cls)')
+    parser.add_argument('--verify', action='store_true', help='Re-stat every file, not just the directories')
+    parser.add_argument('--rebuild', action='store_true', help='Discard the manifest and re-hash every image')
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.root):
+        print(f"Error: {args.root} not found")
+        return 1
+
+    start = time.perf_counter()
+    manifest = DatasetManifest(args.root)
+    if args.rebuild:
+        manifest.files, manifest.dirs = {}, {}
+    rescanned = manifest.refresh(verify=args.verify)
+    manifest.save()
+    elapsed = time.perf_counter() - start
+
+    for split, classes in manifest.counts().items():
+        print(f"{split.upper()}:")
+        for class_name, count in classes.items():
+            print(f"  {class_name}: {count} images")
+    print(f"\nTotal images: {manifest.total()}")
+    print(f"✓ {manifest.path} up to date ({len(rescanned)} directories rescanned, {elapsed * 1000:.0f} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,97 +1,126 @@
 #!/usr/bin/env python3
 """
 Debug version of live demo - shows ALL predictions and confidence scores.
+
+--fast-start works as in live_demo.py.
 """
+import time
+
+LAUNCHED = time.perf_counter()  # start of the time-to-first-frame report
+
 import argparse
 import cv2
-import torch
-from ultralytics import YOLO
-
-
-def main(weights: str, imgsz: int = 224) -> None:
-    # Detect device
-    if torch.backends.mps.is_available():
-        device = 'mps'
-        print("Using Apple Silicon GPU (MPS)")
-    elif torch.cuda.is_available():
-        device = 'cuda'
-        print("Using NVIDIA GPU (CUDA)")
-    else:
-        device = 'cpu'
-        print("Using CPU")
-
-    # Load trained model
-    model = YOLO(weights)
-    print(f"\nModel loaded: {weights}")
-    print(f"Classes: {model.names}")
-
-    # Open webcam
-    cap = cv2.VideoCapture(0)
-    if not cap.isOpened():
-        raise RuntimeError("Could not open webcam")
-
-    print("\nPress 'q' to quit.")
-    print("\nShowing ALL predictions with confidence scores...\n")
-
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        # Resize frame
-        resized = cv2.resize(frame, (imgsz, imgsz))
-
-        # Run inference
-        results = model(resized, verbose=False, device=device)[0]
-        probs = results.probs.data.tolist()
-        names = results.names
-
-        # Display ALL classes with their confidence
-        y_offset = 30
-        for idx, (class_name, confidence) in enumerate(zip(names.values(), probs)):
-            conf_pct = confidence * 100
-
-            # Color code: Green if high confidence, white if low
-            color = (0, 255, 0) if conf_pct > 50 else (200, 200, 200)
-
-            text = f"{class_name}: {conf_pct:.1f}%"
-            cv2.putText(
-                frame,
-                text,
-                (20, y_offset),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                0.8,
-                color,
-                2,
-                cv2.LINE_AA,
-            )
-            y_offset += 35
-
-        # Show which class won
-        top_idx = probs.index(max(probs))
-        winner = names[top_idx]
-        cv2.putText(
-            frame,
-            f"PREDICTED: {winner}",
-            (20, frame.shape[0] - 30),
-            cv2.FONT_HERSHEY_SIMPLEX,
-            1.0,
-            (0, 255, 255),
-            3,
-            cv2.LINE_AA,
-        )
-
-        cv2.imshow('Debug Demo - All Predictions', frame)
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            break
-
-    cap.release()
-    cv2.destroyAllWindows()
+from contextlib import nullcontext
+
+from hud import TextCache
+from frame_sources import describe_source, open_source
+from inference_backends import BACKENDS
+from live_demo import load_model, run_headless, status_to_stderr
+from metrics import Metrics, StartupTimer
+
+# Rendered HUD text, shared across frames
+TEXT_CACHE = TextCache()
+
+
+def main(weights: str, imgsz: int = 224, backend: str = 'torch', metrics_file: str = None,
+         metrics_port: int = None, metrics_interval: float = 10.0, source: str = '0',
+         headless: bool = False, output: str = None, loop: bool = False, quantized: bool = False,
+         fast_start: bool = False) -> None:
+    startup = StartupTimer(LAUNCHED)
+    startup.mark('imports')
+    # stdout may carry the predictions, so status messages go to stderr (restored on any exit)
+    with status_to_stderr(headless) as real_stdout:
+        opener = startup.in_background('camera open', open_source, source, loop=loop) if fast_start else None
+
+        # Load trained model
+        model = load_model(backend, weights, imgsz, quantized, fast_start, startup)
+        print(f"\nModel loaded: {weights} ({model.name} backend)")
+        print(f"Classes: {model.names}")
+
+        # Open the frame source (webcam by default)
+        if opener is not None:
+            cap = opener.result()
+        else:
+            with startup.phase('camera open'):
+                cap = open_source(source, loop=loop)
+        print(f"Reading from {describe_source(source)}")
+
+        # Per-stage timing; disabled (no overhead) unless exported or shown with 'm'
+        metrics = Metrics(jsonl_path=metrics_file, port=metrics_port, flush_interval=metrics_interval)
+        metrics.startup = startup
+
+        if headless:
+            # No window: every prediction (with all class probabilities) as a JSON line
+            try:
+                with open(output, 'w') if output else nullcontext(real_stdout) as out:
+                    run_headless(cap, model.predict, model.names, out, metrics=metrics)
+            finally:
+                cap.release()
+                metrics.close()
+            return
+
+        print("\nPress 'q' to quit, 'm' to toggle the timing HUD.")
+        print("\nShowing ALL predictions with confidence scores...\n")
+
+        while True:
+            with metrics.stage('capture'):
+                ret, frame = cap.read()
+            if not ret:
+                break
+
+            # Run inference (the backend resizes to imgsz)
+            with metrics.stage('inference'):
+                winner, probs = model.predict(frame)
+            names = model.names
+
+            with metrics.stage('render'):
+                # Display ALL classes with their confidence
+                y_offset = 30
+                for idx, (class_name, confidence) in enumerate(zip(names.values(), probs)):
+                    conf_pct = confidence * 100
+
+                    # Color code: Green if high confidence, white if low
+                    color = (0, 255, 0) if conf_pct > 50 else (200, 200, 200)
+
+                    # Class name is a cached sprite; only the percentage is redrawn
+                    TEXT_CACHE.draw(frame, f"{class_name}: ", (20, y_offset), 0.8, color, 2,
+                                    value=f"{conf_pct:.1f}%")
+                    y_offset += 35
+
+                # Show which class won
+                TEXT_CACHE.draw(frame, f"PREDICTED: {winner}", (20, frame.shape[0] - 30), 1.0, (0, 255, 255), 3)
+
+                if metrics.show_hud:
+                    metrics.draw_hud(frame, origin=(20, y_offset + 10))
+
+            with metrics.stage('display'):
+                cv2.imshow('Debug Demo - All Predictions', frame)
+                key = cv2.waitKey(1) & 0xFF
+            metrics.frame_done()
+            if key == ord('m'):
+                metrics.toggle_hud()
+            elif key == ord('q'):
+                break
+
+        cap.release()
+        cv2.destroyAllWindows()
+        metrics.close()
 
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Debug demo showing all predictions')
     parser.add_argument('--weights', type=str, required=True, help='Path to trained weights')
     parser.add_argument('--imgsz', type=int, default=224, help='Image size (default: 224)')
+    parser.add_argument('--backend', choices=BACKENDS, default='torch', help='Inference backend (default: torch)')
+    parser.add_argument('--quantized', action='store_true', help='Use the INT8 model made by quantize_model.py (overrides --backend)')
+    parser.add_argument('--fast-start', action='store_true', help='Cached fused model, camera opened during model load and warm-up before the first frame')
+    parser.add_argument('--metrics-file', type=str, default=None, help='Append per-stage latency percentiles to this JSONL file')
+    parser.add_argument('--metrics-port', type=int, default=None, help='Serve Prometheus-style metrics on http://127.0.0.1:PORT/metrics')
+    parser.add_argument('--metrics-interval', type=float, default=10.0, help='Seconds between metrics flushes (default: 10)')
+    parser.add_argument('--source', type=str, default='0', help='Webcam index, video file, image directory or stream URL (default: 0)')
+    parser.add_argument('--loop', action='store_true', help='Loop an image directory source')
+    parser.add_argument('--headless', action='store_true', help='No window: only emit predictions as JSON lines')
+    parser.add_argument('--output', type=str, default=None, help='With --headless, write predictions to this file instead of stdout')
     args = parser.parse_args()
-    main(args.weights, args.imgsz)
+    main(args.weights, args.imgsz, args.backend, args.metrics_file, args.metrics_port, args.metrics_interval,
+         args.source, args.headless, args.output, args.loop, args.quantized, args.fast_start)
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Remove near-duplicate images from hand_cls/ using perceptual hashes.
+
+Frames extracted at 5 fps from a mostly static recording come in long runs of
+almost identical images.  Each image gets a 64-bit difference hash (dHash:
+grayscale, shrink to 9x8, compare neighbouring pixels), computed in batches
+with NumPy and cached in the dataset manifest.  Images are then clustered
+greedily: an image whose hash is within --distance bits of an image already
+kept is a duplicate of it.  Candidates are found with a multi-index on hash
+bands (any two hashes within d bits agree exactly on at least one of d+1
+bands), so only a handful of comparisons are made per image instead of n^2.
+
+Train and val of the same class are clustered together and train images are
+kept first, so a val image that nearly duplicates a train image is removed:
+such pairs would otherwise leak training data into validation.
+
+    python3 dedup_dataset.py                 # report only
+    python3 dedup_dataset.py --apply         # delete the duplicates
+    python3 dedup_dataset.py --per-split     # dedup within each split, only report leakage
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from dataset_manifest import get_manifest
+
+if hasattr(np, 'bitwise_count'):
+    popcount = np.bitwise_count
+else:
+    _POPCOUNT_TABLE = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+    def popcount(values):
+        """Set bits per element of a uint64 array."""
+        return _POPCOUNT_TABLE[values.view(np.uint8)].reshape(values.shape + (8,)).sum(axis=-1)
+
+
+def _load_thumbnail(path):
+    # Reduced decoding skips most of the JPEG IDCT work; only 9x8 pixels are needed
+    image = cv2.imread(path, cv2.IMREAD_REDUCED_GRAYSCALE_4)
+    if image is None:
+        return None
+    return cv2.resize(image, (9, 8), interpolation=cv2.INTER_AREA)
+
+
+def dhash_images(paths, workers=None):
+    """(64-bit dHash of each image as a uint64 array, bool mask of readable files).
+
+    Unreadable files get hash 0, which is also the hash of a flat frame; use the
+    mask to keep them out of clustering.
+    """
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        thumbnails = list(pool.map(_load_thumbnail, paths))
+    stack = np.zeros((len(paths), 8, 9), dtype=np.uint8)
+    readable = np.zeros(len(paths), dtype=bool)
+    for i, thumbnail in enumerate(thumbnails):
+        if thumbnail is not None:
+            stack[i] = thumbnail
+            readable[i] = True
+    bits = stack[:, :, 1:] > stack[:, :, :-1]
+    hashes = np.packbits(bits.reshape(len(paths), 64), axis=1).view('>u8').ravel().astype(np.uint64)
+    return hashes, readable
+
+
+class HammingIndex:
+    """Finds stored hashes within max_distance bits using d+1 exact-match bands."""
+
+    def __init__(self, max_distance):
+        self.max_distance = max_distance
+        edges = np.linspace(0, 64, max_distance + 2).astype(int)
+        self.bands = [(int(lo), (1 << int(hi - lo)) - 1) for lo, hi in zip(edges[:-1], edges[1:])]
+        self.buckets = [{} for _ in self.bands]
+        self.hashes = []
+
+    def _keys(self, h):
+        return [(h >> shift) & mask for shift, mask in self.bands]
+
+    def add(self, h):
+        """Store hash h; returns its position."""
+        h = int(h)
+        position = len(self.hashes)
+        self.hashes.append(h)
+        for bucket, key in zip(self.buckets, self._keys(h)):
+            bucket.setdefault(key, []).append(position)
+        return position
+
+    def nearest(self, h):
+        """(position, distance) of the closest stored hash within max_distance, or None."""
+        h = int(h)
+        candidates = set()
+        for bucket, key in zip(self.buckets, self._keys(h)):
+            candidates.update(bucket.get(key, ()))
+        if not candidates:
+            return None
+        candidates = np.fromiter(candidates, dtype=np.int64)
+        stored = np.array([self.hashes[c] for c in candidates], dtype=np.uint64)
+        distances = popcount(stored ^ np.uint64(h))
+        best = int(distances.argmin())
+        if distances[best] > self.max_distance:
+            return None
+        return int(candidates[best]), int(distances[best])
+
+
+def load_hashes(manifest, keys, workers=None):
+    """dHash for manifest keys, computing and caching any that are missing.
+
+    Returns (readable keys, their hashes, unreadable keys); unreadable files are
+    not cached, so they are retried next time.
+    """
+    # Older manifests cached 0 for unreadable files; recheck those (a real all-zero hash is rare)
+    missing = [k for k in keys if int(manifest.files[k].get('dhash', '0'), 16) == 0]
+    unreadable = set()
+    if missing:
+        hashes, readable = dhash_images([os.path.join(manifest.root, k) for k in missing], workers)
+        for key, h, ok in zip(missing, hashes, readable):
+            if ok:
+                manifest.files[key]['dhash'] = f"{int(h):016x}"
+            else:
+                manifest.files[key].pop('dhash', None)
+                unreadable.add(key)
+        manifest.dirty = True
+    keys = [k for k in keys if k not in unreadable]
+    return keys, np.array([int(manifest.files[k]['dhash'], 16) for k in keys], dtype=np.uint64), sorted(unreadable)
+
+
+def cluster(keys, hashes, max_distance):
+    """Greedy leader clustering in the given order.
+
+    Returns {duplicate_key: kept_key}; every key not in it is kept.
+    """
+    index = HammingIndex(max_distance)
+    leaders = []
+    duplicates = {}
+    # Identical hashes are common in static scenes; resolve them without the index
+    seen = {}
+    for key, h in zip(keys, hashes.tolist()):
+        if h in seen:
+            duplicates[key] = seen[h]
+            continue
+        match = index.nearest(h)
+        if match is not None:
+            duplicates[key] = seen[h] = leaders[match[0]]
+            continue
+        index.add(h)
+        leaders.append(key)
+        seen[h] = key
+    return duplicates
+
+
+def dedup(root='hand_cls', max_distance=2, per_split=False, classes=None, removable=None,
+          apply=False, workers=None):
+    """Find (and with apply=True delete) near-duplicates; returns a report dict.
+
+    removable limits deletions to the given paths (e.g. freshly extracted
+    frames); other images can still be the kept representative of a cluster.
+    """
+    manifest = get_manifest(root)
+    removable_keys = None
+    if removable is not None:
+        removable_keys = {os.path.relpath(p, root).replace(os.sep, '/') for p in removable}
+
+    by_class = {}
+    for key, record in manifest.files.items():
+        if classes is None or record['class'] in classes:
+            by_class.setdefault(record['class'], []).append(key)
+
+    split_order = {'train': 0, 'val': 1}
+    report = {'classes': {}, 'removed': [], 'unreadable': [], 'leaked': 0, 'bytes_before': 0, 'bytes_after': 0}
+    start = time.perf_counter()
+    for class_name, keys in sorted(by_class.items()):
+        # Protected images first, then train before val, then by name (frame order)
+        keys.sort(key=lambda k: (removable_keys is not None and k in removable_keys,
+                                 split_order.get(manifest.files[k]['split'], 2), k))
+        # Unreadable files are never clustered (their hash would be 0), so never deleted as duplicates
+        all_keys = keys
+        keys, hashes, unreadable = load_hashes(manifest, keys, workers)
+        hash_of = dict(zip(keys, hashes))
+
+        if per_split:
+            duplicates = {}
+            for split in sorted({manifest.files[k]['split'] for k in keys}):
+                split_keys = [k for k in keys if manifest.files[k]['split'] == split]
+                duplicates.update(cluster(split_keys, np.array([hash_of[k] for k in split_keys], dtype=np.uint64),
+                                          max_distance))
+            # Leakage: kept val images within distance of a kept train image
+            train_index = HammingIndex(max_distance)
+            for k in keys:
+                if k not in duplicates and manifest.files[k]['split'] == 'train':
+                    train_index.add(hash_of[k])
+            leaked = sum(1 for k in keys if k not in duplicates and manifest.files[k]['split'] == 'val'
+                         and train_index.nearest(hash_of[k]) is not None)
+        else:
+            duplicates = cluster(keys, hashes, max_distance)
+            leaked = sum(1 for k, kept in duplicates.items()
+                         if manifest.files[k]['split'] != manifest.files[kept]['split'])
+
+        if removable_keys is not None:
+            duplicates = {k: v for k, v in duplicates.items() if k in removable_keys}
+
+        stats = {}
+        for k in all_keys:
+            split = manifest.files[k]['split']
+            entry = stats.setdefault(split, {'before': 0, 'after': 0})
+            entry['before'] += 1
+            entry['after'] += k not in duplicates
+            size = manifest.files[k]['size']
+            report['bytes_before'] += size
+            report['bytes_after'] += 0 if k in duplicates else size
+        report['classes'][class_name] = stats
+        report['leaked'] += leaked
+        report['removed'].extend(sorted(duplicates))
+        report['unreadable'].extend(os.path.join(root, k) for k in unreadable)
+
+    report['seconds'] = time.perf_counter() - start
+    if apply and report['removed']:
+        paths = [os.path.join(root, k) for k in report['removed']]
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+        manifest.remove(paths)
+    manifest.save()
+    return report
+
+
+def print_report(report, max_distance, per_split=False, applied=False):
+    """Human-readable summary of a dedup() report."""
+    print(f"\n📊 Near-duplicates (dHash distance <= {max_distance}):")
+    for class_name, stats in report['classes'].items():
+        for split, entry in sorted(stats.items()):
+            removed = entry['before'] - entry['after']
+            print(f"  {split}/{class_name}: {entry['before']} -> {entry['after']} images ({removed} duplicates)")
+            if entry['after'] == 0:
+                print(f"    ⚠️  No {split}/{class_name} images would be left - record more varied footage")
+    before_mb = report['bytes_before'] / 1e6
+    after_mb = report['bytes_after'] / 1e6
+    saved = 1 - report['bytes_after'] / report['bytes_before'] if report['bytes_before'] else 0.0
+    print(f"  Size: {before_mb:.1f} MB -> {after_mb:.1f} MB ({saved * 100:.0f}% smaller)")
+    if per_split:
+        print(f"  Leakage: {report['leaked']} val images nearly duplicate a train image")
+    else:
+        print(f"  Leakage: {report['leaked']} duplicates crossed train/val and were removed from val")
+    print(f"  ({report['seconds']:.2f}s)")
+    if report['unreadable']:
+        print(f"\n⚠️  {len(report['unreadable'])} images could not be read and were left out (check or delete them):")
+        for path in report['unreadable'][:10]:
+            print(f"  {path}")
+        if len(report['unreadable']) > 10:
+            print(f"  ... and {len(report['unreadable']) - 10} more")
+    if report['removed'] and not applied:
+        print("\nDry run - re-run with --apply to delete the duplicates.")
+    elif applied:
+        print(f"\n✓ Removed {len(report['removed'])} images")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Remove near-duplicate images from the dataset')
+    parser.add_argument('--root', default='hand_cls', help='Dataset root (default: hand_cls)')
+    parser.add_argument('--distance', type=int, default=2, help='Max Hamming distance between 64-bit dHashes (default: 2)')
+    parser.add_argument('--classes', nargs='+', default=None, help='Only these classes (default: all)')
+    parser.add_argument('--per-split', action='store_true', help='Dedup train and val separately and only report leakage')
+    parser.add_argument('--apply', action='store_true', help='Delete the duplicates (default: report only)')
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.root):
+        print(f"Error: {args.root} not found")
+        return 1
+
+    report = dedup(args.root, args.distance, args.per_split, args.classes, apply=args.apply)
+    print_report(report, args.distance, args.per_split, args.apply)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Compare several weight files on the same images in one run.
+
+Every image in hand_cls/val (and, optionally, every Nth frame of labelled
+videos) is decoded and resized once into a shared memory-mapped cache.  Each
+model then runs in its own worker process, reading that cache with batched
+inference, so N models cost one decode pass instead of N.  Per model it
+reports:
+
+    - top-1 accuracy, overall and per source (val, each video)
+    - a confusion matrix (predictions outside the dataset classes count as 'other')
+    - calibration: expected calibration error (ECE) and mean confidence vs accuracy
+    - load time and images/sec
+
+    python3 evaluate_models.py                                   # the repo's three checkpoints
+    python3 evaluate_models.py --weights best_final.pt best_runpod.pt --videos hand.mov not_hand.mov
+    python3 evaluate_models.py --backend onnx --output eval.json
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from hand_classifier import HandClassifier
+from inference_backends import BACKENDS, list_images
+
+DEFAULT_WEIGHTS = ('yolov8n-cls.pt', 'best_final.pt', 'best_runpod.pt')
+CALIBRATION_BINS = 10
+
+
+def parse_video(value):
+    """VIDEO[:CLASS]; the class defaults to the file name (hand.mov -> hand)."""
+    video_path, sep, class_name = value.rpartition(':')
+    if not sep or not video_path:
+        video_path, class_name = value, os.path.splitext(os.path.basename(value))[0]
+    return video_path, class_name
+
+
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError("must be >= 1")
+    return number
+
+
+def read_video_frames(video_path, imgsz, stride=5):
+    """Every stride-th frame of a video, resized to imgsz x imgsz."""
+    cap = cv2.VideoCapture(video_path)
+    frames, index = [], 0
+    while True:
+        # grab() skips decoding the frames that are not kept
+        if not cap.grab():
+            break
+        if index % stride == 0:
+            ok, frame = cap.retrieve()
+            if ok:
+                frames.append(cv2.resize(frame, (imgsz, imgsz)))
+        index += 1
+    cap.release()
+    return frames
+
+
+def build_cache(cache_path, val_dir, videos, imgsz, stride=5, workers=None):
+    """Decode all images once into cache_path (.npy); returns (labels, sources, readable mask)."""
+    paths = list_images(val_dir) if val_dir else []
+    video_frames = []
+    for video_path, class_name in videos:
+        frames = read_video_frames(video_path, imgsz, stride)
+        if not frames:
+            print(f"Warning: no frames read from {video_path}")
+        video_frames.append((os.path.basename(video_path), class_name, frames))
+
+    total = len(paths) + sum(len(frames) for _, _, frames in video_frames)
+    images = np.lib.format.open_memmap(cache_path, mode='w+', dtype=np.uint8, shape=(total, imgsz, imgsz, 3))
+
+    def load(i):
+        image = cv2.imread(paths[i])
+        if image is None:
+            return False
+        images[i] = cv2.resize(image, (imgsz, imgsz))
+        return True
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        readable = list(pool.map(load, range(len(paths))))
+    labels = [os.path.basename(os.path.dirname(p)) for p in paths]
+    sources = ['val'] * len(paths)
+    row = len(paths)
+    for source, class_name, frames in video_frames:
+        for frame in frames:
+            images[row] = frame
+            row += 1
+        labels += [class_name] * len(frames)
+        sources += [source] * len(frames)
+    images.flush()
+
+    # Unreadable images stay black; keep them out of the scores
+    keep = np.array(readable + [True] * (total - len(paths)), dtype=bool)
+    if not keep.all():
+        print(f"Warning: {int((~keep).sum())} images could not be read and are skipped")
+    return labels, sources, keep
+
+
+def evaluate_job(weights, backend, cache_path, imgsz, batch_size, threads):
+    """Worker: run one model over the shared cache; returns its probabilities and timings."""
+    cv2.setNumThreads(1)
+    images = np.load(cache_path, mmap_mode='r')
+
+    # Share the CPUs between the parallel models instead of each grabbing all of them
+    start = time.perf_counter()
+    model = HandClassifier(weights, imgsz, backend, device='cpu', threads=threads, warmup=True)
+    load_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    probs = [model.predict_batch(list(images[i:i + batch_size])) for i in range(0, len(images), batch_size)]
+    infer_seconds = time.perf_counter() - start
+    return {'weights': weights, 'names': model.labels, 'probs': np.concatenate(probs),
+            'load_seconds': load_seconds, 'infer_seconds': infer_seconds}
+
+
+def confusion_matrix(predicted, labels, classes):
+    """Counts[true class][predicted class]; predictions outside classes go to 'other'."""
+    columns = list(classes) + ['other']
+    matrix = {c: {p: 0 for p in columns} for c in classes}
+    for pred, label in zip(predicted, labels):
+        if label in matrix:
+            matrix[label][pred if pred in matrix else 'other'] += 1
+    return matrix
+
+
+def calibration(confidence, correct, bins=CALIBRATION_BINS):
+    """Expected calibration error and per-bin (confidence, accuracy, count) of top-1 predictions."""
+    edges = np.linspace(0, 1, bins + 1)
+    which = np.clip(np.digitize(confidence, edges[1:-1]), 0, bins - 1)
+    table, ece = [], 0.0
+    for b in range(bins):
+        mask = which == b
+        if not mask.any():
+            continue
+        conf, acc = float(confidence[mask].mean()), float(correct[mask].mean())
+        ece += mask.mean() * abs(conf - acc)
+        table.append({'range': [float(edges[b]), float(edges[b + 1])], 'confidence': conf,
+                      'accuracy': acc, 'count': int(mask.sum())})
+    return float(ece), table
+
+
+def score(result, labels, sources, keep, classes):
+    """Metrics for one evaluate_job() result."""
+    probs = result['probs'][keep]
+    labels = [l for l, k in zip(labels, keep) if k]
+    sources = [s for s, k in zip(sources, keep) if k]
+    predicted = [result['names'][i] for i in probs.argmax(axis=1)]
+    correct = np.array([p == l for p, l in zip(predicted, labels)])
+    confidence = probs.max(axis=1)
+    ece, bins = calibration(confidence, correct)
+    per_source = {}
+    for source in dict.fromkeys(sources):
+        mask = np.array([s == source for s in sources])
+        per_source[source] = float(correct[mask].mean())
+    return {
+        'weights': result['weights'],
+        'images': len(labels),
+        'accuracy': float(correct.mean()) if len(correct) else 0.0,
+        'per_source': per_source,
+        'confusion': confusion_matrix(predicted, labels, classes),
+        'ece': ece,
+        'mean_confidence': float(confidence.mean()) if len(confidence) else 0.0,
+        'calibration_bins': bins,
+        'load_seconds': result['load_seconds'],
+        'images_per_sec': len(result['probs']) / result['infer_seconds'] if result['infer_seconds'] > 0 else 0.0,
+    }
+
+
+def evaluate_models(weights, val_dir='hand_cls/val', videos=(), imgsz=224, backend='torch', batch_size=32,
+                    workers=None, stride=5):
+    """Evaluate every weight file on one shared decode of the data; returns per-model reports."""
+    workers = workers or min(len(weights), os.cpu_count() or 1)
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    with tempfile.TemporaryDirectory(prefix='eval_cache_') as tmp:
+        cache_path = os.path.join(tmp, 'images.npy')
+        start = time.perf_counter()
+        labels, sources, keep = build_cache(cache_path, val_dir, videos, imgsz, stride)
+        print(f"Decoded {len(labels)} images once in {time.perf_counter() - start:.1f}s "
+              f"({', '.join(f'{s}: {sources.count(s)}' for s in dict.fromkeys(sources))})")
+        if not labels:
+            return []
+
+        classes = sorted(set(labels))
+        print(f"Evaluating {len(weights)} model(s) with {workers} worker process(es), {threads} thread(s) each...")
+        start = time.perf_counter()
+        reports = [None] * len(weights)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(evaluate_job, w, backend, cache_path, imgsz, batch_size, threads)
+                       for w in weights]
+            for i, future in enumerate(futures):
+                reports[i] = score(future.result(), labels, sources, keep, classes)
+        print(f"✓ Evaluated in {time.perf_counter() - start:.1f}s")
+    return reports
+
+
+def print_report(report):
+    print(f"\n📊 {report['weights']}: top-1 {report['accuracy'] * 100:.1f}% on {report['images']} images")
+    print("  " + ", ".join(f"{source} {acc * 100:.1f}%" for source, acc in report['per_source'].items()))
+    print(f"  Calibration: ECE {report['ece']:.3f}, mean confidence {report['mean_confidence'] * 100:.1f}% "
+          f"vs accuracy {report['accuracy'] * 100:.1f}%")
+    print(f"  Speed: {report['images_per_sec']:.0f} images/sec (loaded in {report['load_seconds']:.1f}s)")
+    matrix = report['confusion']
+    columns = list(next(iter(matrix.values())).keys()) if matrix else []
+    width = max([len(c) for c in columns] + [8])
+    header = 'true/pred'
+    print(f"  {header:<{width}} " + " ".join(f"{c:>{width}}" for c in columns))
+    for label, row in matrix.items():
+        print(f"  {label:<{width}} " + " ".join(f"{row[c]:>{width}}" for c in columns))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare weight files on hand_cls/val (and videos) in one decode pass')
+    parser.add_argument('--weights', nargs='+', default=None,
+                        help=f"Weight files to compare (default: {' '.join(DEFAULT_WEIGHTS)})")
+    parser.add_argument('--val', default='hand_cls/val', help='Labelled image directory (default: hand_cls/val)')
+    parser.add_argument('--videos', nargs='*', type=parse_video, default=[],
+                        help='Also score frames of VIDEO[:CLASS] (class defaults to the file name, e.g. hand.mov)')
+    parser.add_argument('--stride', type=positive_int, default=5, help='Use every Nth video frame (default: 5)')
+    parser.add_argument('--imgsz', type=int, default=224, help='Image size expected by the models (default: 224)')
+    parser.add_argument('--backend', choices=BACKENDS, default='torch', help='Inference backend (default: torch)')
+    parser.add_argument('--batch', type=positive_int, default=32, help='Images per model call (default: 32)')
+    parser.add_argument('--workers', type=int, default=None, help='Parallel model processes (default: one per model, up to the CPU count)')
+    parser.add_argument('--output', default=None, help='Also write the reports as JSON')
+    args = parser.parse_args()
+
+    weights = args.weights or [w for w in DEFAULT_WEIGHTS if os.path.exists(w)]
+    missing = [w for w in weights if not os.path.exists(w)]
+    for w in missing:
+        print(f"Warning: {w} not found, skipping")
+    weights = [w for w in weights if w not in missing]
+    if not weights:
+        print("Error: no weight files to evaluate")
+        return 1
+
+    reports = evaluate_models(weights, args.val, args.videos, args.imgsz, args.backend, args.batch,
+                              args.workers, args.stride)
+    if not reports:
+        print("Error: no images to evaluate on")
+        return 1
+    for report in reports:
+        print_report(report)
+
+    print(f"\n{'weights':<28} {'top-1':>7} {'ECE':>6} {'img/s':>7}")
+    for report in sorted(reports, key=lambda r: -r['accuracy']):
+        print(f"{report['weights']:<28} {report['accuracy'] * 100:6.1f}% {report['ece']:6.3f} "
+              f"{report['images_per_sec']:7.0f}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(reports, f, indent=2)
+        print(f"\n✓ Reports written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
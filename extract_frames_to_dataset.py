@@ -2,13 +2,28 @@
 """
 Extract frames from recorded videos and organize them into the dataset structure.
 Extracts at 5 fps to get 100 frames per 20-second video.
+
+Frames are decoded by ffmpeg into a raw pipe and each one is JPEG-encoded once.
+Any number of videos can be given as VIDEO:CLASS pairs; they are extracted in
+parallel, one process per video, each into its own staging directory under
+hand_cls/, and then renamed into train/val with per-class numbering:
+
+    python3 extract_frames_to_dataset.py session1_hand.mp4:hand session1_empty.mp4:not_hand ...
 """
+import argparse
 import os
-import sys
 import shutil
-import ffmpeg
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+import numpy as np
 import subprocess
 
+from dataset_manifest import get_manifest
+from dedup_dataset import dedup, print_report
+
 
 def check_ffmpeg():
     """Check if ffmpeg is installed."""
@@ -19,14 +34,13 @@ def check_ffmpeg():
         return False
 
 
-def create_dataset_dirs():
+DEFAULT_INPUTS = [("hand_video.mp4", 'hand'), ("not_hand_video.mp4", 'not_hand')]
+STAGING_DIR = 'hand_cls/.staging'
+
+
+def create_dataset_dirs(classes=('hand', 'not_hand')):
     """Ensure dataset directory structure exists."""
-    dirs = [
-        'hand_cls/train/hand',
-        'hand_cls/train/not_hand',
-        'hand_cls/val/hand',
-        'hand_cls/val/not_hand'
-    ]
+    dirs = [f'hand_cls/{split}/{class_name}' for split in ('train', 'val') for class_name in classes]
     
     for dir_path in dirs:
         os.makedirs(dir_path, exist_ok=True)
@@ -36,6 +50,9 @@ def create_dataset_dirs():
 
 def count_existing_images(directory):
     """Count existing images in a directory."""
+    manifest = get_manifest()
+    if manifest.tracks(directory):
+        return manifest.count(directory)
     if not os.path.exists(directory):
         return 0
     
@@ -45,6 +62,14 @@ def count_existing_images(directory):
 
 def clear_directory(directory):
     """Clear all images from a directory."""
+    manifest = get_manifest()
+    if manifest.tracks(directory):
+        paths = manifest.files_in(directory)
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+        manifest.remove(paths)
+        return
     if not os.path.exists(directory):
         return
     
@@ -54,22 +79,136 @@ def clear_directory(directory):
             os.remove(os.path.join(directory, f))
 
 
-def extract_frames(video_path, output_pattern, fps=5):
-    """Extract frames from video at specified fps."""
+def probe_video(video_path):
+    """Return (width, height, duration_seconds) of a video, or None if unreadable."""
+    cap = cv2.VideoCapture(video_path)
     try:
-        # Use ffmpeg to extract frames
-        stream = ffmpeg.input(video_path)
-        stream = ffmpeg.filter(stream, 'fps', fps=fps)
-        stream = ffmpeg.output(stream, output_pattern, start_number=1, pix_fmt='yuvj444p')
-        ffmpeg.run(stream, overwrite_output=True, quiet=True)
-        return True
-    except ffmpeg.Error as e:
+        # Use the first decoded frame for the size so rotation metadata is honoured
+        ret, frame = cap.read()
+        if not ret:
+            return None
+        height, width = frame.shape[:2]
+        video_fps = cap.get(cv2.CAP_PROP_FPS)
+        frame_count = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+        duration = frame_count / video_fps if video_fps > 0 else 0.0
+        return width, height, duration
+    finally:
+        cap.release()
+
+
+JPEG_SAMPLING = ('444', '422', '420')
+
+
+def jpeg_params(quality=95, sampling='444'):
+    """cv2.imwrite parameters for dataset JPEGs.
+
+    sampling is the chroma subsampling: '444' keeps full colour resolution
+    (matching the previous yuvj444p output), '420' halves it both ways.
+    """
+    params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+    if hasattr(cv2, 'IMWRITE_JPEG_SAMPLING_FACTOR'):
+        factor = getattr(cv2, f'IMWRITE_JPEG_SAMPLING_FACTOR_{sampling}')
+        params += [cv2.IMWRITE_JPEG_SAMPLING_FACTOR, factor]
+    return params
+
+
+def resize_frame(frame, size=None, square=False):
+    """Shrink frame so its short side is size (aspect kept); square also centre-crops to size x size.
+
+    Frames already at or below size are returned unchanged.
+    """
+    if not size:
+        return frame
+    h, w = frame.shape[:2]
+    if min(h, w) > size:
+        scale = size / min(h, w)
+        frame = cv2.resize(frame, (max(size, round(w * scale)), max(size, round(h * scale))),
+                           interpolation=cv2.INTER_AREA)
+        h, w = frame.shape[:2]
+    if square and (h > size or w > size):
+        top, left = max(0, (h - size) // 2), max(0, (w - size) // 2)
+        frame = frame[top:top + size, left:left + size]
+    return frame
+
+
+def stream_frames(video_path, width, height, fps=5):
+    """Yield BGR frames decoded by ffmpeg at the given fps, straight from its stdout."""
+    import ffmpeg  # only needed for video extraction; direct capture writes JPEGs itself
+
+    process = (
+        ffmpeg.input(video_path)
+        .filter('fps', fps=fps)
+        .output('pipe:', format='rawvideo', pix_fmt='bgr24', s=f'{width}x{height}')
+        .global_args('-loglevel', 'error')
+        .run_async(pipe_stdout=True)
+    )
+    frame_size = width * height * 3
+    try:
+        while True:
+            data = process.stdout.read(frame_size)
+            if len(data) < frame_size:
+                break
+            yield np.frombuffer(data, dtype=np.uint8).reshape(height, width, 3)
+    finally:
+        process.stdout.close()
+        returncode = process.wait()
+    if returncode != 0:
+        raise RuntimeError(f"ffmpeg exited with code {returncode}")
+
+
+def extract_frames(video_path, class_name, train_dir, val_dir, fps=5, append=False,
+                   size=None, square=False, quality=95, sampling='444'):
+    """Extract frames at fps, writing each one once, and split them 80/20 into train and val.
+
+    size/square/quality/sampling control the exported JPEGs (see resize_frame
+    and jpeg_params); the defaults keep full resolution.
+    Returns (train_count, val_count), or None if the video could not be read.
+    """
+    info = probe_video(video_path)
+    if info is None:
+        print(f"Error extracting frames: could not read {video_path}")
+        return None
+    width, height, duration = info
+
+    # Container frame counts are often 0 or wrong (phone / variable frame rate video),
+    # so every frame goes to train first and the split is made on the real count
+    expected = max(int(round(duration * fps)), 1)
+    train_start = get_next_file_number(train_dir, class_name) if append else 1
+    val_start = get_next_file_number(val_dir, class_name) if append else 1
+
+    params = jpeg_params(quality, sampling)
+
+    written = []
+    try:
+        for frame in stream_frames(video_path, width, height, fps):
+            dst = os.path.join(train_dir, f"{class_name}_{train_start + len(written):03d}.jpg")
+            cv2.imwrite(dst, resize_frame(frame, size, square), params)
+            written.append(dst)
+    except RuntimeError as e:
         print(f"Error extracting frames: {e}")
-        return False
+        return None
+
+    # Last 20% of the decoded frames become val
+    train_count = int(len(written) * 0.8)
+    for val_count, src in enumerate(written[train_count:]):
+        os.replace(src, os.path.join(val_dir, f"{class_name}_{val_start + val_count:03d}.jpg"))
+    val_count = len(written) - train_count
+
+    if len(written) != expected:
+        print(f"Warning: Expected {expected} frames from the container metadata, got {len(written)}")
+    return train_count, val_count
+
+
+def count_decoded_frames(video_path, fps=5):
+    """Number of frames stream_frames() yields at fps (decodes, but only ships tiny frames)."""
+    return sum(1 for _ in stream_frames(video_path, 16, 16, fps))
 
 
 def get_next_file_number(directory, class_name):
     """Get the next available file number for a class."""
+    manifest = get_manifest()
+    if manifest.tracks(directory) and os.path.basename(os.path.normpath(directory)) == class_name:
+        return manifest.next_index(directory)
     if not os.path.exists(directory):
         return 1
     
@@ -81,8 +220,8 @@ def get_next_file_number(directory, class_name):
     numbers = []
     for f in existing_files:
         try:
-            # Extract number from filename like "hand_001.jpg"
-            num = int(f.split('_')[1].split('.')[0])
+            # Extract number from filename like "hand_001.jpg" or "not_hand_001.jpg"
+            num = int(f.rsplit('_', 1)[1].split('.')[0])
             numbers.append(num)
         except:
             pass
@@ -90,40 +229,199 @@ def get_next_file_number(directory, class_name):
     return max(numbers) + 1 if numbers else 1
 
 
-def distribute_frames(temp_dir, class_name, train_dir, val_dir, total_frames=100, append=False):
-    """Distribute frames 80/20 between train and val."""
-    # Get all extracted frames
-    frames = sorted([f for f in os.listdir(temp_dir) if f.endswith('.jpg')])
-    
-    if len(frames) != total_frames:
-        print(f"Warning: Expected {total_frames} frames, got {len(frames)}")
-    
-    # Split 80/20
-    train_count = int(len(frames) * 0.8)
-    train_frames = frames[:train_count]
-    val_frames = frames[train_count:]
-    
-    # Get starting numbers if appending
-    train_start = get_next_file_number(train_dir, class_name) if append else 1
-    val_start = get_next_file_number(val_dir, class_name) if append else 1
-    
-    # Copy to train directory
-    for i, frame in enumerate(train_frames):
-        src = os.path.join(temp_dir, frame)
-        dst = os.path.join(train_dir, f"{class_name}_{train_start + i:03d}.jpg")
-        shutil.copy2(src, dst)
-    
-    # Copy to val directory
-    for i, frame in enumerate(val_frames):
-        src = os.path.join(temp_dir, frame)
-        dst = os.path.join(val_dir, f"{class_name}_{val_start + i:03d}.jpg")
-        shutil.copy2(src, dst)
-    
-    return len(train_frames), len(val_frames)
+def parse_input(value):
+    """Parse a VIDEO:CLASS argument into (video_path, class_name)."""
+    video_path, sep, class_name = value.rpartition(':')
+    if not sep or not video_path or not class_name:
+        raise argparse.ArgumentTypeError(f"expected VIDEO:CLASS, got '{value}'")
+    return video_path, class_name
+
+
+def extract_job(index, video_path, class_name, fps=5, export=None):
+    """Worker: extract one video into its own staging directory.
+
+    Returns (index, staging_dir, counts, seconds); counts is None on failure.
+    """
+    # One ffmpeg + encoder per process; keep OpenCV from spawning its own threads too
+    cv2.setNumThreads(1)
+    start = time.perf_counter()
+    staging = os.path.join(STAGING_DIR, f"job_{index:03d}")
+    train_dir = os.path.join(staging, 'train')
+    val_dir = os.path.join(staging, 'val')
+    os.makedirs(train_dir, exist_ok=True)
+    os.makedirs(val_dir, exist_ok=True)
+    counts = extract_frames(video_path, class_name, train_dir, val_dir, fps=fps, **(export or {}))
+    return index, staging, counts, time.perf_counter() - start
+
+
+def commit_staged(staging, class_name, next_numbers):
+    """Rename a job's staged frames into hand_cls/, numbering on from next_numbers.
+
+    Returns the final paths.
+    """
+    committed = []
+    for split in ('train', 'val'):
+        src_dir = os.path.join(staging, split)
+        dst_dir = f'hand_cls/{split}/{class_name}'
+        key = (split, class_name)
+        if key not in next_numbers:
+            next_numbers[key] = get_next_file_number(dst_dir, class_name)
+        moved = []
+        for f in sorted(os.listdir(src_dir)):
+            dst = os.path.join(dst_dir, f"{class_name}_{next_numbers[key]:03d}.jpg")
+            os.replace(os.path.join(src_dir, f), dst)
+            moved.append(dst)
+            next_numbers[key] += 1
+        get_manifest().add(moved)
+        committed.extend(moved)
+    shutil.rmtree(staging, ignore_errors=True)
+    return committed
+
+
+def extract_all(inputs, fps=5, workers=None, export=None):
+    """Extract every (video, class) input in parallel and move the frames into hand_cls/.
+
+    Jobs are committed in input order, so file numbering does not depend on
+    which worker finishes first.  Returns a list of per-job result dicts.
+    """
+    workers = workers or min(len(inputs), os.cpu_count() or 1)
+    shutil.rmtree(STAGING_DIR, ignore_errors=True)
+    results = [None] * len(inputs)
+    next_numbers = {}
+    committed = 0
+
+    print(f"\nExtracting {len(inputs)} video(s) at {fps} fps with {workers} worker process(es)...")
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(extract_job, i, video_path, class_name, fps, export)
+                   for i, (video_path, class_name) in enumerate(inputs)]
+        for future in as_completed(futures):
+            index, staging, counts, seconds = future.result()
+            video_path, class_name = inputs[index]
+            results[index] = {'video': video_path, 'class': class_name, 'staging': staging,
+                              'counts': counts, 'seconds': seconds}
+            status = f"{counts[0]} train / {counts[1]} val" if counts else "FAILED"
+            print(f"  [{index + 1}/{len(inputs)}] {video_path} -> {class_name}: {status} ({seconds:.1f}s)")
+
+            # Commit every finished job whose predecessors are all committed
+            while committed < len(inputs) and results[committed] is not None:
+                result = results[committed]
+                if result['counts'] is not None:
+                    result['paths'] = commit_staged(result['staging'], result['class'], next_numbers)
+                committed += 1
+
+    shutil.rmtree(STAGING_DIR, ignore_errors=True)
+    elapsed = time.perf_counter() - start
+    frames = sum(sum(r['counts']) for r in results if r['counts'])
+    print(f"✓ Extracted {frames} frames in {elapsed:.1f}s ({frames / max(elapsed, 1e-9):.0f} frames/sec)")
+    return results
+
+
+def check_export_accuracy(inputs, weights, fps=5, imgsz=224, export=None, batch_size=16, train_counts=None):
+    """Compare top-1 accuracy on each video's val frames at full resolution vs exported.
+
+    The val portion (last 20%) of every video is decoded once; each frame is
+    classified as decoded and again after a round trip through the export
+    settings (resize + JPEG encode/decode).  train_counts maps an input's index
+    to its extracted train frame count (the split point); inputs without one are
+    counted with an extra decoding pass.  Returns a summary dict.
+    """
+    from hand_classifier import HandClassifier
+
+    export = export or {}
+    model = HandClassifier(weights, imgsz, verbose=False)
+    names = model.labels
+    params = jpeg_params(export.get('quality', 95), export.get('sampling', '444'))
+    full_params = jpeg_params()
+    totals = {'images': 0, 'full_correct': 0, 'export_correct': 0, 'agree': 0,
+              'full_bytes': 0, 'export_bytes': 0}
+
+    def score(full, exported, label):
+        full_pred = model.predict_batch(full).argmax(axis=1)
+        export_pred = model.predict_batch(exported).argmax(axis=1)
+        totals['images'] += len(full)
+        totals['full_correct'] += int((full_pred == label).sum())
+        totals['export_correct'] += int((export_pred == label).sum())
+        totals['agree'] += int((full_pred == export_pred).sum())
+
+    for index, (video_path, class_name) in enumerate(inputs):
+        if class_name not in names:
+            print(f"Warning: {weights} has no class '{class_name}', skipping {video_path} in the check")
+            continue
+        info = probe_video(video_path)
+        if info is None:
+            print(f"Warning: could not read {video_path}, skipping it in the check")
+            continue
+        width, height, _ = info
+        train_total = (train_counts or {}).get(index)
+        if train_total is None:
+            train_total = int(count_decoded_frames(video_path, fps) * 0.8)
+        label = names.index(class_name)
+        full, exported = [], []
+        for i, frame in enumerate(stream_frames(video_path, width, height, fps)):
+            if i < train_total:
+                continue
+            ok, jpeg = cv2.imencode('.jpg', resize_frame(frame, export.get('size'), export.get('square', False)), params)
+            totals['export_bytes'] += len(jpeg)
+            totals['full_bytes'] += len(cv2.imencode('.jpg', frame, full_params)[1])
+            full.append(frame)
+            exported.append(cv2.imdecode(jpeg, cv2.IMREAD_COLOR))
+            if len(full) == batch_size:
+                score(full, exported, label)
+                full, exported = [], []
+        if full:
+            score(full, exported, label)
+
+    n = max(totals['images'], 1)
+    return {
+        'images': totals['images'],
+        'full_accuracy': totals['full_correct'] / n,
+        'export_accuracy': totals['export_correct'] / n,
+        'agreement': totals['agree'] / n,
+        'full_bytes_per_image': totals['full_bytes'] / n,
+        'export_bytes_per_image': totals['export_bytes'] / n,
+    }
+
+
+def print_export_check(check, tolerance=0.005):
+    """Print a check_export_accuracy() summary; returns False if accuracy dropped."""
+    if not check['images']:
+        print("\nError: no val frames could be checked")
+        return False
+    print(f"\n🔎 Export check on {check['images']} val frames:")
+    print(f"  Full resolution: top-1 {check['full_accuracy'] * 100:.1f}%, "
+          f"{check['full_bytes_per_image'] / 1024:.0f} KB/image (q95 4:4:4)")
+    print(f"  Exported:        top-1 {check['export_accuracy'] * 100:.1f}%, "
+          f"{check['export_bytes_per_image'] / 1024:.0f} KB/image")
+    print(f"  Predictions agree on {check['agreement'] * 100:.1f}% of frames")
+    if check['export_accuracy'] < check['full_accuracy'] - tolerance:
+        print("  ⚠️  Accuracy dropped - use a larger --size or higher --quality")
+        return False
+    print("  ✓ Accuracy unchanged")
+    return True
 
 
 def main():
     """Main function to extract frames from videos."""
+    parser = argparse.ArgumentParser(description='Extract frames from videos into hand_cls/')
+    parser.add_argument('inputs', nargs='*', type=parse_input, metavar='VIDEO:CLASS',
+                        help='Videos and their class (default: hand_video.mp4:hand not_hand_video.mp4:not_hand)')
+    parser.add_argument('--fps', type=float, default=5, help='Frames per second to extract (default: 5)')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: one per video, up to the CPU count)')
+    parser.add_argument('--dedup', action='store_true', help='Remove new frames that nearly duplicate another image of the same class')
+    parser.add_argument('--dedup-distance', type=int, default=2, help='Max dHash distance counted as a duplicate (default: 2)')
+    parser.add_argument('--size', type=int, default=None, help='Resize so the short side is SIZE pixels, keeping aspect (default: full resolution)')
+    parser.add_argument('--square', action='store_true', help='With --size, also centre-crop to SIZE x SIZE')
+    parser.add_argument('--quality', type=int, default=95, help='JPEG quality 1-100 (default: 95)')
+    parser.add_argument('--sampling', choices=JPEG_SAMPLING, default='444', help='JPEG chroma subsampling (default: 444)')
+    parser.add_argument('--check-weights', default=None, help='Weights used to check val accuracy of the export settings against full resolution')
+    parser.add_argument('--check-imgsz', type=int, default=224, help='Model image size for the check (default: 224)')
+    parser.add_argument('--check-only', action='store_true', help='Only run the export check, do not write any images')
+    args = parser.parse_args()
+    export = {'size': args.size, 'square': args.square, 'quality': args.quality, 'sampling': args.sampling}
+    inputs = args.inputs or DEFAULT_INPUTS
+    classes = list(dict.fromkeys(class_name for _, class_name in inputs))
+
     print("=== Frame Extraction Tool ===")
     
     # Check for ffmpeg
@@ -135,23 +433,26 @@ def main():
         return 1
     
     # Check for video files
-    if not os.path.exists("hand_video.mp4"):
-        print("Error: hand_video.mp4 not found.")
-        print("Please run capture_dataset_videos.py first.")
-        return 1
+    for video_path, _ in inputs:
+        if not os.path.exists(video_path):
+            print(f"Error: {video_path} not found.")
+            print("Please run capture_dataset_videos.py first.")
+            return 1
     
-    if not os.path.exists("not_hand_video.mp4"):
-        print("Error: not_hand_video.mp4 not found.")
-        print("Please run capture_dataset_videos.py first.")
-        return 1
+    if args.check_only:
+        if not args.check_weights:
+            print("Error: --check-only needs --check-weights")
+            return 1
+        check = check_export_accuracy(inputs, args.check_weights, args.fps, args.check_imgsz, export)
+        return 0 if print_export_check(check) else 1
     
     # Create dataset structure
     print("\nCreating dataset directories...")
-    create_dataset_dirs()
+    create_dataset_dirs(classes)
     
     # Check for existing images
     existing_images = False
-    for class_name in ['hand', 'not_hand']:
+    for class_name in classes:
         train_count = count_existing_images(f'hand_cls/train/{class_name}')
         val_count = count_existing_images(f'hand_cls/val/{class_name}')
         if train_count > 0 or val_count > 0:
@@ -171,85 +472,62 @@ def main():
         if response == '1':
             # Clear existing images
             print("\nClearing existing images...")
-            for class_name in ['hand', 'not_hand']:
+            for class_name in classes:
                 clear_directory(f'hand_cls/train/{class_name}')
                 clear_directory(f'hand_cls/val/{class_name}')
-            append_mode = False
         elif response == '2':
+            # Staged frames are numbered on from the highest existing file
             print("\nAdding to existing dataset...")
-            append_mode = True
         else:
             print("Extraction cancelled.")
             return 0
-    else:
-        append_mode = False
     
-    # Create temp directory
-    temp_dir = 'temp_frames'
-    os.makedirs(temp_dir, exist_ok=True)
-    
-    try:
-        # Process hand video
-        print("\n--- Processing hand_video.mp4 ---")
-        print("Extracting frames at 5 fps...")
-        
-        output_pattern = os.path.join(temp_dir, 'frame_%03d.jpg')
-        if not extract_frames("hand_video.mp4", output_pattern, fps=5):
-            return 1
-        
-        train_count, val_count = distribute_frames(
-            temp_dir, 'hand',
-            'hand_cls/train/hand',
-            'hand_cls/val/hand',
-            append=append_mode
-        )
-        print(f"✓ Created {train_count} training images")
-        print(f"✓ Created {val_count} validation images")
-        
-        # Clear temp directory
-        for f in os.listdir(temp_dir):
-            os.remove(os.path.join(temp_dir, f))
-        
-        # Process not_hand video
-        print("\n--- Processing not_hand_video.mp4 ---")
-        print("Extracting frames at 5 fps...")
-        
-        if not extract_frames("not_hand_video.mp4", output_pattern, fps=5):
-            return 1
-        
-        train_count, val_count = distribute_frames(
-            temp_dir, 'not_hand',
-            'hand_cls/train/not_hand',
-            'hand_cls/val/not_hand',
-            append=append_mode
-        )
-        print(f"✓ Created {train_count} training images")
-        print(f"✓ Created {val_count} validation images")
-        
-    finally:
-        # Cleanup temp directory
-        if os.path.exists(temp_dir):
-            shutil.rmtree(temp_dir)
+    # Frames are streamed out of ffmpeg, one worker process per video
+    results = extract_all(inputs, fps=args.fps, workers=args.workers, export=export)
+    failed = [r['video'] for r in results if r['counts'] is None]
+    get_manifest().save()
+
+    new_paths = [p for r in results if r['counts'] is not None for p in r['paths']]
+    if new_paths:
+        new_bytes = sum(os.path.getsize(p) for p in new_paths)
+        resolution = f"short side {args.size}{' square' if args.square else ''}" if args.size else "full resolution"
+        print(f"✓ {new_bytes / 1e6:.1f} MB written, {new_bytes / len(new_paths) / 1024:.0f} KB/image "
+              f"({resolution}, quality {args.quality}, {args.sampling})")
+
+    if args.dedup:
+        # Only the frames just extracted are candidates; existing images are kept
+        report = dedup(classes=classes, max_distance=args.dedup_distance, removable=new_paths, apply=True)
+        print_report(report, args.dedup_distance, applied=True)
+
+    if args.check_weights:
+        train_counts = {i: r['counts'][0] for i, r in enumerate(results) if r['counts'] is not None}
+        print_export_check(check_export_accuracy(inputs, args.check_weights, args.fps, args.check_imgsz, export,
+                                                 train_counts=train_counts))
     
     # Final summary
-    print("\n✅ Dataset creation complete!")
+    if failed:
+        print(f"\n⚠️  {len(failed)} video(s) failed: {', '.join(failed)}")
+    else:
+        print("\n✅ Dataset creation complete!")
     print("\n📊 Dataset summary:")
-    total = 0
+    for class_name in classes:
+        added = [r['counts'] for r in results if r['class'] == class_name and r['counts']]
+        print(f"  {class_name}: +{sum(c[0] for c in added)} train / +{sum(c[1] for c in added)} val "
+              f"from {len(added)} video(s)")
+    counts = get_manifest().counts()
     for split in ['train', 'val']:
         print(f"\n{split.upper()}:")
-        for class_name in ['hand', 'not_hand']:
-            count = count_existing_images(f'hand_cls/{split}/{class_name}')
-            total += count
+        for class_name, count in counts.get(split, {}).items():
             print(f"  {class_name}: {count} images")
     
-    print(f"\nTotal images: {total}")
+    print(f"\nTotal images: {get_manifest().total()}")
     print("\n🚀 Your dataset is ready for training!")
     print("Next steps:")
     print("1. Review images in hand_cls/ directory")
     print("2. Upload to RunPod for training")
-    print("3. Or run locally with: yolo classify train model=yolov8n-cls.pt data=hand_cls epochs=15")
+    print("3. Or run locally with: python3 train.py --epochs 15")
     
-    return 0
+    return 1 if failed else 0
 
 
 if __name__ == "__main__":
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Threaded capture / inference building blocks for the live demos.
+
+The sequential demo loop reads a frame, runs the model and displays the result
+one step after another, so camera latency and model latency add up and old
+frames pile up in the driver buffer.  The classes here split that loop into
+stages that each hold only the newest item (queue depth 1, drop-oldest):
+
+    LatestFrameGrabber  - capture thread, always holds the newest camera frame
+    InferenceWorker     - runs the model on the newest frame it has not seen
+    BatchInferenceWorker - one model call per tick on the newest frame of every
+                          grabber, with the results routed back per stream
+    RateMeter           - rolling frames-per-second counter for each stage
+"""
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+
+_NO_TIMING = nullcontext()
+
+
+class RateMeter:
+    """Rolling events-per-second counter over a short time window."""
+
+    def __init__(self, window: float = 2.0):
+        self.window = window
+        self.count = 0
+        self._stamps = deque()
+        self._lock = threading.Lock()
+
+    def tick(self):
+        """Record one event (a captured, inferred or displayed frame)."""
+        now = time.perf_counter()
+        with self._lock:
+            self.count += 1
+            self._stamps.append(now)
+            while self._stamps and now - self._stamps[0] > self.window:
+                self._stamps.popleft()
+
+    def rate(self) -> float:
+        """Events per second over the last window."""
+        with self._lock:
+            if len(self._stamps) < 2:
+                return 0.0
+            span = self._stamps[-1] - self._stamps[0]
+            return (len(self._stamps) - 1) / span if span > 0 else 0.0
+
+
+class LatestSlot:
+    """Single-item mailbox: put() overwrites, get() waits for something newer."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._item = None
+        self._seq = 0
+        self._closed = False
+        self.overwritten = 0
+        self._taken_seq = 0
+
+    def put(self, item):
+        """Store item, replacing (dropping) whatever has not been taken yet."""
+        with self._cond:
+            if self._seq > self._taken_seq:
+                self.overwritten += 1
+            self._item = item
+            self._seq += 1
+            self._cond.notify_all()
+
+    def get(self, after_seq: int = 0, timeout: float = None):
+        """Return (seq, item) for the newest item with seq > after_seq.
+
+        Returns (after_seq, None) on timeout or once the slot is closed.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq > after_seq or self._closed, timeout)
+            if self._seq <= after_seq:
+                return after_seq, None
+            self._taken_seq = max(self._taken_seq, self._seq)
+            return self._seq, self._item
+
+    def peek(self):
+        """Return (seq, item) for the newest item without waiting."""
+        with self._cond:
+            return self._seq, self._item
+
+    def close(self):
+        """Wake up all waiters; further get() calls return immediately."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+def _stage(metrics, name):
+    """Timing context for a stage, or a no-op when no metrics are attached."""
+    return metrics.stage(name) if metrics is not None else _NO_TIMING
+
+
+class LatestFrameGrabber(threading.Thread):
+    """Capture thread that keeps only the newest frame from a cv2.VideoCapture."""
+
+    def __init__(self, cap, name: str = 'capture', metrics=None):
+        super().__init__(name=name, daemon=True)
+        self.cap = cap
+        self.frames = LatestSlot()
+        self.meter = RateMeter()
+        self.metrics = metrics
+        self.running = True
+        self.failed = False
+
+    def run(self):
+        while self.running:
+            with _stage(self.metrics, 'capture'):
+                ret, frame = self.cap.read()
+            if not ret:
+                self.failed = True
+                break
+            self.frames.put((time.perf_counter(), frame))
+            self.meter.tick()
+        self.frames.close()
+
+    @property
+    def dropped(self) -> int:
+        """Frames that were replaced before any consumer took them."""
+        return self.frames.overwritten
+
+    def stop(self):
+        self.running = False
+        self.frames.close()
+
+
+class InferenceWorker(threading.Thread):
+    """Runs predict_fn on the newest frame from a grabber, one at a time.
+
+    predict_fn takes a BGR frame and returns any result object; the newest
+    result is published as (capture_time, frame, result, inference_seconds).
+    """
+
+    def __init__(self, grabber: LatestFrameGrabber, predict_fn, name: str = 'inference', metrics=None):
+        super().__init__(name=name, daemon=True)
+        self.grabber = grabber
+        self.predict_fn = predict_fn
+        self.results = LatestSlot()
+        self.meter = RateMeter()
+        self.metrics = metrics
+        self.running = True
+        self.error = None
+
+    def run(self):
+        seq = 0
+        while self.running:
+            seq, item = self.grabber.frames.get(seq, timeout=0.5)
+            if item is None:
+                if self.grabber.failed or not self.grabber.running:
+                    break
+                continue
+            captured_at, frame = item
+            start = time.perf_counter()
+            try:
+                with _stage(self.metrics, 'inference'):
+                    result = self.predict_fn(frame)
+            except Exception as e:  # surface model errors to the display loop
+                self.error = e
+                break
+            self.results.put((captured_at, frame, result, time.perf_counter() - start))
+            self.meter.tick()
+        self.results.close()
+
+    def stop(self):
+        self.running = False
+        self.results.close()
+
+
+class BatchInferenceWorker(threading.Thread):
+    """Batches the newest unseen frame of several grabbers into one model call.
+
+    predict_batch_fn takes a list of BGR frames and returns one result per
+    frame.  Each tick gathers whatever streams have a new frame, so a slow or
+    stalled camera never holds up the others.  results[i] holds the newest
+    (capture_time, frame, result, inference_seconds) for grabbers[i].
+
+    step() runs a single tick in the caller's thread; start() runs ticks on a
+    background thread until every grabber has stopped.
+    """
+
+    def __init__(self, grabbers, predict_batch_fn, name: str = 'batch-inference', metrics=None,
+                 idle: float = 0.002):
+        super().__init__(name=name, daemon=True)
+        self.grabbers = list(grabbers)
+        self.predict_batch_fn = predict_batch_fn
+        self.results = [LatestSlot() for _ in self.grabbers]
+        self.meters = [RateMeter() for _ in self.grabbers]
+        self.meter = RateMeter()
+        self.metrics = metrics
+        self.idle = idle
+        self.batches = 0
+        self.inferred = 0
+        self.running = True
+        self.error = None
+        self._seqs = [0] * len(self.grabbers)
+
+    def _finished(self) -> bool:
+        return all(g.failed or not g.running for g in self.grabbers)
+
+    def step(self):
+        """Run one tick; returns [(stream, capture_time, result)], or None once all sources ended."""
+        batch = []
+        for i, grabber in enumerate(self.grabbers):
+            seq, item = grabber.frames.get(self._seqs[i], timeout=0)
+            if item is not None:
+                self._seqs[i] = seq
+                batch.append((i, item))
+        if not batch:
+            if self._finished():
+                return None
+            time.sleep(self.idle)
+            return []
+
+        start = time.perf_counter()
+        with _stage(self.metrics, 'inference'):
+            results = self.predict_batch_fn([frame for _, (_, frame) in batch])
+        elapsed = time.perf_counter() - start
+
+        routed = []
+        for (i, (captured_at, frame)), result in zip(batch, results):
+            self.results[i].put((captured_at, frame, result, elapsed))
+            self.meters[i].tick()
+            routed.append((i, captured_at, result))
+        self.meter.tick()
+        self.batches += 1
+        self.inferred += len(batch)
+        return routed
+
+    @property
+    def mean_batch(self) -> float:
+        return self.inferred / self.batches if self.batches else 0.0
+
+    def run(self):
+        while self.running:
+            try:
+                if self.step() is None:
+                    break
+            except Exception as e:  # surface model errors to the display loop
+                self.error = e
+                break
+        for slot in self.results:
+            slot.close()
+
+    def stop(self):
+        self.running = False
+        for slot in self.results:
+            slot.close()
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Frame sources for the demos: webcam, video file, image directory or stream URL.
+
+open_source() turns a --source value into an object with the cv2.VideoCapture
+interface the demos already use (read, isOpened, set, get, release):
+
+    0, 1, ...                 webcam index
+    hand.mov                  video file
+    hand_cls/val/hand         directory of images (sorted, optionally looping)
+    http://... / rtsp://...   network stream
+
+For testing the URL path without a camera on the network, this file can also
+serve a video or image directory as an MJPEG stream on localhost:
+    python3 frame_sources.py serve hand.mov --port 8090
+    python3 live_demo.py --weights best_final.pt --source http://127.0.0.1:8090/stream.mjpg
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.JPG', '.JPEG', '.PNG')
+STREAM_PREFIXES = ('rtsp://', 'rtmp://', 'http://', 'https://', 'udp://', 'tcp://')
+
+
+class ImageDirectorySource:
+    """Reads the images in a directory in sorted order, like a VideoCapture."""
+
+    def __init__(self, directory, loop=False, fps=0.0):
+        self.paths = sorted(
+            os.path.join(directory, f) for f in os.listdir(directory) if f.endswith(IMAGE_EXTENSIONS)
+        )
+        self.loop = loop
+        self.fps = fps
+        self.index = 0
+        self._last = 0.0
+
+    def isOpened(self):
+        return bool(self.paths)
+
+    def read(self):
+        if self.index >= len(self.paths) and (not self.loop or not self.paths):
+            return False, None
+        if self.fps > 0:
+            # Pace playback like a camera would
+            delay = self._last + 1.0 / self.fps - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            self._last = time.perf_counter()
+        # Skip unreadable images, but give up once a full pass has found nothing readable
+        for _ in range(len(self.paths)):
+            if self.index >= len(self.paths):
+                if not self.loop:
+                    break
+                self.index = 0
+            frame = cv2.imread(self.paths[self.index])
+            self.index += 1
+            if frame is not None:
+                return True, frame
+        return False, None
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return len(self.paths)
+        return 0.0
+
+    def set(self, prop, value):
+        return False
+
+    def release(self):
+        self.paths = []
+
+
+class PacedCapture:
+    """Wraps a capture so read() returns frames no faster than fps, like a camera would."""
+
+    def __init__(self, cap, fps):
+        self.cap = cap
+        self.fps = fps
+        self._last = 0.0
+
+    def read(self):
+        delay = self._last + 1.0 / self.fps - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        self._last = time.perf_counter()
+        return self.cap.read()
+
+    def __getattr__(self, name):
+        return getattr(self.cap, name)
+
+
+def describe_source(source):
+    """Human-readable description of a --source value."""
+    source = str(source)
+    if source.isdigit():
+        return f"webcam {source}"
+    if source.startswith(STREAM_PREFIXES):
+        return f"stream {source}"
+    if os.path.isdir(source):
+        return f"image directory {source}"
+    return f"video file {source}"
+
+
+def open_source(source, loop=False, fps=0.0):
+    """Open a webcam index, video file, image directory or stream URL.
+
+    fps > 0 plays image directories and video files at that rate, like a camera;
+    fps=None plays video files at their own frame rate.  0 reads them as fast as possible.
+    """
+    source = str(source)
+    if source.isdigit():
+        cap = cv2.VideoCapture(int(source))
+    elif os.path.isdir(source):
+        cap = ImageDirectorySource(source, loop=loop, fps=fps or 0.0)
+    elif source.startswith(STREAM_PREFIXES) or os.path.exists(source):
+        cap = cv2.VideoCapture(source)
+    else:
+        raise RuntimeError(f"Frame source not found: {source}")
+
+    if not cap.isOpened():
+        hint = " Check your camera connection." if source.isdigit() else ""
+        raise RuntimeError(f"Could not open {describe_source(source)}.{hint}")
+    if isinstance(cap, cv2.VideoCapture) and os.path.isfile(source):
+        rate = cap.get(cv2.CAP_PROP_FPS) if fps is None else fps
+        if rate > 0:
+            cap = PacedCapture(cap, rate)
+    return cap
+
+
+class MjpegStreamServer:
+    """Local stand-in for a network camera: serves a source as an MJPEG stream."""
+
+    def __init__(self, source, port=8090, fps=15.0, quality=80):
+        self.source = source
+        self.fps = fps
+        self.quality = quality
+        self._frame = None
+        self._cond = threading.Condition()
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), self._handler())
+        self.url = f"http://127.0.0.1:{port}/stream.mjpg"
+
+    def _produce(self):
+        """Read the source in a loop at the target fps and publish JPEG frames."""
+        interval = 1.0 / self.fps
+        while True:
+            cap = open_source(self.source)
+            while True:
+                start = time.perf_counter()
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                ok, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+                if ok:
+                    with self._cond:
+                        self._frame = jpeg.tobytes()
+                        self._cond.notify_all()
+                time.sleep(max(0.0, interval - (time.perf_counter() - start)))
+            cap.release()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != '/stream.mjpg':
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'multipart/x-mixed-replace; boundary=frame')
+                self.end_headers()
+                last = None
+                try:
+                    while True:
+                        with server._cond:
+                            server._cond.wait_for(lambda: server._frame is not last)
+                            last = server._frame
+                        self.wfile.write(b'--frame\r\nContent-Type: image/jpeg\r\n')
+                        self.wfile.write(f'Content-Length: {len(last)}\r\n\r\n'.encode())
+                        self.wfile.write(last + b'\r\n')
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def serve_forever(self):
+        threading.Thread(target=self._produce, name='mjpeg-producer', daemon=True).start()
+        print(f"Serving {describe_source(self.source)} at {self.url} ({self.fps:.0f} fps). Ctrl+C to stop.")
+        self._server.serve_forever()
+
+    def shutdown(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve a video file or image directory as a local MJPEG stream')
+    parser.add_argument('command', choices=['serve'], help='serve: stream a source over HTTP')
+    parser.add_argument('source', help='Video file or image directory to stream')
+    parser.add_argument('--port', type=int, default=8090, help='HTTP port (default: 8090)')
+    parser.add_argument('--fps', type=float, default=15.0, help='Stream frame rate (default: 15)')
+    args = parser.parse_args()
+
+    server = MjpegStreamServer(args.source, args.port, args.fps)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopped.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Cheap HUD drawing for the demos: pre-blended sprites and cached text.
+
+An overlay with transparency is premultiplied by its alpha once, at load time,
+so compositing it onto a frame is two in-place uint8 operations on the ROI
+(scale by inverse alpha, add the premultiplied colour) instead of a float64
+blend per channel.  Static text is rasterised once into such a sprite and
+reused; only text that changes every frame (numbers) goes through putText.
+"""
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+
+class Sprite:
+    """A BGR or BGRA image prepared for fast compositing onto BGR frames."""
+
+    def __init__(self, image):
+        self.height, self.width = image.shape[:2]
+        if image.ndim == 3 and image.shape[2] == 4:
+            alpha = image[:, :, 3:4]
+            self.premultiplied = (image[:, :, :3].astype(np.float32) * (alpha / 255.0) + 0.5).astype(np.uint8)
+            self.inverse_alpha = np.repeat(255 - alpha, 3, axis=2)
+        else:
+            self.premultiplied = np.ascontiguousarray(image[:, :, :3])
+            self.inverse_alpha = None
+
+    def draw(self, frame, x, y):
+        """Composite onto frame in place with the top-left corner at (x, y)."""
+        # Clip to the frame so sprites near the edge are drawn partially
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + self.width, frame.shape[1]), min(y + self.height, frame.shape[0])
+        if x0 >= x1 or y0 >= y1:
+            return frame
+
+        roi = frame[y0:y1, x0:x1]
+        sy, sx = slice(y0 - y, y1 - y), slice(x0 - x, x1 - x)
+        if self.inverse_alpha is None:
+            roi[:] = self.premultiplied[sy, sx]
+        else:
+            cv2.multiply(roi, self.inverse_alpha[sy, sx], dst=roi, scale=1.0 / 255.0)
+            cv2.add(roi, self.premultiplied[sy, sx], dst=roi)
+        return frame
+
+
+class TextSprite(Sprite):
+    """Anti-aliased text rendered once into a sprite."""
+
+    def __init__(self, text, font_scale, color, thickness, font=cv2.FONT_HERSHEY_SIMPLEX):
+        (text_width, text_height), baseline = cv2.getTextSize(text, font, font_scale, thickness)
+        pad = thickness + 1
+        # Text origin inside the sprite, matching cv2.putText's bottom-left origin
+        self.origin = (pad, pad + text_height)
+        self.advance = text_width
+
+        mask = np.zeros((text_height + baseline + 2 * pad, text_width + 2 * pad), dtype=np.uint8)
+        cv2.putText(mask, text, self.origin, font, font_scale, 255, thickness, cv2.LINE_AA)
+        bgra = np.empty(mask.shape + (4,), dtype=np.uint8)
+        bgra[:, :, :3] = color
+        bgra[:, :, 3] = mask
+        super().__init__(bgra)
+
+    def draw_at(self, frame, org):
+        """Draw with the text baseline origin at org, like cv2.putText."""
+        return self.draw(frame, org[0] - self.origin[0], org[1] - self.origin[1])
+
+
+class TextCache:
+    """LRU cache of rendered TextSprites keyed by text and style."""
+
+    def __init__(self, max_size=256, font=cv2.FONT_HERSHEY_SIMPLEX):
+        self.font = font
+        self.max_size = max_size
+        self._sprites = OrderedDict()
+
+    def sprite(self, text, font_scale, color, thickness):
+        """Return the cached sprite for this text and style, rendering it once."""
+        key = (text, font_scale, tuple(color), thickness)
+        sprite = self._sprites.get(key)
+        if sprite is None:
+            sprite = TextSprite(text, font_scale, color, thickness, self.font)
+            self._sprites[key] = sprite
+            if len(self._sprites) > self.max_size:
+                self._sprites.popitem(last=False)
+        else:
+            self._sprites.move_to_end(key)
+        return sprite
+
+    def draw(self, frame, text, org, font_scale, color, thickness, value=None):
+        """Draw cached static text at org, then any changing value right after it.
+
+        Only value (e.g. a formatted number) is rasterised with putText each call.
+        """
+        sprite = self.sprite(text, font_scale, color, thickness)
+        sprite.draw_at(frame, org)
+        if value is not None:
+            cv2.putText(frame, value, (org[0] + sprite.advance, org[1]), self.font,
+                        font_scale, color, thickness, cv2.LINE_AA)
+        return frame
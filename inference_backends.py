@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+Interchangeable inference backends for the hand classifier.
+
+    torch - ultralytics YOLO with PyTorch eager execution (the original path)
+    lean  - the same PyTorch network called directly, with preallocated buffers
+            and no per-frame ultralytics pre/post-processing
+    fused - lean, but loading a cached, pre-fused TorchScript copy of the weights,
+            so startup skips importing ultralytics and fusing the checkpoint
+    onnx  - the same weights exported once to ONNX and run with ONNX Runtime on CPU
+
+The ONNX file is cached next to the weights as <stem>.<hash>.<imgsz>.onnx, so
+it is only re-exported when the weights or the image size change.  An INT8
+copy made by quantize_model.py sits next to it as <stem>.<hash>.<imgsz>.int8.onnx
+and is loaded with quantized=True.  Both
+backends take BGR frames and return per-class probabilities as NumPy arrays.
+
+Run this file directly to compare the backends side by side:
+    python3 inference_backends.py --weights best_final.pt --images hand_cls/val
+"""
+import argparse
+import ast
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+BACKENDS = ('torch', 'lean', 'fused', 'onnx')
+
+
+def detect_device():
+    """Pick the fastest available torch device."""
+    import torch
+
+    if torch.backends.mps.is_available():
+        return 'mps'
+    if torch.cuda.is_available():
+        return 'cuda'
+    return 'cpu'
+
+
+def weights_hash(path, length=12):
+    """Short content hash of a weights file, used to key exported artefacts."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:length]
+
+
+def cached_export_path(weights, imgsz, suffix):
+    """Where the exported artefact for these weights and imgsz is cached."""
+    stem, _ = os.path.splitext(weights)
+    return f"{stem}.{weights_hash(weights)}.{imgsz}{suffix}"
+
+
+def export_onnx(weights, imgsz=224):
+    """Export weights to ONNX once and return the cached .onnx path."""
+    onnx_path = cached_export_path(weights, imgsz, '.onnx')
+    if os.path.exists(onnx_path):
+        return onnx_path
+
+    import onnx
+    from ultralytics import YOLO
+
+    print(f"Exporting {weights} to ONNX (imgsz={imgsz}, one-time)...")
+    # The exporter writes <stem>.onnx next to the weights it is given; export a
+    # copy in a scratch directory so a user's own <stem>.onnx is never touched
+    with tempfile.TemporaryDirectory() as scratch:
+        scratch_weights = os.path.join(scratch, os.path.basename(weights))
+        shutil.copy2(weights, scratch_weights)
+        # dynamic=True keeps the batch dimension free for batched callers
+        exported = YOLO(scratch_weights).export(format='onnx', imgsz=imgsz, dynamic=True, device='cpu')
+
+        # Re-save as one self-contained file; newer exporters put the weights in a
+        # separate .onnx.data file that would not survive a rename
+        model = onnx.load(exported)
+    # Newer exporters stamp the latest IR version even for old opsets, which
+    # older ONNX Runtime releases refuse to load; declare the oldest one that fits
+    model.ir_version = min(model.ir_version, onnx.helper.find_min_ir_version_for(list(model.opset_import)))
+    tmp_path = onnx_path + '.tmp'
+    onnx.save(model, tmp_path)
+    os.replace(tmp_path, onnx_path)
+    print(f"✓ Cached ONNX model: {onnx_path}")
+    return onnx_path
+
+
+def export_torchscript(weights, imgsz=224):
+    """Fuse and trace weights once and return the cached TorchScript path."""
+    script_path = cached_export_path(weights, imgsz, '.fused.torchscript')
+    if os.path.exists(script_path):
+        return script_path
+
+    import torch
+    from ultralytics import YOLO
+
+    print(f"Fusing and tracing {weights} (imgsz={imgsz}, one-time)...")
+    yolo = YOLO(weights)
+    net = yolo.model.float().fuse(verbose=False).eval()
+    with torch.no_grad():
+        traced = torch.jit.trace(net, torch.zeros(1, 3, imgsz, imgsz), strict=False)
+    names = json.dumps({str(k): v for k, v in yolo.names.items()})
+    tmp_path = script_path + '.tmp'
+    torch.jit.save(traced, tmp_path, _extra_files={'names.json': names})
+    os.replace(tmp_path, script_path)
+    print(f"✓ Cached fused model: {script_path}")
+    return script_path
+
+
+def quantized_model_path(weights, imgsz=224):
+    """Where quantize_model.py stores the INT8 ONNX model for these weights and imgsz."""
+    return cached_export_path(weights, imgsz, '.int8.onnx')
+
+
+def resize_input(frame, imgsz, dst=None):
+    """frame resized to imgsz x imgsz; a frame already at that size is used as it is."""
+    if frame.shape[0] == imgsz and frame.shape[1] == imgsz:
+        return frame
+    return cv2.resize(frame, (imgsz, imgsz), dst=dst)
+
+
+def to_input_tensor(frames, imgsz):
+    """Stack BGR frames into a float32 NCHW RGB batch scaled to 0-1."""
+    batch = np.empty((len(frames), 3, imgsz, imgsz), dtype=np.float32)
+    for i, frame in enumerate(frames):
+        rgb = cv2.cvtColor(resize_input(frame, imgsz), cv2.COLOR_BGR2RGB)
+        batch[i] = rgb.transpose(2, 0, 1)
+    batch *= 1.0 / 255.0
+    return batch
+
+
+class TorchBackend:
+    """ultralytics YOLO classifier running in PyTorch."""
+
+    name = 'torch'
+
+    def __init__(self, weights, imgsz=224, device=None):
+        from ultralytics import YOLO
+
+        self.model = YOLO(weights)
+        self.names = self.model.names
+        self.imgsz = imgsz
+        self.device = device or detect_device()
+
+    def predict_batch(self, frames):
+        """Return an (N, num_classes) probability array for a list of BGR frames."""
+        resized = [resize_input(frame, self.imgsz) for frame in frames]
+        results = self.model(resized, verbose=False, device=self.device, imgsz=self.imgsz)
+        return np.stack([r.probs.data.float().cpu().numpy() for r in results])
+
+    def predict(self, frame):
+        """Return the probability vector for a single BGR frame."""
+        return self.predict_batch([frame])[0]
+
+
+class LeanTorchBackend:
+    """The YOLO network called directly on reused, preallocated input buffers.
+
+    Each frame is resized straight into a persistent uint8 buffer, converted to
+    RGB into a second one and normalised into a persistent float tensor, so the
+    hot path does no per-frame allocations apart from the model's own output.
+    """
+
+    name = 'lean'
+
+    def __init__(self, weights, imgsz=224, device=None):
+        import torch
+
+        self.torch = torch
+        self.imgsz = imgsz
+        self.device = torch.device(device or detect_device())
+        self.net, self.names = self._load(weights)
+
+        self._resized = np.empty((imgsz, imgsz, 3), dtype=np.uint8)
+        self._rgb = np.empty((imgsz, imgsz, 3), dtype=np.uint8)
+        # CHW view onto the RGB buffer; no copy is made here
+        self._rgb_chw = torch.from_numpy(self._rgb).permute(2, 0, 1)
+        self._inputs = {}
+
+    def _load(self, weights):
+        """(fused eval-mode network on self.device, class names)."""
+        from ultralytics import YOLO
+
+        yolo = YOLO(weights)
+        return yolo.model.float().fuse(verbose=False).eval().to(self.device), yolo.names
+
+    def _input(self, batch_size):
+        """Persistent float input tensor for a given batch size."""
+        tensor = self._inputs.get(batch_size)
+        if tensor is None:
+            with self.torch.inference_mode():
+                tensor = self.torch.empty((batch_size, 3, self.imgsz, self.imgsz),
+                                          dtype=self.torch.float32, device=self.device)
+            self._inputs[batch_size] = tensor
+        return tensor
+
+    def predict_batch(self, frames):
+        """Return an (N, num_classes) probability array for a list of BGR frames."""
+        with self.torch.inference_mode():
+            batch = self._input(len(frames))
+            for i, frame in enumerate(frames):
+                cv2.cvtColor(resize_input(frame, self.imgsz, self._resized), cv2.COLOR_BGR2RGB, dst=self._rgb)
+                batch[i].copy_(self._rgb_chw)  # uint8 -> float32 in the copy
+            batch.mul_(1.0 / 255.0)
+            out = self.net(batch)
+            # Classify head returns (probabilities, logits) outside export mode
+            probs = out[0] if isinstance(out, (list, tuple)) else out
+            return probs.float().cpu().numpy()
+
+    def predict(self, frame):
+        """Return the probability vector for a single BGR frame."""
+        return self.predict_batch([frame])[0]
+
+
+class FusedTorchBackend(LeanTorchBackend):
+    """LeanTorchBackend over a cached TorchScript copy of the fused network.
+
+    The first run fuses and traces the checkpoint (see export_torchscript);
+    later runs only import torch and load the artefact.
+    """
+
+    name = 'fused'
+
+    def _load(self, weights):
+        script_path = weights if weights.endswith('.torchscript') else export_torchscript(weights, self.imgsz)
+        extra_files = {'names.json': ''}
+        net = self.torch.jit.load(script_path, map_location=self.device, _extra_files=extra_files)
+        names = {int(k): v for k, v in json.loads(extra_files['names.json']).items()}
+        return net.eval(), names
+
+
+class OnnxBackend:
+    """ONNX Runtime session on CPU over an exported copy of the weights."""
+
+    name = 'onnx'
+
+    def __init__(self, weights, imgsz=224, threads=0):
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            raise RuntimeError("The onnx backend needs ONNX Runtime: pip install onnx onnxruntime")
+
+        model_path = weights if weights.endswith('.onnx') else export_onnx(weights, imgsz)
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+        self.imgsz = imgsz
+        if model_path.endswith('.int8.onnx'):
+            self.name = 'onnx-int8'
+
+        # ultralytics stores the class names in the ONNX metadata as a dict literal
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        self.names = ast.literal_eval(metadata['names']) if 'names' in metadata else {}
+
+    def predict_batch(self, frames):
+        """Return an (N, num_classes) probability array for a list of BGR frames."""
+        batch = to_input_tensor(frames, self.imgsz)
+        return self.session.run(None, {self.input_name: batch})[0]
+
+    def predict(self, frame):
+        """Return the probability vector for a single BGR frame."""
+        return self.predict_batch([frame])[0]
+
+
+def load_backend(name, weights, imgsz=224, device=None, quantized=False, threads=0):
+    """Create the named backend for weights (quantized=True: the INT8 ONNX model, whatever name is).
+
+    threads only applies to ONNX Runtime (0 lets it decide); torch threads are process-wide.
+    """
+    if quantized:
+        model_path = quantized_model_path(weights, imgsz)
+        if not os.path.exists(model_path):
+            raise RuntimeError(f"No INT8 model for {weights} at imgsz {imgsz}; "
+                               f"create it with: python3 quantize_model.py --weights {weights} --imgsz {imgsz}")
+        return OnnxBackend(model_path, imgsz, threads)
+    if name == 'torch':
+        return TorchBackend(weights, imgsz, device)
+    if name == 'lean':
+        return LeanTorchBackend(weights, imgsz, device)
+    if name == 'fused':
+        return FusedTorchBackend(weights, imgsz, device)
+    if name == 'onnx':
+        return OnnxBackend(weights, imgsz, threads)
+    raise ValueError(f"Unknown backend {name!r}; choose from {', '.join(BACKENDS)}")
+
+
+def list_images(root):
+    """Return all image paths under root, sorted."""
+    image_extensions = ('.jpg', '.jpeg', '.png', '.JPG', '.JPEG', '.PNG')
+    paths = []
+    for dirpath, _, filenames in os.walk(root):
+        paths.extend(os.path.join(dirpath, f) for f in filenames if f.endswith(image_extensions))
+    return sorted(paths)
+
+
+def time_backend(backend, frames, warmup=5):
+    """Run one frame at a time and return (probabilities, per-frame latencies in ms)."""
+    for frame in frames[:warmup]:
+        backend.predict_batch([frame])
+
+    probs, latencies = [], []
+    for frame in frames:
+        start = time.perf_counter()
+        probs.append(backend.predict_batch([frame])[0])
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.stack(probs), np.array(latencies)
+
+
+def compare(weights, image_dir, imgsz=224, limit=None, backends=BACKENDS):
+    """Compare backends against torch; return True if all top-1 labels agree."""
+    paths = list_images(image_dir)[:limit]
+    if not paths:
+        print(f"Error: no images found in {image_dir}")
+        return False
+    frames = [cv2.imread(p) for p in paths]
+    print(f"Comparing backends on {len(frames)} images from {image_dir} (imgsz={imgsz})")
+
+    results = {}
+    for name in ('torch',) + tuple(b for b in backends if b != 'torch'):
+        backend = load_backend(name, weights, imgsz, device='cpu')
+        results[name] = time_backend(backend, frames)
+
+    print(f"\n{'backend':<8} {'mean ms':>8} {'p50 ms':>8} {'p95 ms':>8} {'fps':>8} {'speedup':>8}")
+    reference_probs, reference_latencies = results['torch']
+    for name, (_, latencies) in results.items():
+        print(f"{name:<8} {latencies.mean():8.2f} {np.percentile(latencies, 50):8.2f} "
+              f"{np.percentile(latencies, 95):8.2f} {1000 / latencies.mean():8.1f} "
+              f"{reference_latencies.mean() / latencies.mean():7.2f}x")
+
+    identical = True
+    for name, (probs, _) in results.items():
+        if name == 'torch':
+            continue
+        mismatches = np.flatnonzero(reference_probs.argmax(1) != probs.argmax(1))
+        print(f"\n{name} vs torch: max probability difference {np.abs(reference_probs - probs).max():.2e}")
+        if len(mismatches):
+            identical = False
+            print(f"✗ Top-1 labels differ on {len(mismatches)} images:")
+            for i in mismatches[:10]:
+                print(f"  {paths[i]}")
+        else:
+            print(f"✓ Identical top-1 labels on all {len(frames)} images")
+    return identical
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare inference backends for latency and output equivalence')
+    parser.add_argument('--weights', type=str, required=True, help='Path to trained weights (e.g., best_final.pt)')
+    parser.add_argument('--images', type=str, default='hand_cls/val', help='Directory of test images (default: hand_cls/val)')
+    parser.add_argument('--imgsz', type=int, default=224, help='Image size expected by the model (default: 224)')
+    parser.add_argument('--limit', type=int, default=None, help='Only use the first N images')
+    parser.add_argument('--backends', nargs='+', choices=BACKENDS, default=list(BACKENDS), help='Backends to compare against torch (default: all)')
+    args = parser.parse_args()
+    return 0 if compare(args.weights, args.images, args.imgsz, args.limit, tuple(args.backends)) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Client and load generator for inference_server.py.
+
+As a library:
+
+    from inference_client import InferenceClient
+    client = InferenceClient(port=8765)            # or InferenceClient(unix='/tmp/hand.sock')
+    status, result = client.predict(frame)         # BGR frame -> (200, {'label': 'hand', ...})
+
+As a load generator, --concurrency clients each send frames back to back
+over keep-alive connections for --duration seconds (or --requests in total),
+then throughput, latency percentiles, shed requests (503) and the batch
+sizes the server formed are reported:
+
+    python3 inference_client.py --port 8765 --images hand_cls/val --concurrency 8 --duration 20
+    python3 inference_client.py --unix /tmp/hand.sock --concurrency 32 --raw
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from inference_backends import list_images
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTPConnection over a Unix domain socket."""
+
+    def __init__(self, path, timeout=10.0):
+        super().__init__('localhost', timeout=timeout)
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.path)
+
+
+class InferenceClient:
+    """Keep-alive connection to an inference server; not thread-safe, use one per thread."""
+
+    def __init__(self, host='127.0.0.1', port=8765, unix=None, timeout=10.0):
+        self.host, self.port, self.unix, self.timeout = host, port, unix, timeout
+        self.conn = None
+
+    def _connect(self):
+        if self.unix:
+            return UnixHTTPConnection(self.unix, self.timeout)
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def request(self, method, path, body=None, headers=None):
+        """(status, decoded JSON) for one request, reconnecting once if the connection dropped."""
+        for attempt in range(2):
+            if self.conn is None:
+                self.conn = self._connect()
+            try:
+                self.conn.request(method, path, body=body, headers=headers or {})
+                response = self.conn.getresponse()
+                return response.status, json.loads(response.read() or b'{}')
+            except (ConnectionError, http.client.HTTPException):
+                self.conn.close()
+                self.conn = None
+                if attempt:
+                    raise
+
+    def predict(self, frame, raw=False, quality=90):
+        """Classify a BGR frame; raw=True sends pixels instead of a JPEG."""
+        if raw:
+            frame = np.ascontiguousarray(frame)
+            height, width = frame.shape[:2]
+            return self.predict_bytes(frame.tobytes(), 'application/octet-stream', f"{height}x{width}x3")
+        ok, encoded = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        return self.predict_bytes(encoded.tobytes())
+
+    def predict_bytes(self, body, content_type='image/jpeg', shape=None):
+        headers = {'Content-Type': content_type}
+        if shape:
+            headers['X-Shape'] = shape
+        return self.request('POST', '/predict', body, headers)
+
+    def stats(self):
+        return self.request('GET', '/stats')[1]
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+def load_bodies(image_dir, count, raw, size=(640, 480)):
+    """Request bodies (and X-Shape headers) for up to count images, encoded once up front."""
+    bodies = []
+    for path in list_images(image_dir)[:count]:
+        frame = cv2.imread(path)
+        if frame is None:
+            continue
+        frame = cv2.resize(frame, size)
+        if raw:
+            bodies.append((frame.tobytes(), 'application/octet-stream', f"{size[1]}x{size[0]}x3"))
+        else:
+            bodies.append((cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes(),
+                           'image/jpeg', None))
+    return bodies
+
+
+def run_load(make_client, bodies, concurrency=8, duration=10.0, total=None):
+    """Closed-loop load: each thread sends its next request as soon as the last one returns."""
+    results = []  # (status, latency ms, batch size, queue ms)
+    lock = threading.Lock()
+    sent = [0]
+    deadline = time.perf_counter() + duration
+
+    def worker(offset):
+        client = make_client()
+        i = offset
+        try:
+            while time.perf_counter() < deadline:
+                with lock:
+                    if total is not None and sent[0] >= total:
+                        break
+                    sent[0] += 1
+                body, content_type, shape = bodies[i % len(bodies)]
+                i += 1
+                start = time.perf_counter()
+                try:
+                    status, result = client.predict_bytes(body, content_type, shape)
+                except (OSError, http.client.HTTPException):
+                    status, result = 0, {}
+                latency = (time.perf_counter() - start) * 1000
+                with lock:
+                    results.append((status, latency, result.get('batch', 0), result.get('queue_ms', 0.0)))
+                if status == 503:
+                    # Shed: back off briefly instead of hammering an overloaded server
+                    time.sleep(0.1)
+        finally:
+            client.close()
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(n,), daemon=True) for n in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - start
+
+
+def print_report(results, elapsed, concurrency, server_stats=None):
+    statuses = np.array([r[0] for r in results])
+    ok = statuses == 200
+    latencies = np.array([r[1] for r in results])[ok]
+    print(f"\n📊 {len(results)} requests from {concurrency} clients in {elapsed:.1f}s")
+    print(f"  ok {int(ok.sum())}, shed (503) {int((statuses == 503).sum())}, "
+          f"failed {int((~ok & (statuses != 503)).sum())}")
+    if ok.any():
+        print(f"  throughput: {ok.sum() / elapsed:.1f} predictions/sec")
+        print(f"  latency ms: p50 {np.percentile(latencies, 50):.1f}  p90 {np.percentile(latencies, 90):.1f}  "
+              f"p99 {np.percentile(latencies, 99):.1f}  max {latencies.max():.1f}")
+        batches = np.array([r[2] for r in results])[ok]
+        queue_ms = np.array([r[3] for r in results])[ok]
+        print(f"  server batches: mean {batches.mean():.1f}, max {batches.max()}; "
+              f"mean wait before the model {queue_ms.mean():.1f} ms")
+    if server_stats:
+        print(f"  server totals: {server_stats['predictions']} predictions in {server_stats['batches']} batches, "
+              f"{server_stats['shed']} shed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load generator for inference_server.py')
+    parser.add_argument('--host', default='127.0.0.1', help='Server address (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8765, help='Server port (default: 8765)')
+    parser.add_argument('--unix', default=None, help='Connect to this Unix socket instead of TCP')
+    parser.add_argument('--images', default='hand_cls/val', help='Images to send (default: hand_cls/val)')
+    parser.add_argument('--limit', type=int, default=64, help='Distinct images to cycle through (default: 64)')
+    parser.add_argument('--raw', action='store_true', help='Send raw 640x480 BGR pixels instead of JPEG')
+    parser.add_argument('--concurrency', type=int, default=8, help='Parallel clients (default: 8)')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds to run (default: 10)')
+    parser.add_argument('--requests', type=int, default=None, help='Stop after this many requests in total')
+    parser.add_argument('--output', default=None, help='Also write the per-request results as JSON')
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.images):
+        print(f"Error: {args.images} not found")
+        return 1
+    bodies = load_bodies(args.images, args.limit, args.raw)
+    if not bodies:
+        print(f"Error: no images found in {args.images}")
+        return 1
+
+    def make_client():
+        return InferenceClient(args.host, args.port, args.unix)
+
+    probe = make_client()
+    try:
+        probe.request('GET', '/health')
+    except OSError as e:
+        print(f"Error: no server at {args.unix or f'{args.host}:{args.port}'} ({e})")
+        return 1
+
+    print(f"Sending {len(bodies)} {'raw' if args.raw else 'JPEG'} frames from {args.images} "
+          f"with {args.concurrency} clients...")
+    results, elapsed = run_load(make_client, bodies, args.concurrency, args.duration, args.requests)
+    print_report(results, elapsed, args.concurrency, probe.stats())
+    probe.close()
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump([{'status': s, 'latency_ms': l, 'batch': b, 'queue_ms': q} for s, l, b, q in results], f)
+        print(f"\n✓ Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
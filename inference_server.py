@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Local inference service for the hand classifier.
+
+Other processes on the same machine (a signage player, a logging daemon) POST
+frames and get class probabilities back as JSON:
+
+    POST /predict   body: a JPEG/PNG image, or raw BGR pixels with
+                    Content-Type: application/octet-stream and X-Shape: HxWx3
+    GET  /health    {"status": "ok", ...}
+    GET  /stats     request, batch and queue counters
+
+Requests are handled with asyncio.  Decoded frames go onto a bounded queue; a
+single batcher takes the first waiting frame, keeps collecting for up to
+--max-wait-ms (or until --max-batch frames) and runs them through the model in
+one call, so concurrent clients share each model call.  When the queue is full
+the request is refused at once with 503 and Retry-After rather than queueing
+without bound, so latency stays bounded under overload.
+
+    python3 inference_server.py --weights best_final.pt --port 8765
+    python3 inference_server.py --weights best_final.pt --unix /tmp/hand.sock --quantized
+    curl --data-binary @frame.jpg -H 'Content-Type: image/jpeg' http://127.0.0.1:8765/predict
+
+inference_client.py is a matching client and load generator.
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from hand_classifier import HandClassifier
+from inference_backends import BACKENDS
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large', 503: 'Service Unavailable'}
+MAX_BODY = 32 << 20
+
+
+class BadRequest(Exception):
+    pass
+
+
+def decode_frame(body, content_type, shape):
+    """BGR frame from an encoded image body, or from raw pixels with an X-Shape header."""
+    if content_type == 'application/octet-stream':
+        try:
+            dims = tuple(int(d) for d in shape.lower().split('x'))
+        except (AttributeError, ValueError):
+            raise BadRequest("raw frames need an X-Shape: HxWx3 header")
+        if len(dims) != 3 or dims[2] != 3 or min(dims) <= 0 or np.prod(dims) != len(body):
+            raise BadRequest(f"X-Shape {shape} does not match a {len(body)}-byte BGR body")
+        return np.frombuffer(body, dtype=np.uint8).reshape(dims)
+    frame = cv2.imdecode(np.frombuffer(body, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if frame is None:
+        raise BadRequest("body is not a decodable image")
+    return frame
+
+
+class InferenceServer:
+    """asyncio HTTP front end with a bounded queue and a dynamic batcher in front of one model."""
+
+    def __init__(self, model, max_batch=16, max_wait_ms=5.0, queue_size=64):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.queue = None
+        self.queue_size = queue_size
+        # One thread runs the model, so batches never compete with each other for the CPU
+        self.model_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix='model')
+        self.stats = {'requests': 0, 'predictions': 0, 'shed': 0, 'errors': 0, 'batches': 0}
+        self.started = time.time()
+        self.connections = set()
+
+    async def batcher(self):
+        """Collect queued frames into batches and run each batch in one model call."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # Requests cancelled while queued (e.g. at shutdown) are dropped from the batch
+            batch = [item for item in batch if not item[1].done()]
+            if not batch:
+                continue
+            start = time.perf_counter()
+            try:
+                probs = await loop.run_in_executor(self.model_thread, self.model.predict_batch,
+                                                   [frame for frame, _, _ in batch])
+            except Exception:
+                # One bad frame must not fail the requests batched with it; retry each on its own
+                await self.predict_each(batch)
+                continue
+            infer_ms = (time.perf_counter() - start) * 1000
+            self.stats['batches'] += 1
+            self.stats['predictions'] += len(batch)
+            for (_, future, queued_at), p in zip(batch, probs):
+                if not future.done():
+                    future.set_result((p, len(batch), (start - queued_at) * 1000, infer_ms))
+
+    async def predict_each(self, batch):
+        """Run a failed batch one frame per model call, so only the bad frames get the error."""
+        loop = asyncio.get_running_loop()
+        for frame, future, queued_at in batch:
+            if future.done():
+                continue
+            start = time.perf_counter()
+            try:
+                probs = await loop.run_in_executor(self.model_thread, self.model.predict_batch, [frame])
+            except Exception as e:
+                future.set_exception(e)
+                continue
+            self.stats['batches'] += 1
+            self.stats['predictions'] += 1
+            if not future.done():
+                future.set_result((probs[0], 1, (start - queued_at) * 1000, (time.perf_counter() - start) * 1000))
+
+    async def predict(self, frame):
+        """Queue one frame; returns (probs, batch size, queue ms, inference ms). Raises QueueFull when shedding."""
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((frame, future, time.perf_counter()))
+        return await future
+
+    def result(self, probs, batch_size, queue_ms, infer_ms):
+        top = int(probs.argmax())
+        return {
+            'label': self.model.labels[top],
+            'confidence': round(float(probs[top]), 4),
+            'probs': {name: round(float(p), 4) for name, p in zip(self.model.labels, probs)},
+            'batch': batch_size,
+            'queue_ms': round(queue_ms, 2),
+            'inference_ms': round(infer_ms, 2),
+        }
+
+    async def route(self, method, path, headers, body):
+        """(status, JSON payload, extra headers) for one request."""
+        if path == '/health':
+            return 200, {'status': 'ok', 'backend': self.model.name, 'classes': self.model.labels}, {}
+        if path == '/stats':
+            batches = self.stats['batches']
+            return 200, dict(self.stats, queue_depth=self.queue.qsize(), queue_size=self.queue_size,
+                             mean_batch=round(self.stats['predictions'] / batches, 2) if batches else 0.0,
+                             uptime_s=round(time.time() - self.started, 1)), {}
+        if path != '/predict':
+            return 404, {'error': f"no route {path}"}, {}
+        if method != 'POST':
+            return 405, {'error': "use POST"}, {'Allow': 'POST'}
+
+        # Refuse before decoding: a full queue means the model is already behind
+        if self.queue.full():
+            self.stats['shed'] += 1
+            return 503, {'error': "overloaded, try again"}, {'Retry-After': '1'}
+        try:
+            frame = await asyncio.get_running_loop().run_in_executor(
+                None, decode_frame, body, headers.get('content-type', '').split(';')[0].strip(),
+                headers.get('x-shape'))
+            return 200, self.result(*await self.predict(frame)), {}
+        except BadRequest as e:
+            return 400, {'error': str(e)}, {}
+        except asyncio.QueueFull:
+            self.stats['shed'] += 1
+            return 503, {'error': "overloaded, try again"}, {'Retry-After': '1'}
+
+    async def handle(self, reader, writer):
+        """Serve HTTP/1.1 requests on one (keep-alive) connection."""
+        self.connections.add(writer)
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                lines = head.decode('latin-1').split('\r\n')
+                try:
+                    method, target, version = lines[0].split(' ', 2)
+                except ValueError:
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    key, sep, value = line.partition(':')
+                    if sep:
+                        headers[key.strip().lower()] = value.strip()
+
+                self.stats['requests'] += 1
+                try:
+                    length = int(headers.get('content-length', 0) or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    # Without a usable length the next request on this connection cannot be found
+                    status, payload, extra = 400, {'error': "invalid Content-Length"}, {'Connection': 'close'}
+                elif length > MAX_BODY:
+                    status, payload, extra = 413, {'error': f"body over {MAX_BODY} bytes"}, {'Connection': 'close'}
+                else:
+                    body = await reader.readexactly(length) if length else b''
+                    try:
+                        status, payload, extra = await self.route(method, target.split('?')[0], headers, body)
+                    except Exception as e:
+                        status, payload, extra = 500, {'error': repr(e)}, {}
+                if status >= 500 and status != 503:
+                    self.stats['errors'] += 1
+
+                keep_alive = (headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+                              and extra.get('Connection') != 'close')
+                data = json.dumps(payload).encode()
+                response = [f"HTTP/1.1 {status} {REASONS.get(status, 'Internal Server Error')}",
+                            'Content-Type: application/json', f"Content-Length: {len(data)}",
+                            f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+                response += [f"{key}: {value}" for key, value in extra.items() if key != 'Connection']
+                writer.write(('\r\n'.join(response) + '\r\n\r\n').encode() + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            # CancelledError: the server is shutting down while this connection was idle
+            pass
+        finally:
+            self.connections.discard(writer)
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=8765, unix=None):
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        batcher = asyncio.create_task(self.batcher())
+        if unix:
+            if os.path.exists(unix):
+                os.remove(unix)
+            server = await asyncio.start_unix_server(self.handle, path=unix)
+            where = f"unix:{unix}"
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+            where = f"http://{host}:{port}"
+        print(f"✓ Serving {self.model.name} model on {where} "
+              f"(batches of up to {self.max_batch} within {self.max_wait * 1000:.0f} ms, queue {self.queue_size})")
+        # Stop cleanly on Ctrl+C or SIGTERM (e.g. from a service manager)
+        stopping = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stopping.set)
+            except (NotImplementedError, RuntimeError):  # Windows: Ctrl+C still raises KeyboardInterrupt
+                pass
+        try:
+            async with server:
+                await stopping.wait()
+                # Idle keep-alive connections would otherwise be cancelled mid-read at loop teardown
+                for writer in list(self.connections):
+                    writer.close()
+        finally:
+            batcher.cancel()
+            self.model_thread.shutdown(wait=False)
+            if unix and os.path.exists(unix):
+                os.remove(unix)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local hand classifier service with dynamic request batching')
+    parser.add_argument('--weights', type=str, required=True, help='Path to trained weights')
+    parser.add_argument('--imgsz', type=int, default=224, help='Image size expected by the model (default: 224)')
+    parser.add_argument('--backend', choices=BACKENDS, default='lean', help='Inference backend (default: lean)')
+    parser.add_argument('--quantized', action='store_true', help='Use the INT8 model made by quantize_model.py (overrides --backend)')
+    parser.add_argument('--threads', type=int, default=None, help='CPU threads for the model (default: library default)')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8765, help='TCP port (default: 8765)')
+    parser.add_argument('--unix', default=None, help='Listen on this Unix socket path instead of TCP')
+    parser.add_argument('--max-batch', type=int, default=16, help='Most frames per model call (default: 16)')
+    parser.add_argument('--max-wait-ms', type=float, default=5.0, help='How long the first queued frame waits for others to batch with (default: 5)')
+    parser.add_argument('--queue-size', type=int, default=64, help='Queued frames before new requests get 503 (default: 64)')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.weights):
+        print(f"Error: {args.weights} not found")
+        return 1
+    model = HandClassifier(args.weights, args.imgsz, args.backend, quantized=args.quantized, threads=args.threads,
+                           warmup=True)
+    server = InferenceServer(model, args.max_batch, args.max_wait_ms, args.queue_size)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    print(f"\n📊 {server.stats['predictions']} predictions in {server.stats['batches']} batches, "
+          f"{server.stats['shed']} requests shed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
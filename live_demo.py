@@ -5,142 +5,387 @@ Live webcam demo for the Halloween hand classifier.
 This script loads a trained YOLOv8 classifier and opens the default webcam.  For
 each frame, it predicts the class label.  If the hand is detected, a spooky
 message is overlaid on the frame.  Press `q` to quit.
+
+--source reads from a video file, image directory or stream URL instead, and
+--headless skips the window entirely and prints predictions as JSON lines.
+
+With --threaded, capture, inference and display run as separate stages that
+each keep only the newest frame, so the display is never held up by the model
+and old frames never pile up in the camera buffer.
+
+--quantized runs the INT8 model produced by quantize_model.py, which is much
+faster on low-end CPUs.
+
+--fast-start shortens the wait for the first frame: torch and ultralytics are
+only imported when needed, the torch backends load a cached pre-fused
+TorchScript artefact instead of the checkpoint, the camera opens on a
+background thread while the model loads, and the model is warmed up so the
+first prediction runs at steady-state speed.  The time from launch to the
+first frame is printed either way.
 """
+import time
+
+LAUNCHED = time.perf_counter()  # start of the time-to-first-frame report
+
 import argparse
 import cv2
+import json
 import numpy as np
 import os
-import torch
-from ultralytics import YOLO
+import sys
+from contextlib import contextmanager, nullcontext
+
+from frame_pipeline import InferenceWorker, LatestFrameGrabber, RateMeter
+from frame_sources import describe_source, open_source
+from hud import Sprite, TextCache
+from hand_classifier import HandClassifier
+from inference_backends import BACKENDS
+from metrics import Metrics, StartupTimer
+from motion_gate import MotionGate, MotionGatedPredictor
+
+# Rendered HUD text, shared across frames
+TEXT_CACHE = TextCache()
 
 
 def load_overlay_image(path: str, width: int, height: int):
-    """Load and resize an overlay image with transparency."""
+    """Load, resize and pre-blend an overlay image with transparency."""
     if os.path.exists(path):
         overlay = cv2.imread(path, cv2.IMREAD_UNCHANGED)
         if overlay is not None:
-            return cv2.resize(overlay, (width, height))
+            return Sprite(cv2.resize(overlay, (width, height)))
     return None
 
 
 def apply_overlay(frame, overlay, x, y):
-    """Apply an overlay image with transparency to a frame."""
+    """Apply a pre-blended overlay sprite to a frame in place."""
     if overlay is None:
         return frame
-    
-    h, w = overlay.shape[:2]
-    if y + h > frame.shape[0] or x + w > frame.shape[1]:
-        return frame
-    
-    if overlay.shape[2] == 4:  # Has alpha channel
-        alpha = overlay[:, :, 3] / 255.0
-        for c in range(3):
-            frame[y:y+h, x:x+w, c] = (1 - alpha) * frame[y:y+h, x:x+w, c] + alpha * overlay[:, :, c]
-    else:
-        frame[y:y+h, x:x+w] = overlay[:, :, :3]
-    
+    return overlay.draw(frame, x, y)
+
+
+def load_model(backend, weights, imgsz, quantized, fast_start, startup):
+    """Load the HandClassifier (and with fast_start, warm it up), timing both."""
+    with startup.phase('model load'):
+        if fast_start and backend in ('torch', 'lean'):
+            backend = 'fused'
+        model = HandClassifier(weights, imgsz, backend, quantized=quantized)
+    if fast_start:
+        with startup.phase('warm-up'):
+            latencies = model.warm_up()
+        print(f"Warm-up: {len(latencies)} runs, {latencies[0]:.0f} ms -> {latencies[-1]:.0f} ms")
+    return model
+
+
+def draw_detection(frame, label, probs, ghost_overlay=None):
+    """Overlay the detection message for one prediction onto frame."""
+    # Overlay message if hand is detected
+    if label == 'hand':
+        confidence = max(probs) * 100
+
+        # Determine color based on confidence threshold
+        if confidence >= 95.0:
+            # High confidence (85-100%) - RED
+            text_color = (0, 0, 255)  # Red
+            confidence_color = (0, 0, 255)  # Red
+            detection_text = 'HIGH CONFIDENCE HAND!'
+
+            # Apply ghost overlay if available for high confidence
+            if ghost_overlay is not None:
+                x = frame.shape[1] - 200
+                y = 50
+                frame = apply_overlay(frame, ghost_overlay, x, y)
+        else:
+            # Low confidence (0-84%) - GREEN
+            text_color = (0, 255, 0)  # Green
+            confidence_color = (0, 255, 0)  # Green
+            detection_text = 'Hand detected'
+
+        # Display detection text (rendered once, then reused)
+        TEXT_CACHE.draw(frame, detection_text, (50, 50), 1.0, text_color, 2)
+
+        # Always show confidence score with matching color; only the number is redrawn
+        TEXT_CACHE.draw(frame, 'Confidence: ', (50, 90), 0.7, confidence_color, 2,
+                        value=f'{confidence:.1f}%')
     return frame
 
 
-def main(weights: str, imgsz: int = 224, use_overlay: bool = True, perfect_threshold: float = 99.9) -> None:
-    # Detect device
-    if torch.backends.mps.is_available():
-        device = 'mps'
-        print("Using Apple Silicon GPU (MPS)")
-    elif torch.cuda.is_available():
-        device = 'cuda'
-        print("Using NVIDIA GPU (CUDA)")
-        print(f"GPU: {torch.cuda.get_device_name(0)}")
-    else:
-        device = 'cpu'
-        print("Using CPU")
-        print("Note: On Windows, install CUDA for GPU acceleration with NVIDIA cards")
-    
-    # Load trained model
-    model = YOLO(weights)
-    
-    # Try to load overlay images
-    ghost_overlay = None
-    if use_overlay:
-        ghost_overlay = load_overlay_image('assets/ghost.png', 150, 150)
-        if ghost_overlay is None:
-            print("Warning: Could not load overlay image. Using text only.")
-
-    # Open webcam (0 is usually the default camera)
-    cap = cv2.VideoCapture(0)
-    if not cap.isOpened():
-        raise RuntimeError("Could not open webcam. Check your camera connection.")
-
-    print("Press 'q' to quit.")
+@contextmanager
+def status_to_stderr(enabled=True):
+    """While enabled, print() goes to stderr so stdout only carries predictions; yields the real stdout."""
+    real_stdout = sys.stdout
+    if enabled:
+        sys.stdout = sys.stderr
+    try:
+        yield real_stdout
+    finally:
+        sys.stdout = real_stdout
+
+
+def handle_key(key, metrics):
+    """Handle a key press; returns True if the demo should quit."""
+    if key == ord('m'):
+        metrics.toggle_hud()
+    return key == ord('q')
+
+
+def run_sequential(cap, predict_fn, ghost_overlay, gate=None, metrics=None, report_every: float = 5.0):
+    """Original loop: read, infer and display each frame in turn."""
+    metrics = metrics or Metrics()
+    last_report = time.perf_counter()
     while True:
-        ret, frame = cap.read()
+        with metrics.stage('capture'):
+            ret, frame = cap.read()
         if not ret:
             break
 
-        # Resize frame to the model's expected image size
-        resized = cv2.resize(frame, (imgsz, imgsz))
-
-        # Run inference with specified device
-        results = model(resized, verbose=False, device=device)[0]
-        # Find the class with the highest probability
-        probs = results.probs.data.tolist()
-        names = results.names
-        top_idx = probs.index(max(probs))
-        label = names[top_idx]
-
-        # Overlay message if hand is detected
-        if label == 'hand':
-            confidence = max(probs) * 100
-            
-            # Determine color based on confidence threshold
-            if confidence >= 95.0:
-                # High confidence (85-100%) - RED
-                text_color = (0, 0, 255)  # Red
-                confidence_color = (0, 0, 255)  # Red
-                detection_text = 'HIGH CONFIDENCE HAND!'
-                
-                # Apply ghost overlay if available for high confidence
-                if ghost_overlay is not None:
-                    x = frame.shape[1] - 200
-                    y = 50
-                    frame = apply_overlay(frame, ghost_overlay, x, y)
-            else:
-                # Low confidence (0-84%) - GREEN
-                text_color = (0, 255, 0)  # Green
-                confidence_color = (0, 255, 0)  # Green
-                detection_text = 'Hand detected'
-            
-            # Display detection text
-            cv2.putText(
-                frame,
-                detection_text,
-                (50, 50),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                1.0,
-                text_color,
-                2,
-                cv2.LINE_AA,
-            )
-            
-            # Always show confidence score with matching color
-            cv2.putText(
-                frame,
-                f'Confidence: {confidence:.1f}%',
-                (50, 90),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                0.7,
-                confidence_color,
-                2,
-                cv2.LINE_AA,
-            )
+        with metrics.stage('inference'):
+            label, probs = predict_fn(frame)
+        with metrics.stage('render'):
+            frame = draw_detection(frame, label, probs, ghost_overlay)
+            if metrics.show_hud:
+                metrics.draw_hud(frame)
 
         # Display the resulting frame
-        cv2.imshow('Halloween Hand Demo', frame)
-        if cv2.waitKey(1) & 0xFF == ord('q'):
+        with metrics.stage('display'):
+            cv2.imshow('Halloween Hand Demo', frame)
+            key = cv2.waitKey(1) & 0xFF
+        metrics.frame_done()
+        if handle_key(key, metrics):
             break
 
-    cap.release()
-    cv2.destroyAllWindows()
+        if gate is not None and time.perf_counter() - last_report >= report_every:
+            last_report = time.perf_counter()
+            print(gate.summary())
+
+
+def run_threaded(cap, predict_fn, ghost_overlay, gate=None, metrics=None, report_every: float = 5.0):
+    """Pipelined loop: capture and inference threads feed the display loop.
+
+    The display always shows the newest camera frame annotated with the most
+    recent finished prediction, so latency is bounded by one inference.
+    """
+    # Keep the driver from buffering stale frames (ignored by some backends)
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+    metrics = metrics or Metrics()
+    grabber = LatestFrameGrabber(cap, metrics=metrics)
+    worker = InferenceWorker(grabber, predict_fn, metrics=metrics)
+    display_meter = RateMeter()
+    grabber.start()
+    worker.start()
+
+    frame_seq = 0
+    last_report = time.perf_counter()
+    latency_ms = 0.0
+    try:
+        while True:
+            frame_seq, item = grabber.frames.get(frame_seq, timeout=1.0)
+            if item is None:
+                if grabber.failed or worker.error is not None:
+                    break
+                continue
+            _, frame = item
+            # The grabber hands out its own buffer; draw on a copy
+            frame = frame.copy()
+
+            with metrics.stage('render'):
+                _, result = worker.results.peek()
+                if result is not None:
+                    captured_at, _, (label, probs), _ = result
+                    latency_ms = (time.perf_counter() - captured_at) * 1000
+                    frame = draw_detection(frame, label, probs, ghost_overlay)
+
+                cv2.putText(
+                    frame,
+                    f'cap {grabber.meter.rate():.0f} | inf {worker.meter.rate():.0f} | '
+                    f'disp {display_meter.rate():.0f} fps | {latency_ms:.0f} ms',
+                    (10, frame.shape[0] - 15),
+                    cv2.FONT_HERSHEY_SIMPLEX,
+                    0.5,
+                    (255, 255, 255),
+                    1,
+                    cv2.LINE_AA,
+                )
+                if metrics.show_hud:
+                    metrics.draw_hud(frame)
+
+            with metrics.stage('display'):
+                cv2.imshow('Halloween Hand Demo', frame)
+                key = cv2.waitKey(1) & 0xFF
+            display_meter.tick()
+            metrics.frame_done()
+            if handle_key(key, metrics):
+                break
+
+            now = time.perf_counter()
+            if now - last_report >= report_every:
+                last_report = now
+                print(f"capture {grabber.meter.rate():.1f} fps | "
+                      f"inference {worker.meter.rate():.1f} fps | "
+                      f"display {display_meter.rate():.1f} fps | "
+                      f"latency {latency_ms:.0f} ms")
+                if gate is not None:
+                    print(gate.summary())
+    finally:
+        worker.stop()
+        grabber.stop()
+        worker.join(timeout=2.0)
+        grabber.join(timeout=2.0)
+
+    if worker.error is not None:
+        raise worker.error
+
+    print(f"\nCaptured {grabber.meter.count} frames, inferred {worker.meter.count}, "
+          f"displayed {display_meter.count}, dropped {grabber.dropped} stale frames")
+
+
+def emit_prediction(out, index, label, probs, names):
+    """Write one prediction as a JSON line."""
+    record = {
+        'frame': index,
+        'time': round(time.time(), 3),
+        'label': label,
+        'confidence': round(float(max(probs)), 4),
+        'probs': {names[i]: round(float(p), 4) for i, p in enumerate(probs)},
+    }
+    out.write(json.dumps(record) + '\n')
+
+
+def run_headless(cap, predict_fn, names, out=sys.stdout, threaded=False, gate=None, metrics=None,
+                 report_every: float = 5.0):
+    """No GUI at all: classify frames and emit one JSON line per prediction.
+
+    Status reports go to stderr so stdout stays clean JSONL.  Stops at the end
+    of the source or on Ctrl+C.
+    """
+    metrics = metrics or Metrics()
+    meter = RateMeter()
+    last_report = time.perf_counter()
+
+    def report():
+        out.flush()
+        print(f"{meter.count} predictions | {meter.rate():.1f} fps", file=sys.stderr)
+        if gate is not None:
+            print(gate.summary(), file=sys.stderr)
+
+    if threaded:
+        # Capture keeps draining the source; predictions are emitted as they finish
+        grabber = LatestFrameGrabber(cap, metrics=metrics)
+        worker = InferenceWorker(grabber, predict_fn, metrics=metrics)
+        grabber.start()
+        worker.start()
+        seq = 0
+        try:
+            while True:
+                seq, result = worker.results.get(seq, timeout=1.0)
+                if result is None:
+                    if not worker.is_alive():
+                        break
+                    continue
+                _, _, (label, probs), _ = result
+                emit_prediction(out, meter.count, label, probs, names)
+                meter.tick()
+                metrics.frame_done()
+                if time.perf_counter() - last_report >= report_every:
+                    last_report = time.perf_counter()
+                    report()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            worker.stop()
+            grabber.stop()
+            worker.join(timeout=2.0)
+            grabber.join(timeout=2.0)
+        if worker.error is not None:
+            raise worker.error
+    else:
+        try:
+            while True:
+                with metrics.stage('capture'):
+                    ret, frame = cap.read()
+                if not ret:
+                    break
+                with metrics.stage('inference'):
+                    label, probs = predict_fn(frame)
+                emit_prediction(out, meter.count, label, probs, names)
+                meter.tick()
+                metrics.frame_done()
+                if time.perf_counter() - last_report >= report_every:
+                    last_report = time.perf_counter()
+                    report()
+        except KeyboardInterrupt:
+            pass
+    report()
+
+
+def main(weights: str, imgsz: int = 224, use_overlay: bool = True, perfect_threshold: float = 99.9,
+         threaded: bool = False, backend: str = 'torch', motion_gate: bool = False,
+         motion_threshold: float = 0.02, max_age: float = 1.0, metrics_file: str = None,
+         metrics_port: int = None, metrics_interval: float = 10.0, source: str = '0',
+         headless: bool = False, output: str = None, loop: bool = False, quantized: bool = False,
+         fast_start: bool = False) -> None:
+    startup = StartupTimer(LAUNCHED)
+    startup.mark('imports')
+    # stdout may carry the predictions, so status messages go to stderr (restored on any exit)
+    with status_to_stderr(headless) as real_stdout:
+        # Opening a webcam can take a second or more; with --fast-start it overlaps the model load
+        opener = startup.in_background('camera open', open_source, source, loop=loop) if fast_start else None
+
+        # Load trained model with the requested inference backend
+        model = load_model(backend, weights, imgsz, quantized, fast_start, startup)
+        print(f"Inference backend: {model.name}")
+
+        # Try to load overlay images
+        ghost_overlay = None
+        if use_overlay and not headless:
+            ghost_overlay = load_overlay_image('assets/ghost.png', 150, 150)
+            if ghost_overlay is None:
+                print("Warning: Could not load overlay image. Using text only.")
+
+        # Open the frame source (webcam 0 is usually the default camera)
+        if opener is not None:
+            cap = opener.result()
+        else:
+            with startup.phase('camera open'):
+                cap = open_source(source, loop=loop)
+        print(f"Reading from {describe_source(source)}")
+
+        predict_fn = model.predict
+        gate = None
+        if motion_gate:
+            # Reuse the previous prediction while the scene is static
+            gate = MotionGate(threshold=motion_threshold, max_age=max_age)
+            predict_fn = MotionGatedPredictor(predict_fn, gate)
+            print(f"Motion gate on: re-infer when >{motion_threshold * 100:.1f}% of pixels change "
+                  f"or every {max_age:.1f}s")
+
+        # Per-stage timing; disabled (no overhead) unless exported or shown with 'm'
+        metrics = Metrics(jsonl_path=metrics_file, port=metrics_port, flush_interval=metrics_interval)
+        metrics.startup = startup
+
+        if headless:
+            # No window, no drawing: only predictions, as JSON lines
+            try:
+                with open(output, 'w') if output else nullcontext(real_stdout) as out:
+                    run_headless(cap, predict_fn, model.names, out, threaded, gate, metrics)
+            finally:
+                cap.release()
+                metrics.close()
+            return
+
+        print("Press 'q' to quit, 'm' to toggle the timing HUD.")
+        try:
+            if threaded:
+                print("Threaded pipeline: capture, inference and display run independently")
+                run_threaded(cap, predict_fn, ghost_overlay, gate, metrics)
+            else:
+                run_sequential(cap, predict_fn, ghost_overlay, gate, metrics)
+        finally:
+            cap.release()
+            cv2.destroyAllWindows()
+            metrics.close()
+            if gate is not None:
+                print(gate.summary())
 
 
 if __name__ == '__main__':
@@ -149,5 +394,24 @@ if __name__ == '__main__':
     parser.add_argument('--imgsz', type=int, default=224, help='Image size expected by the model (default: 224)')
     parser.add_argument('--no-overlay', action='store_true', help='Disable overlay images (use text only)')
     parser.add_argument('--perfect-threshold', type=float, default=99.9, help='Confidence threshold for special effects (default: 99.9)')
+    parser.add_argument('--threaded', action='store_true', help='Run capture, inference and display in separate threads (lower latency, higher FPS)')
+    parser.add_argument('--backend', choices=BACKENDS, default='torch', help='Inference backend: torch, lean (preallocated buffers, no per-frame allocations) or onnx (default: torch)')
+    parser.add_argument('--quantized', action='store_true', help='Use the INT8 model made by quantize_model.py (overrides --backend)')
+    parser.add_argument('--fast-start', action='store_true', help='Cached fused model, camera opened during model load and warm-up before the first frame')
+    parser.add_argument('--motion-gate', action='store_true', help='Only re-run the model when the scene changes (saves CPU on static scenes)')
+    parser.add_argument('--motion-threshold', type=float, default=0.02, help='Fraction of pixels that must change to re-run the model (default: 0.02)')
+    parser.add_argument('--max-age', type=float, default=1.0, help='Re-run the model at least this often in seconds, even without motion (default: 1.0)')
+    parser.add_argument('--metrics-file', type=str, default=None, help='Append per-stage latency percentiles to this JSONL file')
+    parser.add_argument('--metrics-port', type=int, default=None, help='Serve Prometheus-style metrics on http://127.0.0.1:PORT/metrics')
+    parser.add_argument('--metrics-interval', type=float, default=10.0, help='Seconds between metrics flushes (default: 10)')
+    parser.add_argument('--source', type=str, default='0', help='Webcam index, video file, image directory or stream URL (default: 0)')
+    parser.add_argument('--loop', action='store_true', help='Loop an image directory source')
+    parser.add_argument('--headless', action='store_true', help='No window: only emit predictions as JSON lines')
+    parser.add_argument('--output', type=str, default=None, help='With --headless, write predictions to this file instead of stdout')
     args = parser.parse_args()
-    main(args.weights, args.imgsz, use_overlay=not args.no_overlay, perfect_threshold=args.perfect_threshold)
+    main(args.weights, args.imgsz, use_overlay=not args.no_overlay, perfect_threshold=args.perfect_threshold,
+         threaded=args.threaded, backend=args.backend, motion_gate=args.motion_gate,
+         motion_threshold=args.motion_threshold, max_age=args.max_age, metrics_file=args.metrics_file,
+         metrics_port=args.metrics_port, metrics_interval=args.metrics_interval, source=args.source,
+         headless=args.headless, output=args.output, loop=args.loop, quantized=args.quantized,
+         fast_start=args.fast_start)
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Low-overhead per-stage timing for the demos.
+
+    metrics = Metrics(enabled=True, jsonl_path='metrics.jsonl', port=9108)
+    with metrics.stage('inference'):
+        probs = model.predict(frame)
+    metrics.frame_done()      # counts displayed frames, flushes periodically
+
+Each stage keeps its most recent samples in a ring buffer.  Every
+flush_interval seconds the p50/p95/p99 latencies are appended to a JSONL file
+and/or published on a local Prometheus-style text endpoint
+(http://127.0.0.1:<port>/metrics).  When disabled, stage() returns a shared
+no-op context manager, so instrumented code pays almost nothing.
+
+StartupTimer breaks the time from launch to the first displayed frame into
+phases (imports, model load, warm-up, camera open); attached to a Metrics
+instance it reports on the first frame_done() and is exported with the stages.
+"""
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+import numpy as np
+
+from frame_pipeline import RateMeter
+
+_DISABLED = nullcontext()
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class _StageTimer:
+    __slots__ = ('metrics', 'name', 'start')
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class StartupTimer:
+    """Wall-clock phases from launch to the first displayed frame."""
+
+    def __init__(self, launched):
+        self.launched = launched
+        self.phases = {}
+        self.background = set()
+        self.first_frame = None
+
+    def mark(self, name):
+        """Record the time since launch as a phase (e.g. module imports)."""
+        self.phases[name] = time.perf_counter() - self.launched
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - start
+
+    def in_background(self, name, fn, *args, **kwargs):
+        """Run fn on a daemon thread, timed as an overlapped phase; returns a Future."""
+        future = Future()
+
+        def run():
+            start = time.perf_counter()
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                self.phases[name] = time.perf_counter() - start
+                self.background.add(name)
+
+        threading.Thread(target=run, name=f"startup-{name}", daemon=True).start()
+        return future
+
+    def frame_shown(self):
+        """Call when a frame is shown; prints the report the first time."""
+        if self.first_frame is not None:
+            return
+        self.first_frame = time.perf_counter() - self.launched
+        parts = ', '.join(f"{name} {seconds:.2f}s" + (" (in background)" if name in self.background else '')
+                          for name, seconds in self.phases.items())
+        print(f"⏱  First frame {self.first_frame:.2f}s after launch: {parts}")
+
+
+class Metrics:
+    """Rolling per-stage latency samples with periodic JSONL/Prometheus export."""
+
+    def __init__(self, enabled=False, jsonl_path=None, port=None, flush_interval=10.0, window=1000,
+                 prefix='hand_demo'):
+        self.enabled = enabled or jsonl_path is not None or port is not None
+        self.jsonl_path = jsonl_path
+        self.flush_interval = flush_interval
+        self.window = window
+        self.prefix = prefix
+        self.show_hud = False
+        self.startup = None
+        self.fps = RateMeter()
+        self._samples = {}
+        self._totals = {}
+        self._lock = threading.Lock()
+        self._last_flush = time.perf_counter()
+        self._exposition = ''
+        self._server = None
+        if port is not None:
+            self._start_server(port)
+
+    def stage(self, name):
+        """Context manager timing one stage; a no-op while disabled."""
+        if not self.enabled:
+            return _DISABLED
+        return _StageTimer(self, name)
+
+    def record(self, name, seconds):
+        """Add one latency sample (seconds) for a stage."""
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self.window)
+                self._totals[name] = [0, 0.0]
+            samples.append(seconds)
+            totals = self._totals[name]
+            totals[0] += 1
+            totals[1] += seconds
+
+    def frame_done(self):
+        """Mark one displayed frame and flush if the interval has elapsed."""
+        if self.startup is not None and self.startup.first_frame is None:
+            self.startup.frame_shown()
+        if not self.enabled:
+            return
+        self.fps.tick()
+        if time.perf_counter() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def summary(self):
+        """{stage: {p50, p95, p99, mean in ms, count, sum in s}} over the rolling window."""
+        with self._lock:
+            snapshot = {name: (np.fromiter(samples, dtype=np.float64), list(self._totals[name]))
+                        for name, samples in self._samples.items() if samples}
+        result = {}
+        for name, (values, (count, total)) in snapshot.items():
+            stats = {f"p{int(q * 100)}": round(float(np.quantile(values, q)) * 1000, 4) for q in QUANTILES}
+            stats['mean'] = round(float(values.mean()) * 1000, 4)
+            stats['count'] = count
+            stats['sum'] = round(total, 6)
+            result[name] = stats
+        return result
+
+    def flush(self):
+        """Write the current summary to the JSONL file and the HTTP endpoint."""
+        self._last_flush = time.perf_counter()
+        summary = self.summary()
+        record = {'time': time.time(), 'fps': round(self.fps.rate(), 2), 'stages': summary}
+        if self.startup is not None and self.startup.first_frame is not None:
+            record['time_to_first_frame'] = round(self.startup.first_frame, 3)
+        if self.jsonl_path is not None:
+            with open(self.jsonl_path, 'a') as f:
+                f.write(json.dumps(record) + '\n')
+        if self._server is not None:
+            self._exposition = self.prometheus_text(record)
+        return record
+
+    def prometheus_text(self, record):
+        """Render a flushed record in the Prometheus text exposition format."""
+        metric = f"{self.prefix}_stage_latency_seconds"
+        lines = [
+            f"# HELP {metric} Per-stage latency over the last {self.window} samples.",
+            f"# TYPE {metric} summary",
+        ]
+        for name, stats in record['stages'].items():
+            for q in QUANTILES:
+                lines.append(f'{metric}{{stage="{name}",quantile="{q}"}} {stats[f"p{int(q * 100)}"] / 1000:.6f}')
+            lines.append(f'{metric}_sum{{stage="{name}"}} {stats["sum"]:.6f}')
+            lines.append(f'{metric}_count{{stage="{name}"}} {stats["count"]}')
+        lines.append(f"# HELP {self.prefix}_fps Displayed frames per second.")
+        lines.append(f"# TYPE {self.prefix}_fps gauge")
+        lines.append(f"{self.prefix}_fps {record['fps']}")
+        if 'time_to_first_frame' in record:
+            lines.append(f"# HELP {self.prefix}_time_to_first_frame_seconds Launch to first displayed frame.")
+            lines.append(f"# TYPE {self.prefix}_time_to_first_frame_seconds gauge")
+            lines.append(f"{self.prefix}_time_to_first_frame_seconds {record['time_to_first_frame']}")
+        return '\n'.join(lines) + '\n'
+
+    def toggle_hud(self):
+        """Show or hide the on-screen HUD; timing starts the first time it is shown."""
+        self.show_hud = not self.show_hud
+        self.enabled = self.enabled or self.show_hud
+
+    def draw_hud(self, frame, origin=(10, 130)):
+        """Draw rolling FPS and per-stage p50/p95 latencies onto frame."""
+        x, y = origin
+        lines = [f"FPS {self.fps.rate():.1f}"]
+        for name, stats in self.summary().items():
+            lines.append(f"{name:<10} p50 {stats['p50']:6.1f} ms  p95 {stats['p95']:6.1f} ms")
+        for line in lines:
+            cv2.putText(frame, line, (x, y), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1, cv2.LINE_AA)
+            y += 20
+        return frame
+
+    def _start_server(self, port):
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = metrics._exposition.encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        threading.Thread(target=self._server.serve_forever, name='metrics-http', daemon=True).start()
+        print(f"Metrics endpoint: http://127.0.0.1:{port}/metrics")
+
+    def close(self):
+        """Flush once more and stop the HTTP endpoint."""
+        if self.enabled:
+            self.flush()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Motion gate: only re-run the classifier when the scene has changed.
+
+Each frame is shrunk to a tiny grayscale thumbnail and compared with the
+thumbnail of the last frame the model actually saw.  If too few pixels changed
+and the last prediction is still fresh, the previous result is reused.  At an
+installation where the scene is static most of the time this skips the vast
+majority of model calls, while a hand entering the view still changes enough
+pixels to trigger inference on the very next frame.
+"""
+import time
+
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """Decides per frame whether the scene changed enough to re-run inference.
+
+    threshold   fraction of thumbnail pixels that must change (0-1)
+    pixel_delta per-pixel grayscale difference that counts as a change (0-255)
+    max_age     seconds after which inference is forced even without motion
+    """
+
+    def __init__(self, threshold: float = 0.02, pixel_delta: int = 25, max_age: float = 1.0,
+                 size=(64, 48)):
+        self.threshold = threshold
+        self.pixel_delta = pixel_delta
+        self.max_age = max_age
+        self.size = size
+        self.reference = None
+        self.reference_time = 0.0
+        self.start_time = time.perf_counter()
+        self.frames = 0
+        self.inferences = 0
+        self.last_change = 0.0
+        self._small = np.empty((size[1], size[0], 3), dtype=np.uint8)
+        self._gray = np.empty((size[1], size[0]), dtype=np.uint8)
+        self._diff = np.empty_like(self._gray)
+
+    def should_infer(self, frame) -> bool:
+        """Return True if frame should go to the model (and make it the new reference)."""
+        self.frames += 1
+        cv2.resize(frame, self.size, dst=self._small, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self._small, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        now = time.perf_counter()
+
+        if self.reference is not None and now - self.reference_time < self.max_age:
+            cv2.absdiff(self._gray, self.reference, dst=self._diff)
+            changed = np.count_nonzero(self._diff > self.pixel_delta)
+            self.last_change = changed / self._diff.size
+            if self.last_change < self.threshold:
+                return False
+
+        if self.reference is None:
+            self.reference = np.empty_like(self._gray)
+        self.reference[:] = self._gray
+        self.reference_time = now
+        self.inferences += 1
+        return True
+
+    @property
+    def skipped(self) -> int:
+        """Frames whose previous result was reused instead of running the model."""
+        return self.frames - self.inferences
+
+    def stats(self) -> dict:
+        """Counters for tuning: frames seen, inferences run/skipped and rates."""
+        elapsed = max(time.perf_counter() - self.start_time, 1e-9)
+        return {
+            'frames': self.frames,
+            'inferences': self.inferences,
+            'skipped': self.skipped,
+            'skip_ratio': self.skipped / self.frames if self.frames else 0.0,
+            'inference_rate': self.inferences / elapsed,
+            'last_change': self.last_change,
+        }
+
+    def summary(self) -> str:
+        """One-line human-readable version of stats()."""
+        s = self.stats()
+        return (f"motion gate: {s['inferences']}/{s['frames']} frames inferred, "
+                f"{s['skipped']} skipped ({s['skip_ratio'] * 100:.0f}%), "
+                f"{s['inference_rate']:.1f} inferences/sec")
+
+
+class MotionGatedPredictor:
+    """Wraps predict_fn so unchanged frames reuse the previous result."""
+
+    def __init__(self, predict_fn, gate: MotionGate):
+        self.predict_fn = predict_fn
+        self.gate = gate
+        self.last_result = None
+
+    def __call__(self, frame):
+        if self.gate.should_infer(frame) or self.last_result is None:
+            self.last_result = self.predict_fn(frame)
+        return self.last_result
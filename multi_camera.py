@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Live demo for several cameras sharing one model.
+
+Every source gets its own capture thread that keeps only its newest frame.  A
+single inference thread gathers the newest unseen frame of every stream into
+one batch per tick, runs one model call and routes each result back to its
+stream, so N cameras cost one copy of the model and one call per tick instead
+of N processes each paying the full per-call overhead.  Each stream is shown
+in its own window (or, with --headless, written as JSON lines tagged with the
+stream index).  Video files are played at their own frame rate, like a camera,
+so a frame is only skipped when the model falls behind.
+
+    python3 multi_camera.py --weights best_final.pt --sources 0 1 2
+    python3 multi_camera.py --weights best_final.pt --sources hand.mov not_hand.mov --headless
+"""
+import argparse
+import json
+import sys
+import time
+from contextlib import nullcontext
+
+import cv2
+
+from frame_pipeline import BatchInferenceWorker, LatestFrameGrabber
+from frame_sources import describe_source, open_source
+from hand_classifier import HandClassifier
+from inference_backends import BACKENDS
+from live_demo import draw_detection, handle_key, load_overlay_image, status_to_stderr
+from metrics import Metrics
+
+
+def classify_batch(model):
+    """predict_batch_fn for BatchInferenceWorker: frames -> [(label, probs)]."""
+    def predict_batch(frames):
+        probs = model.predict_batch(frames)
+        indices, _ = model.top1(probs)
+        return [(model.labels[i], p) for i, p in zip(indices, probs)]
+    return predict_batch
+
+
+def run_windows(grabbers, worker, sources, ghost_overlay, metrics, report_every: float = 5.0):
+    """One window per stream, each showing its newest frame with its newest prediction."""
+    titles = [f"Stream {i}: {describe_source(s)}" for i, s in enumerate(sources)]
+    shown = [0] * len(grabbers)
+    last_report = time.perf_counter()
+    while not worker.error and not all(g.failed for g in grabbers):
+        for i, grabber in enumerate(grabbers):
+            seq, item = grabber.frames.peek()
+            if item is None or seq == shown[i]:
+                continue
+            shown[i] = seq
+            # The grabber hands out its own buffer; draw on a copy
+            frame = item[1].copy()
+            with metrics.stage('render'):
+                _, result = worker.results[i].peek()
+                if result is not None:
+                    frame = draw_detection(frame, *result[2], ghost_overlay)
+                cv2.putText(frame, f'cap {grabber.meter.rate():.0f} | inf {worker.meters[i].rate():.0f} fps',
+                            (10, frame.shape[0] - 15), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1,
+                            cv2.LINE_AA)
+                if metrics.show_hud:
+                    metrics.draw_hud(frame)
+            with metrics.stage('display'):
+                cv2.imshow(titles[i], frame)
+            metrics.frame_done()
+        if handle_key(cv2.waitKey(1) & 0xFF, metrics):
+            break
+        if time.perf_counter() - last_report >= report_every:
+            last_report = time.perf_counter()
+            print(f"{worker.meter.rate():.1f} batches/sec, mean batch {worker.mean_batch:.1f} | " +
+                  " | ".join(f"{i}: {m.rate():.1f} fps" for i, m in enumerate(worker.meters)))
+
+
+def run_headless(worker, sources, labels, out, metrics, report_every: float = 5.0):
+    """No windows: run the batching loop here and emit one JSON line per prediction."""
+    counts = [0] * len(sources)
+    last_report = time.perf_counter()
+    try:
+        while True:
+            routed = worker.step()
+            if routed is None:
+                break
+            for stream, _, (label, probs) in routed:
+                record = {
+                    'stream': stream,
+                    'source': str(sources[stream]),
+                    'frame': counts[stream],
+                    'time': round(time.time(), 3),
+                    'label': label,
+                    'confidence': round(float(max(probs)), 4),
+                    'probs': {name: round(float(p), 4) for name, p in zip(labels, probs)},
+                }
+                out.write(json.dumps(record) + '\n')
+                counts[stream] += 1
+                metrics.frame_done()
+            if time.perf_counter() - last_report >= report_every:
+                last_report = time.perf_counter()
+                out.flush()
+                print(f"{worker.inferred} predictions | {worker.meter.rate():.1f} batches/sec, "
+                      f"mean batch {worker.mean_batch:.1f}", file=sys.stderr)
+    except KeyboardInterrupt:
+        pass
+
+
+def main(weights: str, sources, imgsz: int = 224, backend: str = 'torch', quantized: bool = False,
+         use_overlay: bool = True, headless: bool = False, output: str = None, loop: bool = False,
+         metrics_file: str = None, metrics_port: int = None, metrics_interval: float = 10.0, fps: float = None) -> int:
+    # With --headless, stdout may carry the predictions, so status messages go to stderr
+    with status_to_stderr(headless) as real_stdout:
+        # One model for all streams
+        model = HandClassifier(weights, imgsz, backend, quantized=quantized, warmup=True)
+        print(f"Inference backend: {model.name}")
+
+        caps = []
+        try:
+            for source in sources:
+                caps.append(open_source(source, loop=loop, fps=fps))
+                print(f"Stream {len(caps) - 1}: {describe_source(source)}")
+        except RuntimeError as e:
+            print(f"Error: {e}")
+            for cap in caps:
+                cap.release()
+            return 1
+
+        ghost_overlay = None
+        if use_overlay and not headless:
+            ghost_overlay = load_overlay_image('assets/ghost.png', 150, 150)
+
+        metrics = Metrics(jsonl_path=metrics_file, port=metrics_port, flush_interval=metrics_interval)
+        grabbers = [LatestFrameGrabber(cap, name=f'capture-{i}', metrics=metrics) for i, cap in enumerate(caps)]
+        for grabber in grabbers:
+            # Keep the driver from buffering stale frames (ignored by some backends)
+            grabber.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+            grabber.start()
+        worker = BatchInferenceWorker(grabbers, classify_batch(model), metrics=metrics)
+
+        start = time.perf_counter()
+        try:
+            if headless:
+                with open(output, 'w') if output else nullcontext(real_stdout) as out:
+                    run_headless(worker, sources, model.labels, out, metrics)
+            else:
+                print(f"Batching {len(sources)} streams into one model call per tick. Press 'q' to quit, 'm' for the timing HUD.")
+                worker.start()
+                run_windows(grabbers, worker, sources, ghost_overlay, metrics)
+        finally:
+            worker.stop()
+            for grabber in grabbers:
+                grabber.stop()
+            if worker.is_alive():
+                worker.join(timeout=2.0)
+            for grabber in grabbers:
+                grabber.join(timeout=2.0)
+                grabber.cap.release()
+            if not headless:
+                cv2.destroyAllWindows()
+            metrics.close()
+
+    if worker.error is not None:
+        raise worker.error
+
+    elapsed = time.perf_counter() - start
+    print(f"\n📊 {worker.inferred} predictions in {worker.batches} model calls "
+          f"(mean batch {worker.mean_batch:.1f}), {worker.inferred / elapsed if elapsed > 0 else 0:.1f} frames/sec total",
+          file=sys.stderr)
+    for i, grabber in enumerate(grabbers):
+        print(f"  stream {i}: captured {grabber.meter.count}, inferred {worker.meters[i].count}, "
+              f"dropped {grabber.dropped} stale frames", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Several cameras, one model: cross-stream batched inference')
+    parser.add_argument('--weights', type=str, required=True, help='Path to trained weights')
+    parser.add_argument('--sources', nargs='+', default=['0'], help='Webcam indices, video files, image directories or stream URLs (default: 0)')
+    parser.add_argument('--imgsz', type=int, default=224, help='Image size expected by the model (default: 224)')
+    parser.add_argument('--backend', choices=BACKENDS, default='torch', help='Inference backend (default: torch)')
+    parser.add_argument('--quantized', action='store_true', help='Use the INT8 model made by quantize_model.py (overrides --backend)')
+    parser.add_argument('--no-overlay', action='store_true', help='Disable overlay images (use text only)')
+    parser.add_argument('--loop', action='store_true', help='Loop image directory sources')
+    parser.add_argument('--fps', type=float, default=None, help="Play video file and image directory sources at this rate, like a camera (default: a video's own frame rate; image directories as fast as possible)")
+    parser.add_argument('--headless', action='store_true', help='No windows: only emit predictions as JSON lines')
+    parser.add_argument('--output', type=str, default=None, help='With --headless, write predictions to this file instead of stdout')
+    parser.add_argument('--metrics-file', type=str, default=None, help='Append per-stage latency percentiles to this JSONL file')
+    parser.add_argument('--metrics-port', type=int, default=None, help='Serve Prometheus-style metrics on http://127.0.0.1:PORT/metrics')
+    parser.add_argument('--metrics-interval', type=float, default=10.0, help='Seconds between metrics flushes (default: 10)')
+    args = parser.parse_args()
+    sys.exit(main(args.weights, args.sources, args.imgsz, args.backend, args.quantized, not args.no_overlay,
+                  args.headless, args.output, args.loop, args.metrics_file, args.metrics_port, args.metrics_interval, args.fps))
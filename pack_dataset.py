@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Pack hand_cls/ into one memory-mapped array of pre-resized images.
+
+Training normally opens, decodes and resizes every full-resolution JPEG on
+every epoch.  Packing does that once:
+
+    hand_cls.224.npy    uint8 (N, 224, 224, 3) BGR images, resized (short side)
+                        and centre-cropped exactly like the classifier's eval transform
+    hand_cls.224.json   label index: class names, per-image labels and source files,
+                        and the [start, end) rows of each split
+
+The .npy is opened with mmap, so loading is instant and samples are read
+straight from the page cache with no per-image file opens or decodes.
+
+    python3 pack_dataset.py pack --imgsz 224
+    python3 pack_dataset.py train --data hand_cls.224.json --weights yolov8n-cls.pt --epochs 15
+    python3 pack_dataset.py eval --data hand_cls.224.json --weights best_final.pt
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from dataset_manifest import get_manifest
+
+SPLITS = ('train', 'val')
+
+
+def resize_center_crop(image, imgsz):
+    """Resize the short side to imgsz and centre-crop to imgsz x imgsz."""
+    h, w = image.shape[:2]
+    scale = imgsz / min(h, w)
+    new_w, new_h = max(imgsz, round(w * scale)), max(imgsz, round(h * scale))
+    resized = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_AREA)
+    top, left = (new_h - imgsz) // 2, (new_w - imgsz) // 2
+    return resized[top:top + imgsz, left:left + imgsz]
+
+
+def dataset_fingerprint(manifest, keys):
+    """Hash of the packed files' names and contents, to detect a stale pack."""
+    digest = hashlib.sha256()
+    for key in keys:
+        digest.update(f"{key}:{manifest.files[key]['sha256']}\n".encode())
+    return digest.hexdigest()
+
+
+def dataset_index(root='hand_cls'):
+    """(manifest, class names, keys in pack order, {split: [start, end)}, fingerprint) for root."""
+    manifest = get_manifest(root)
+    manifest.save()
+    names = sorted({record['class'] for record in manifest.files.values()})
+    keys = sorted((k for k, r in manifest.files.items() if r['split'] in SPLITS),
+                  key=lambda k: (SPLITS.index(manifest.files[k]['split']), k))
+    splits, start = {}, 0
+    for split in SPLITS:
+        count = sum(1 for k in keys if manifest.files[k]['split'] == split)
+        splits[split] = [start, start + count]
+        start += count
+    return manifest, names, keys, splits, dataset_fingerprint(manifest, keys)
+
+
+def decode_images(root, keys, imgsz, images, workers=None):
+    """Decode, resize and crop each key into images[i]; returns a readable flag per image."""
+    def load(i):
+        image = cv2.imread(os.path.join(root, keys[i]))
+        if image is None:
+            return False
+        images[i] = resize_center_crop(image, imgsz)
+        return True
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        return list(pool.map(load, range(len(keys))))
+
+
+def make_index(manifest, names, keys, splits, fingerprint, imgsz, ok, array=None):
+    return {
+        'version': 1,
+        'imgsz': imgsz,
+        'array': array,
+        'names': names,
+        'splits': splits,
+        'labels': [names.index(manifest.files[k]['class']) for k in keys],
+        'files': keys,
+        'unreadable': [k for k, good in zip(keys, ok) if not good],
+        'fingerprint': fingerprint,
+    }
+
+
+def pack(root='hand_cls', imgsz=224, output=None, workers=None, force=False):
+    """Pack root/<split>/<class> into <output>.npy + <output>.json; returns the index path."""
+    output = output or f"{root.rstrip('/')}.{imgsz}"
+    index_path, array_path = output + '.json', output + '.npy'
+    manifest, names, keys, splits, fingerprint = dataset_index(root)
+
+    if not force and os.path.exists(index_path) and os.path.exists(array_path):
+        with open(index_path) as f:
+            existing = json.load(f)
+        if existing.get('fingerprint') == fingerprint and existing.get('imgsz') == imgsz:
+            print(f"✓ {array_path} is up to date ({len(keys)} images)")
+            return index_path
+
+    print(f"Packing {len(keys)} images from {root}/ at {imgsz}x{imgsz}...")
+    began = time.perf_counter()
+    images = np.lib.format.open_memmap(array_path + '.tmp', mode='w+', dtype=np.uint8,
+                                       shape=(len(keys), imgsz, imgsz, 3))
+    ok = decode_images(root, keys, imgsz, images, workers)
+    images.flush()
+    del images
+    os.replace(array_path + '.tmp', array_path)
+
+    index = make_index(manifest, names, keys, splits, fingerprint, imgsz, ok, os.path.basename(array_path))
+    with open(index_path, 'w') as f:
+        json.dump(index, f)
+
+    source_mb = sum(manifest.files[k]['size'] for k in keys) / 1e6
+    packed_mb = os.path.getsize(array_path) / 1e6
+    print(f"✓ Wrote {array_path} ({packed_mb:.1f} MB from {source_mb:.1f} MB of JPEGs) "
+          f"and {index_path} in {time.perf_counter() - began:.1f}s")
+    if index['unreadable']:
+        print(f"Warning: {len(index['unreadable'])} images could not be read and are left out of training and evaluation")
+    return index_path
+
+
+def pack_in_memory(root='hand_cls', imgsz=224, workers=None):
+    """Decode root into a RAM-resident pack without writing anything; returns (index, images)."""
+    manifest, names, keys, splits, fingerprint = dataset_index(root)
+    print(f"Caching {len(keys)} images from {root}/ in RAM at {imgsz}x{imgsz} "
+          f"({len(keys) * imgsz * imgsz * 3 / 1e6:.0f} MB)...")
+    began = time.perf_counter()
+    images = np.empty((len(keys), imgsz, imgsz, 3), dtype=np.uint8)
+    ok = decode_images(root, keys, imgsz, images, workers)
+    index = make_index(manifest, names, keys, splits, fingerprint, imgsz, ok)
+    print(f"✓ Cached in {time.perf_counter() - began:.1f}s")
+    if index['unreadable']:
+        print(f"Warning: {len(index['unreadable'])} images could not be read and are left out of training and evaluation")
+    return index, images
+
+
+def load_pack(source):
+    """(index, images) for a packed index path, or an in-memory (index, images) pair."""
+    if not isinstance(source, (str, os.PathLike)):
+        return source
+    with open(source) as f:
+        index = json.load(f)
+    array_path = os.path.join(os.path.dirname(source), index['array'])
+    return index, np.load(array_path, mmap_mode='r')
+
+
+class PackedDataset:
+    """One split of a packed dataset: memory-mapped (or in-memory) images and integer labels."""
+
+    def __init__(self, source, split='train'):
+        self.index, images = load_pack(source)
+        start, end = self.index['splits'][split]
+        self.split = split
+        self.names = self.index['names']
+        self.imgsz = self.index['imgsz']
+        self.images = images[start:end]
+        # Unreadable images were left black in the pack; skip them like ultralytics skips corrupt files
+        unreadable = set(self.index.get('unreadable', ()))
+        files = self.index['files'][start:end]
+        self.rows = np.array([i for i, k in enumerate(files) if k not in unreadable], dtype=np.int64)
+        self.labels = np.asarray(self.index['labels'][start:end], dtype=np.int64)[self.rows]
+        self.files = [files[i] for i in self.rows]
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __getitem__(self, i):
+        """(BGR uint8 image, label) for sample i."""
+        return self.images[self.rows[i]], int(self.labels[i])
+
+    def batches(self, batch_size=64, shuffle=False, seed=0):
+        """Yield (images NHWC uint8, labels) batches; shuffling reads rows in sorted runs."""
+        order = np.arange(len(self))
+        if shuffle:
+            np.random.default_rng(seed).shuffle(order)
+        for i in range(0, len(order), batch_size):
+            rows = np.sort(order[i:i + batch_size])
+            yield self.images[self.rows[rows]], self.labels[rows]
+
+
+class PackedClassificationDataset:
+    """Drop-in for ultralytics' ClassificationDataset that reads from a PackedDataset."""
+
+    def __init__(self, source, split, args, augment=False, prefix=''):
+        from ultralytics.data.augment import classify_augmentations, classify_transforms
+
+        self.packed = PackedDataset(source, split)
+        self.prefix = prefix
+        if augment and args.fraction < 1.0:
+            self.packed.labels = self.packed.labels[:round(len(self.packed) * args.fraction)]
+        self.torch_transforms = (
+            classify_augmentations(
+                size=args.imgsz,
+                scale=(1.0 - args.scale, 1.0),
+                hflip=args.fliplr,
+                vflip=args.flipud,
+                erasing=args.erasing,
+                auto_augment=args.auto_augment,
+                hsv_h=args.hsv_h,
+                hsv_s=args.hsv_s,
+                hsv_v=args.hsv_v,
+            )
+            if augment
+            else classify_transforms(size=args.imgsz, crop_fraction=args.crop_fraction)
+        )
+
+    def __getitem__(self, i):
+        from PIL import Image
+
+        image, label = self.packed[i]
+        sample = self.torch_transforms(Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB)))
+        return {'img': sample, 'cls': label}
+
+    def __len__(self):
+        return len(self.packed)
+
+
+def packed_trainer(source):
+    """ClassificationTrainer subclass that trains from a packed index path or in-memory pack."""
+    from ultralytics.models.yolo.classify import ClassificationTrainer
+
+    class PackedClassificationTrainer(ClassificationTrainer):
+        def get_dataset(self):
+            index, _ = load_pack(source)
+            self.data = {'train': 'train', 'val': 'val', 'nc': len(index['names']),
+                         'names': dict(enumerate(index['names']))}
+            return 'train', 'val'
+
+        def build_dataset(self, img_path, mode='train', batch=None):
+            return PackedClassificationDataset(source, img_path, self.args, augment=mode == 'train', prefix=mode)
+
+        def final_eval(self):
+            # The stock final validation reloads the data from a dataset directory,
+            # so score best.pt on the packed val split directly instead
+            from ultralytics.utils import LOGGER
+            from ultralytics.utils.torch_utils import strip_optimizer
+
+            for f in self.last, self.best:
+                if f.exists():
+                    strip_optimizer(f)
+            if self.best.exists():
+                accuracy, _ = evaluate(source, str(self.best), split='val')
+                LOGGER.info(f"\nValidating {self.best}... top-1 {accuracy:.4f} on packed val")
+            LOGGER.info(f"Results saved to {self.save_dir}")
+
+    return PackedClassificationTrainer
+
+
+def train(index_path, weights='yolov8n-cls.pt', epochs=15, **kwargs):
+    """Train a YOLO classifier from a packed dataset; returns the ultralytics results."""
+    from ultralytics import YOLO
+
+    with open(index_path) as f:
+        imgsz = json.load(f)['imgsz']
+    model = YOLO(weights)
+    return model.train(trainer=packed_trainer(index_path), data=index_path, epochs=epochs,
+                       imgsz=kwargs.pop('imgsz', imgsz), **kwargs)
+
+
+def evaluate(source, weights, backend='torch', split='val', batch_size=64):
+    """Top-1 accuracy of weights on a packed split; returns (accuracy, images/sec)."""
+    from hand_classifier import HandClassifier
+
+    data = PackedDataset(source, split)
+    model = HandClassifier(weights, data.imgsz, backend, verbose=False)
+    names = model.labels
+    # Map dataset labels onto the model's class order by name
+    remap = np.array([names.index(n) if n in names else -1 for n in data.names])
+    correct = 0
+    start = time.perf_counter()
+    for images, labels in data.batches(batch_size):
+        probs = model.predict_batch(list(images))
+        correct += int((probs.argmax(axis=1) == remap[labels]).sum())
+    elapsed = time.perf_counter() - start
+    return correct / max(len(data), 1), len(data) / elapsed if elapsed > 0 else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pack hand_cls into a memory-mapped array and train/evaluate from it')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('pack', help='Pack hand_cls/ into <root>.<imgsz>.npy/.json')
+    p.add_argument('--root', default='hand_cls', help='Dataset root (default: hand_cls)')
+    p.add_argument('--imgsz', type=int, default=224, help='Image size to pack at (default: 224)')
+    p.add_argument('--output', default=None, help='Output path without extension (default: <root>.<imgsz>)')
+    p.add_argument('--force', action='store_true', help='Repack even if the pack is up to date')
+
+    p = sub.add_parser('train', help='Train from a packed dataset')
+    p.add_argument('--data', default='hand_cls.224.json', help='Packed index (default: hand_cls.224.json)')
+    p.add_argument('--weights', default='yolov8n-cls.pt', help='Starting weights (default: yolov8n-cls.pt)')
+    p.add_argument('--epochs', type=int, default=15, help='Epochs (default: 15)')
+    p.add_argument('--batch', type=int, default=16, help='Batch size (default: 16)')
+    p.add_argument('--device', default=None, help='Device, e.g. cpu, 0, mps (default: auto)')
+
+    p = sub.add_parser('eval', help='Top-1 accuracy of weights on a packed split')
+    p.add_argument('--data', default='hand_cls.224.json', help='Packed index (default: hand_cls.224.json)')
+    p.add_argument('--weights', default='best_final.pt', help='Weights to evaluate (default: best_final.pt)')
+    p.add_argument('--split', default='val', choices=SPLITS, help='Split (default: val)')
+    p.add_argument('--backend', default='torch', help='Inference backend (default: torch)')
+    args = parser.parse_args()
+
+    if args.command == 'pack':
+        if not os.path.isdir(args.root):
+            print(f"Error: {args.root} not found")
+            return 1
+        pack(args.root, args.imgsz, args.output, force=args.force)
+    elif args.command == 'train':
+        kwargs = {'batch': args.batch}
+        if args.device is not None:
+            kwargs['device'] = args.device
+        train(args.data, args.weights, args.epochs, **kwargs)
+    else:
+        accuracy, rate = evaluate(args.data, args.weights, args.backend, args.split)
+        print(f"✓ {args.weights} on {args.split}: top-1 {accuracy * 100:.1f}% ({rate:.0f} images/sec)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Make an INT8 copy of a trained classifier for fast CPU inference.
+
+The weights are exported to ONNX (cached, see inference_backends.py) and
+quantised with ONNX Runtime:
+
+    static   weights and activations in INT8; activation ranges are calibrated
+             on images from hand_cls/train (the default, and the fast one)
+    dynamic  INT8 weights, activation ranges computed at run time per frame
+             (a smaller file, but usually no faster than FP32 on CPU)
+
+Both models are then scored on hand_cls/val.  If INT8 top-1 accuracy is more
+than --tolerance percentage points below FP32, the INT8 model is discarded and
+the command fails; otherwise it is saved as <stem>.<hash>.<imgsz>.int8.onnx next
+to the weights, where `live_demo.py --quantized` and `debug_demo.py --quantized`
+find it.  Single-frame latency and file sizes are reported against FP32.
+
+    python3 quantize_model.py --weights best_final.pt
+    python3 quantize_model.py --weights best_final.pt --mode dynamic --tolerance 0.5
+    python3 live_demo.py --weights best_final.pt --quantized
+"""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from hand_classifier import HandClassifier
+from inference_backends import export_onnx, list_images, quantized_model_path, time_backend, to_input_tensor
+
+MODES = ('static', 'dynamic')
+
+
+def sample_evenly(paths, count):
+    """Up to count paths spread evenly over the (sorted) list, so every class is covered."""
+    if count is None or len(paths) <= count:
+        return paths
+    return [paths[int(i)] for i in np.linspace(0, len(paths) - 1, count)]
+
+
+def load_labeled_images(image_dir, limit=None):
+    """(BGR frames, class names from the parent directory) for images under image_dir."""
+    paths = sample_evenly(list_images(image_dir), limit)
+    frames, labels = [], []
+    for path in paths:
+        frame = cv2.imread(path)
+        if frame is not None:
+            frames.append(frame)
+            labels.append(os.path.basename(os.path.dirname(path)))
+    return frames, labels
+
+
+def top1_accuracy(model, frames, labels, batch_size=32):
+    """Fraction of frames whose top-1 class name matches the label."""
+    correct = 0
+    for i in range(0, len(frames), batch_size):
+        probs = model.predict_batch(frames[i:i + batch_size])
+        correct += sum(model.labels[j] == label for j, label in zip(probs.argmax(axis=1), labels[i:i + batch_size]))
+    return correct / max(len(frames), 1)
+
+
+def calibration_reader(input_name, frames, imgsz):
+    """ONNX Runtime CalibrationDataReader over preprocessed frames."""
+    from onnxruntime.quantization import CalibrationDataReader
+
+    class FrameReader(CalibrationDataReader):
+        def __init__(self):
+            self.batches = iter([{input_name: to_input_tensor([frame], imgsz)} for frame in frames])
+
+        def get_next(self):
+            return next(self.batches, None)
+
+    return FrameReader()
+
+
+def quantize_onnx(fp32_path, output_path, mode='static', calibration_frames=None, imgsz=224):
+    """Write an INT8 version of fp32_path to output_path."""
+    import onnx
+    from onnxruntime.quantization import CalibrationMethod, QuantFormat, QuantType, quantize_dynamic, quantize_static
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    # Shape inference and graph cleanup (BN folding etc.) give the quantiser more to work with
+    prepared = output_path + '.pre.onnx'
+    try:
+        quant_pre_process(fp32_path, prepared, skip_symbolic_shape=True)
+    except Exception as e:
+        print(f"Warning: ONNX pre-processing failed ({e}); quantising the export as-is")
+        prepared = fp32_path
+
+    try:
+        if mode == 'static':
+            input_name = onnx.load(prepared, load_external_data=False).graph.input[0].name
+            quantize_static(prepared, output_path, calibration_reader(input_name, calibration_frames, imgsz),
+                            quant_format=QuantFormat.QDQ, per_channel=True, activation_type=QuantType.QUInt8,
+                            weight_type=QuantType.QInt8, calibrate_method=CalibrationMethod.MinMax)
+        else:
+            # ConvInteger kernels on CPU only take unsigned weights
+            quantize_dynamic(prepared, output_path, weight_type=QuantType.QUInt8)
+    finally:
+        if prepared != fp32_path and os.path.exists(prepared):
+            os.remove(prepared)
+
+    # Keep the class names (and the rest of ultralytics' metadata) on the quantised graph
+    source, quantized = onnx.load(fp32_path), onnx.load(output_path)
+    existing = {prop.key for prop in quantized.metadata_props}
+    for prop in source.metadata_props:
+        if prop.key not in existing:
+            quantized.metadata_props.add(key=prop.key, value=prop.value)
+    onnx.save(quantized, output_path)
+
+
+def quantize(weights, imgsz=224, mode='static', train_dir='hand_cls/train', val_dir='hand_cls/val',
+             calibration_images=200, tolerance=1.0, benchmark_frames=100):
+    """Quantise weights and gate on val accuracy; returns the INT8 path, or None if rejected."""
+    fp32_path = export_onnx(weights, imgsz)
+    output_path = quantized_model_path(weights, imgsz)
+    tmp_path = output_path + '.tmp.onnx'
+
+    calibration_frames = None
+    if mode == 'static':
+        calibration_frames, _ = load_labeled_images(train_dir, calibration_images)
+        if not calibration_frames:
+            print(f"Error: no calibration images found in {train_dir}")
+            return None
+        print(f"Calibrating on {len(calibration_frames)} images from {train_dir}...")
+    try:
+        start = time.perf_counter()
+        quantize_onnx(fp32_path, tmp_path, mode, calibration_frames, imgsz)
+        print(f"✓ Quantised ({mode}) in {time.perf_counter() - start:.1f}s")
+
+        frames, labels = load_labeled_images(val_dir)
+        if not frames:
+            print(f"Error: no validation images found in {val_dir}")
+            return None
+        fp32 = HandClassifier(fp32_path, imgsz, 'onnx', verbose=False)
+        int8 = HandClassifier(tmp_path, imgsz, 'onnx', verbose=False)
+        fp32_accuracy = top1_accuracy(fp32, frames, labels)
+        int8_accuracy = top1_accuracy(int8, frames, labels)
+        drop = (fp32_accuracy - int8_accuracy) * 100
+
+        print(f"\n📊 {weights} on {len(frames)} images from {val_dir}:")
+        print(f"  {'model':<10} {'top-1':>7} {'size MB':>8} {'p50 ms':>8} {'fps':>7} {'speedup':>8}")
+        rows = [('torch', None, weights), ('onnx fp32', fp32_accuracy, fp32_path), ('onnx int8', int8_accuracy, tmp_path)]
+        models = {'onnx fp32': fp32, 'onnx int8': int8}
+        bench = frames[:benchmark_frames]
+        latencies = {}
+        for label, _, _ in rows:
+            model = models.get(label) or HandClassifier(weights, imgsz, device='cpu', verbose=False)
+            latencies[label] = np.median(time_backend(model, bench)[1])
+        for label, accuracy, path in rows:
+            accuracy_text = f"{accuracy * 100:6.1f}%" if accuracy is not None else f"{'-':>7}"
+            print(f"  {label:<10} {accuracy_text} {os.path.getsize(path) / 1e6:8.2f} {latencies[label]:8.2f} "
+                  f"{1000 / latencies[label]:7.1f} {latencies['torch'] / latencies[label]:7.2f}x")
+        print(f"  INT8 vs FP32 ONNX: {latencies['onnx fp32'] / latencies['onnx int8']:.2f}x faster, "
+              f"{os.path.getsize(fp32_path) / os.path.getsize(tmp_path):.1f}x smaller, "
+              f"top-1 {(int8_accuracy - fp32_accuracy) * 100:+.1f} points")
+
+        if drop > tolerance:
+            print(f"\n✗ INT8 top-1 dropped by {drop:.1f} points (tolerance {tolerance:.1f}); not saving it")
+            if os.path.exists(output_path):
+                # An INT8 model from an earlier run would keep being used by --quantized
+                os.remove(output_path)
+                print(f"  Removed the previous {output_path}")
+            if mode == 'static':
+                print("  Try more --calibration-images, or --mode dynamic")
+            return None
+        os.replace(tmp_path, output_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    print(f"\n✓ Saved {output_path}")
+    print(f"  Run it with: python3 live_demo.py --weights {weights} --imgsz {imgsz} --quantized")
+    return output_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Quantise a classifier to INT8, keeping it only if val accuracy holds')
+    parser.add_argument('--weights', type=str, required=True, help='Trained weights (e.g., best_final.pt)')
+    parser.add_argument('--imgsz', type=int, default=224, help='Image size expected by the model (default: 224)')
+    parser.add_argument('--mode', choices=MODES, default='static', help='static (calibrated) or dynamic INT8 (default: static)')
+    parser.add_argument('--train', default='hand_cls/train', help='Calibration images (default: hand_cls/train)')
+    parser.add_argument('--val', default='hand_cls/val', help='Images for the accuracy gate (default: hand_cls/val)')
+    parser.add_argument('--calibration-images', type=int, default=200, help='Calibration images to use (default: 200)')
+    parser.add_argument('--tolerance', type=float, default=1.0, help='Max top-1 drop in percentage points (default: 1.0)')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.weights):
+        print(f"Error: {args.weights} not found")
+        return 1
+    output = quantize(args.weights, args.imgsz, args.mode, args.train, args.val, args.calibration_images,
+                      args.tolerance)
+    return 0 if output else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
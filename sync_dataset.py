@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Incrementally sync hand_cls/ to a training machine.
+
+Instead of re-uploading the whole tree with scp -r, the target keeps a small
+manifest (.sync_manifest.json: path -> sha256) of what it already has.  A sync
+compares it with the local dataset manifest and:
+
+    - sends only new or changed images, as gzip'd tar streams (one process,
+      no per-file round trips), in chunks of --chunk-mb
+    - deletes images that were removed locally (unless --no-delete)
+
+After each chunk the target's manifest is updated, so an interrupted sync
+resumes where it stopped.  Targets are a local directory or user@host:path
+over ssh:
+
+    python3 sync_dataset.py root@194.68.245.13:/workspace/hand_cls --port 22015 -i ~/.ssh/id_ed25519
+    python3 sync_dataset.py /Volumes/backup/hand_cls
+    python3 sync_dataset.py pod:/tmp/hand_cls --ssh-command "python3 sync_dataset.py local-ssh"   # local stand-in
+
+Only tar, mkdir, mv, rm and cat are needed on the remote side.
+"""
+import argparse
+import gzip
+import io
+import json
+import os
+import re
+import shlex
+import subprocess
+import sys
+import tarfile
+import time
+
+from dataset_manifest import get_manifest
+
+SYNC_MANIFEST = '.sync_manifest.json'
+SSH_TARGET = re.compile(r'^([^/\\:]{2,}):(.+)$')
+
+
+def manifest_bytes(files):
+    return json.dumps({'version': 1, 'files': files}, separators=(',', ':')).encode()
+
+
+def write_tar(stream, root, keys, target_files):
+    """Write keys (plus the updated sync manifest) as a gzip'd tar to stream."""
+    # JPEGs barely compress, so the fastest gzip level costs little and still shrinks headers/PNGs
+    with gzip.GzipFile(fileobj=stream, mode='wb', compresslevel=1) as gz, \
+            tarfile.open(fileobj=gz, mode='w|') as tar:
+        for key in keys:
+            tar.add(os.path.join(root, key), arcname=key, recursive=False)
+        data = manifest_bytes(target_files)
+        info = tarfile.TarInfo(SYNC_MANIFEST + '.tmp')
+        info.size = len(data)
+        info.mtime = time.time()
+        tar.addfile(info, io.BytesIO(data))
+
+
+class LocalTarget:
+    """A directory on this machine (e.g. a mounted volume)."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def __str__(self):
+        return self.path
+
+    def read_manifest(self):
+        try:
+            with open(os.path.join(self.path, SYNC_MANIFEST)) as f:
+                return json.load(f)['files']
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def send(self, root, keys, target_files):
+        os.makedirs(self.path, exist_ok=True)
+        buffer = io.BytesIO()
+        write_tar(buffer, root, keys, target_files)
+        buffer.seek(0)
+        with tarfile.open(fileobj=buffer, mode='r:gz') as tar:
+            if hasattr(tarfile, 'data_filter'):
+                tar.extractall(self.path, filter='data')
+            else:
+                tar.extractall(self.path)
+        os.replace(os.path.join(self.path, SYNC_MANIFEST + '.tmp'), os.path.join(self.path, SYNC_MANIFEST))
+        return buffer.getbuffer().nbytes
+
+    def delete(self, keys, target_files):
+        for key in keys:
+            path = os.path.join(self.path, key)
+            if os.path.exists(path):
+                os.remove(path)
+        self.write_manifest(target_files)
+
+    def write_manifest(self, target_files):
+        tmp_path = os.path.join(self.path, SYNC_MANIFEST + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(manifest_bytes(target_files))
+        os.replace(tmp_path, os.path.join(self.path, SYNC_MANIFEST))
+
+
+class SshTarget:
+    """user@host:path, driven through ssh (or any command with ssh's argument order)."""
+
+    def __init__(self, host, path, port=None, identity=None, ssh_command=None):
+        self.host = host
+        self.path = path
+        self.command = shlex.split(ssh_command) if ssh_command else ['ssh']
+        if port:
+            self.command += ['-p', str(port)]
+        if identity:
+            self.command += ['-i', os.path.expanduser(identity)]
+
+    def __str__(self):
+        return f"{self.host}:{self.path}"
+
+    def _run(self, script, stdin=None):
+        return subprocess.run(self.command + [self.host, script], input=stdin, capture_output=True)
+
+    def read_manifest(self):
+        result = self._run(f"cat {shlex.quote(self.path + '/' + SYNC_MANIFEST)} 2>/dev/null")
+        try:
+            return json.loads(result.stdout)['files'] if result.returncode == 0 else None
+        except (ValueError, KeyError):
+            return None
+
+    def send(self, root, keys, target_files):
+        path = shlex.quote(self.path)
+        script = (f"mkdir -p {path} && tar -xzf - -C {path} && "
+                  f"mv {path}/{SYNC_MANIFEST}.tmp {path}/{SYNC_MANIFEST}")
+        process = subprocess.Popen(self.command + [self.host, script], stdin=subprocess.PIPE,
+                                   stderr=subprocess.PIPE)
+        counter = _CountingWriter(process.stdin)
+        try:
+            write_tar(counter, root, keys, target_files)
+        finally:
+            process.stdin.close()
+        stderr = process.stderr.read()
+        if process.wait() != 0:
+            raise RuntimeError(f"remote tar failed: {stderr.decode(errors='replace').strip()}")
+        return counter.written
+
+    def delete(self, keys, target_files):
+        listing = b''.join(key.encode() + b'\0' for key in keys)
+        result = self._run(f"cd {shlex.quote(self.path)} && xargs -0 rm -f --", stdin=listing)
+        if result.returncode != 0:
+            raise RuntimeError(f"remote delete failed: {result.stderr.decode(errors='replace').strip()}")
+        self.write_manifest(target_files)
+
+    def write_manifest(self, target_files):
+        manifest = shlex.quote(self.path + '/' + SYNC_MANIFEST)
+        result = self._run(f"cat > {manifest}.tmp && mv {manifest}.tmp {manifest}", stdin=manifest_bytes(target_files))
+        if result.returncode != 0:
+            raise RuntimeError(f"could not update the target manifest: {result.stderr.decode(errors='replace').strip()}")
+
+
+class _CountingWriter:
+    """File-like wrapper that counts bytes written through it."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.written = 0
+
+    def write(self, data):
+        self.stream.write(data)
+        self.written += len(data)
+        return len(data)
+
+    def flush(self):
+        self.stream.flush()
+
+
+def open_target(spec, port=None, identity=None, ssh_command=None):
+    """LocalTarget for a path, SshTarget for host:path."""
+    match = SSH_TARGET.match(spec)
+    if match and not os.path.exists(spec):
+        return SshTarget(match.group(1), match.group(2), port, identity, ssh_command)
+    return LocalTarget(spec)
+
+
+def plan(local, remote):
+    """(keys to send, keys to delete) between {key: sha256} maps."""
+    send = sorted(k for k, digest in local.items() if remote.get(k) != digest)
+    delete = sorted(k for k in remote if k not in local)
+    return send, delete
+
+
+def chunks(keys, sizes, chunk_bytes):
+    """Split keys into runs of about chunk_bytes."""
+    chunk, total = [], 0
+    for key in keys:
+        chunk.append(key)
+        total += sizes[key]
+        if total >= chunk_bytes:
+            yield chunk
+            chunk, total = [], 0
+    if chunk:
+        yield chunk
+
+
+def sync(target, root='hand_cls', delete=True, dry_run=False, chunk_mb=32):
+    """Bring target in line with root; returns (files sent, bytes sent, files deleted)."""
+    manifest = get_manifest(root)
+    manifest.save()
+    local = {key: record['sha256'] for key, record in manifest.files.items()}
+    sizes = {key: record['size'] for key, record in manifest.files.items()}
+
+    remote = target.read_manifest()
+    if remote is None:
+        print(f"No sync manifest on {target} yet - sending everything")
+        remote = {}
+    to_send, to_delete = plan(local, remote)
+    to_delete = to_delete if delete else []
+    send_mb = sum(sizes[k] for k in to_send) / 1e6
+    print(f"{len(local)} local images, {len(remote)} on target: "
+          f"{len(to_send)} to send ({send_mb:.1f} MB), {len(to_delete)} to delete")
+    if dry_run or (not to_send and not to_delete):
+        return 0, 0, 0
+
+    start = time.perf_counter()
+    sent_files = sent_bytes = 0
+    parts = list(chunks(to_send, sizes, chunk_mb * 1e6))
+    for i, part in enumerate(parts, 1):
+        # The manifest shipped with a chunk only claims what that chunk completes
+        for key in part:
+            remote[key] = local[key]
+        sent_bytes += target.send(root, part, remote)
+        sent_files += len(part)
+        elapsed = max(time.perf_counter() - start, 1e-9)
+        print(f"  [{i}/{len(parts)}] {sent_files}/{len(to_send)} files, "
+              f"{sent_bytes / 1e6:.1f} MB sent ({sent_bytes / 1e6 / elapsed:.1f} MB/s)")
+
+    if to_delete:
+        for key in to_delete:
+            remote.pop(key, None)
+        target.delete(to_delete, remote)
+        print(f"  Deleted {len(to_delete)} images")
+    return sent_files, sent_bytes, len(to_delete)
+
+
+def local_ssh(argv):
+    """Stand-in for ssh: ignore the host and run the command with sh locally."""
+    args = list(argv)
+    while args and args[0].startswith('-'):
+        args = args[2:] if args[0] in ('-p', '-i') else args[1:]
+    if len(args) < 2:
+        print("usage: sync_dataset.py local-ssh [-p PORT] [-i KEY] HOST COMMAND", file=sys.stderr)
+        return 255
+    return subprocess.call(['sh', '-c', args[1]])
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == 'local-ssh':
+        return local_ssh(sys.argv[2:])
+
+    parser = argparse.ArgumentParser(description='Send only new/changed dataset images to a local or ssh target')
+    parser.add_argument('target', help='Destination: a directory or user@host:/path')
+    parser.add_argument('--root', default='hand_cls', help='Local dataset root (default: hand_cls)')
+    parser.add_argument('--port', '-P', type=int, default=None, help='ssh port')
+    parser.add_argument('--identity', '-i', default=None, help='ssh private key, e.g. ~/.ssh/id_ed25519')
+    parser.add_argument('--ssh-command', default=None, help="Command used instead of 'ssh' (same argument order)")
+    parser.add_argument('--no-delete', action='store_true', help='Keep images on the target that were removed locally')
+    parser.add_argument('--chunk-mb', type=float, default=32, help='Transfer chunk size; progress is saved after each (default: 32)')
+    parser.add_argument('--dry-run', action='store_true', help='Only show what would be transferred')
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.root):
+        print(f"Error: {args.root} not found")
+        return 1
+
+    target = open_target(args.target, args.port, args.identity, args.ssh_command)
+    start = time.perf_counter()
+    try:
+        sent, sent_bytes, deleted = sync(target, args.root, not args.no_delete, args.dry_run, args.chunk_mb)
+    except (RuntimeError, OSError) as e:
+        print(f"Error: {e}")
+        print("Re-run the same command to resume; completed chunks are not sent again.")
+        return 1
+    if not args.dry_run:
+        print(f"✓ {target} is up to date: {sent} sent ({sent_bytes / 1e6:.1f} MB), {deleted} deleted "
+              f"in {time.perf_counter() - start:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Train the hand classifier with CPU-friendly defaults.
+
+Wraps `yolo classify train` and adds:
+
+    - decoded-image caching: --cache ram decodes and resizes every image once
+      into memory; --cache disk keeps the same pack as a memory-mapped
+      hand_cls.<imgsz>.npy that later runs reuse (see pack_dataset.py);
+      --cache none reads the JPEGs every epoch like plain `yolo`
+    - --workers auto: measures how long loading/augmenting a batch takes
+      against a forward/backward pass and picks the dataloader worker count
+      (ultralytics otherwise forces 0 workers on CPU)
+    - a fixed --seed with deterministic algorithms, so a rerun with the same
+      arguments and worker count reproduces the same weights
+    - per-epoch timing (data loading vs forward/backward vs validation),
+      printed at the end and written to timing.csv in the run directory
+
+    python3 train.py                                  # hand_cls, yolov8n-cls.pt, 15 epochs
+    python3 train.py --cache disk --epochs 30 --imgsz 160
+    python3 train.py --workers 2 --seed 1 --device 0
+"""
+import argparse
+import csv
+import math
+import os
+import sys
+import time
+
+DEFAULT_DATA = 'hand_cls'
+TIMING_FILE = 'timing.csv'
+
+
+def cpu_count():
+    """CPUs this process may run on."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def choose_workers(data_seconds, compute_seconds, cpus, max_workers=8):
+    """Dataloader workers that minimise the time per batch.
+
+    In-process loading costs data + compute per batch.  With k workers the data
+    work is hidden behind compute, but the k cores it uses are taken from the
+    forward/backward pass, so a step costs about
+    max(compute * cpus / (cpus - k), data / k).
+    """
+    best, best_cost = 0, data_seconds + compute_seconds
+    for k in range(1, min(max_workers, cpus - 1) + 1):
+        cost = max(compute_seconds * cpus / (cpus - k), data_seconds / k)
+        if cost < best_cost * 0.95:  # only pay for worker processes if they clearly help
+            best, best_cost = k, cost
+    return best
+
+
+def probe_batch_costs(trainer, dataset, batch_size):
+    """Seconds per batch spent loading/augmenting in-process and in forward/backward."""
+    import torch
+
+    n = max(1, min(len(dataset), batch_size))
+    start = time.perf_counter()
+    samples = [dataset[i] for i in range(n)]
+    data_seconds = (time.perf_counter() - start) * batch_size / n
+
+    batch = trainer.preprocess_batch({'img': torch.stack([s['img'] for s in samples]),
+                                      'cls': torch.tensor([s['cls'] for s in samples])})
+    model = trainer.model
+    was_training = model.training
+    model.eval()  # keep BatchNorm running statistics untouched by the probe
+    compute_seconds = 0.0
+    for _ in range(2):  # the first pass includes one-off allocations
+        start = time.perf_counter()
+        loss, _ = model(batch)
+        loss.sum().backward()
+        compute_seconds = (time.perf_counter() - start) * batch_size / n
+    model.zero_grad(set_to_none=True)
+    model.train(was_training)
+    return data_seconds, compute_seconds
+
+
+def tuned_trainer(base, workers=None):
+    """Subclass of an ultralytics ClassificationTrainer that honours (or auto-tunes) workers."""
+    from ultralytics.utils import LOGGER
+
+    class TunedTrainer(base):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            # The stock trainer sets workers=0 on CPU; restore the requested count
+            self.args.workers = 0 if workers is None else workers
+            self.worker_probe = None
+
+        def get_dataloader(self, dataset_path, batch_size=16, rank=0, mode='train'):
+            if mode == 'train':
+                if workers is None:
+                    dataset = self.build_dataset(dataset_path, mode)
+                    data_s, compute_s = probe_batch_costs(self, dataset, batch_size)
+                    self.args.workers = choose_workers(data_s, compute_s, cpu_count())
+                    self.worker_probe = (data_s, compute_s)
+                    LOGGER.info(f"Auto workers: {data_s * 1000:.0f} ms loading vs {compute_s * 1000:.0f} ms "
+                                f"forward/backward per batch on {cpu_count()} CPUs -> {self.args.workers} workers")
+                if self.device.type == 'cpu' and self.args.workers:
+                    import torch
+                    # Leave the cores the workers use to them
+                    torch.set_num_threads(max(1, cpu_count() - self.args.workers))
+            return super().get_dataloader(dataset_path, batch_size, rank, mode)
+
+    return TunedTrainer
+
+
+class EpochTimer:
+    """Training callbacks that split each epoch into data loading, forward/backward and validation."""
+
+    def __init__(self):
+        self.rows = []
+        self._epoch_start = self._mark = self._batch_start = self._train_end = None
+        self._row = None
+
+    def attach(self, model):
+        model.add_callback('on_train_epoch_start', self.on_train_epoch_start)
+        model.add_callback('on_train_batch_start', self.on_train_batch_start)
+        model.add_callback('on_train_batch_end', self.on_train_batch_end)
+        model.add_callback('on_train_epoch_end', self.on_train_epoch_end)
+        model.add_callback('on_fit_epoch_end', self.on_fit_epoch_end)
+
+    def on_train_epoch_start(self, trainer):
+        self._epoch_start = self._mark = time.perf_counter()
+        self._row = {'epoch': trainer.epoch + 1, 'data_s': 0.0, 'compute_s': 0.0, 'images': 0,
+                     'workers': trainer.train_loader.num_workers}
+
+    def on_train_batch_start(self, trainer):
+        # The time since the previous batch finished was spent waiting for this one
+        now = time.perf_counter()
+        self._row['data_s'] += now - self._mark
+        self._batch_start = now
+
+    def on_train_batch_end(self, trainer):
+        now = time.perf_counter()
+        self._row['compute_s'] += now - self._batch_start
+        self._row['images'] += trainer.batch_size
+        self._mark = now
+
+    def on_train_epoch_end(self, trainer):
+        self._train_end = time.perf_counter()
+
+    def on_fit_epoch_end(self, trainer):
+        if self._row is None:  # also fired by the final validation of best.pt
+            return
+        now = time.perf_counter()
+        row = self._row
+        row['images'] = min(row['images'], len(trainer.train_loader.dataset))
+        row['val_s'] = now - self._train_end
+        row['total_s'] = now - self._epoch_start
+        row['images_per_s'] = row['images'] / row['total_s'] if row['total_s'] > 0 else 0.0
+        self.rows.append(row)
+        self._row = None
+
+    def write(self, path):
+        fields = ['epoch', 'workers', 'images', 'data_s', 'compute_s', 'val_s', 'total_s', 'images_per_s']
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            for row in self.rows:
+                writer.writerow({k: round(v, 3) if isinstance(v, float) else v for k, v in row.items()})
+
+    def print_report(self):
+        print("\n⏱  Epoch timing (seconds):")
+        print(f"  {'epoch':>5} {'data':>8} {'fwd/bwd':>8} {'val':>8} {'total':>8} {'img/s':>7}")
+        for row in self.rows:
+            print(f"  {row['epoch']:>5} {row['data_s']:>8.1f} {row['compute_s']:>8.1f} {row['val_s']:>8.1f} "
+                  f"{row['total_s']:>8.1f} {row['images_per_s']:>7.1f}")
+        total = sum(row['total_s'] for row in self.rows)
+        data = sum(row['data_s'] for row in self.rows)
+        if total > 0:
+            print(f"  {len(self.rows)} epochs in {total:.0f}s, {data / total * 100:.0f}% waiting for data")
+            if data / total > 0.3:
+                print("  💡 Data loading dominates: try --cache ram or more --workers")
+
+
+def train(data=DEFAULT_DATA, model='yolov8n-cls.pt', epochs=15, imgsz=224, batch=16, cache='ram',
+          workers=None, seed=0, device=None, **kwargs):
+    """Train a classifier; returns (ultralytics trainer, EpochTimer)."""
+    from ultralytics import YOLO
+    from ultralytics.models.yolo.classify import ClassificationTrainer
+
+    from pack_dataset import pack, pack_in_memory, packed_trainer
+
+    is_index = data.endswith('.json')
+    if is_index:
+        base = packed_trainer(data)
+    elif cache == 'ram':
+        base = packed_trainer(pack_in_memory(data, imgsz))
+    elif cache == 'disk':
+        data = pack(data, imgsz)
+        base = packed_trainer(data)
+    else:
+        base = ClassificationTrainer
+
+    yolo = YOLO(model)
+    timer = EpochTimer()
+    timer.attach(yolo)
+    if device is not None:
+        kwargs['device'] = device
+    yolo.train(trainer=tuned_trainer(base, workers), data=data, epochs=epochs, imgsz=imgsz, batch=batch,
+               seed=seed, deterministic=True, **kwargs)
+    return yolo.trainer, timer
+
+
+def parse_workers(value):
+    if value == 'auto':
+        return None
+    workers = int(value)
+    if workers < 0:
+        raise argparse.ArgumentTypeError("workers must be >= 0 or 'auto'")
+    return workers
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Train the hand classifier with caching, tuned workers and timing')
+    parser.add_argument('--data', default=DEFAULT_DATA, help='Dataset root or packed .json index (default: hand_cls)')
+    parser.add_argument('--model', default='yolov8n-cls.pt', help='Starting weights (default: yolov8n-cls.pt)')
+    parser.add_argument('--epochs', type=int, default=15, help='Epochs (default: 15)')
+    parser.add_argument('--imgsz', type=int, default=224, help='Image size (default: 224)')
+    parser.add_argument('--batch', type=int, default=16, help='Batch size (default: 16)')
+    parser.add_argument('--cache', choices=['ram', 'disk', 'none'], default='ram',
+                        help='Decoded-image cache: ram, disk (reusable pack) or none (default: ram)')
+    parser.add_argument('--workers', type=parse_workers, default=None,
+                        help="Dataloader workers, or 'auto' to measure (default: auto)")
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    parser.add_argument('--device', default=None, help='Device, e.g. cpu, 0, mps (default: auto)')
+    parser.add_argument('--project', default=None, help='Runs directory (default: runs/classify)')
+    parser.add_argument('--name', default=None, help='Run name (default: train, train2, ...)')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.data):
+        print(f"Error: {args.data} not found")
+        return 1
+
+    kwargs = {k: v for k, v in (('project', args.project), ('name', args.name)) if v is not None}
+    start = time.perf_counter()
+    trainer, timer = train(args.data, args.model, args.epochs, args.imgsz, args.batch, args.cache,
+                           args.workers, args.seed, args.device, **kwargs)
+
+    timing_path = os.path.join(trainer.save_dir, TIMING_FILE)
+    timer.write(timing_path)
+    timer.print_report()
+    elapsed = time.perf_counter() - start
+    print(f"\n✓ Trained in {elapsed / 60:.1f} min ({math.ceil(elapsed)}s)")
+    print(f"  Weights: {trainer.best}")
+    print(f"  Timing:  {timing_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())